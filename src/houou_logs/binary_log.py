@@ -0,0 +1,143 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import re
+import zlib
+from collections.abc import Iterator
+
+MAGIC = b"HLB\x01"
+COMPRESSION_LEVEL = 9
+
+# Records are an opcode byte followed by its operands.
+OP_LITERAL = 0x00  # varint length, raw bytes
+OP_DRAW_DISCARD = 0x01  # 0x01-0x08 for T/U/V/W/D/E/F/G, tile byte
+OP_DISCARD = 0x05  # first discard opcode (D)
+OP_MELD = 0x09  # who byte, varint meld code
+
+DRAW_DISCARD_LETTERS = b"TUVWDEFG"
+NUM_DRAW_DISCARD_OPS = len(DRAW_DISCARD_LETTERS)
+MAX_TILE = 0xFF
+
+# Only the exact serializations below are encoded compactly. Anything
+# else, including unusual spacing, stays in a literal so that decoding
+# reproduces the original bytes.
+COMPACT_TAG_PATTERN = re.compile(
+    rb"<([TUVWDEFG])(0|[1-9][0-9]{0,2})/>"
+    rb'|<N who="([0-3])" m="(0|[1-9][0-9]{0,9})" />',
+)
+
+DRAW_DISCARD_TAGS = [
+    [b"<%c%d/>" % (letter, tile) for tile in range(MAX_TILE + 1)]
+    for letter in DRAW_DISCARD_LETTERS
+]
+
+
+def is_binary_log(blob: bytes) -> bool:
+    return blob[: len(MAGIC)] == MAGIC
+
+
+def write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:  # noqa: PLR2004
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(view: memoryview, pos: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = view[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:  # noqa: PLR2004
+            return (value, pos)
+        shift += 7
+
+
+def write_literal(out: bytearray, literal: bytes) -> None:
+    if not literal:
+        return
+    out.append(OP_LITERAL)
+    write_varint(out, len(literal))
+    out += literal
+
+
+def encode_records(content: bytes) -> bytes:
+    out = bytearray()
+    last_end = 0
+
+    for match in COMPACT_TAG_PATTERN.finditer(content):
+        letter, tile, who, code = match.groups()
+        if letter is not None and int(tile) > MAX_TILE:
+            continue
+
+        write_literal(out, content[last_end : match.start()])
+        last_end = match.end()
+
+        if letter is not None:
+            out.append(OP_DRAW_DISCARD + DRAW_DISCARD_LETTERS.index(letter))
+            out.append(int(tile))
+        else:
+            out.append(OP_MELD)
+            out.append(int(who))
+            write_varint(out, int(code))
+
+    write_literal(out, content[last_end:])
+    return bytes(out)
+
+
+def encode_log_content(content: bytes) -> bytes:
+    payload = encode_records(content)
+    return MAGIC + zlib.compress(payload, COMPRESSION_LEVEL)
+
+
+def iter_records(
+    blob: bytes,
+) -> Iterator[tuple[int, int, int, memoryview | None]]:
+    # Yields (opcode, who, value, literal). For draws and discards,
+    # value is the tile; for melds, the meld code.
+    if not is_binary_log(blob):
+        msg = "not a binary log"
+        raise ValueError(msg)
+
+    view = memoryview(zlib.decompress(blob[len(MAGIC) :]))
+    pos = 0
+    end = len(view)
+
+    while pos < end:
+        op = view[pos]
+        pos += 1
+
+        if op == OP_LITERAL:
+            length, pos = read_varint(view, pos)
+            if pos + length > end:
+                msg = "truncated literal in binary log"
+                raise ValueError(msg)
+            yield (op, 0, 0, view[pos : pos + length])
+            pos += length
+        elif op < OP_DRAW_DISCARD + NUM_DRAW_DISCARD_OPS:
+            yield (op, (op - OP_DRAW_DISCARD) % 4, view[pos], None)
+            pos += 1
+        elif op == OP_MELD:
+            who = view[pos]
+            code, pos = read_varint(view, pos + 1)
+            yield (op, who, code, None)
+        else:
+            msg = f"unknown opcode in binary log: {op:#04x}"
+            raise ValueError(msg)
+
+
+def decode_log_content(blob: bytes) -> bytes:
+    out = bytearray()
+
+    for op, who, value, literal in iter_records(blob):
+        if literal is not None:
+            out += literal
+        elif op == OP_MELD:
+            out += b'<N who="%d" m="%d" />' % (who, value)
+        else:
+            out += DRAW_DISCARD_TAGS[op - OP_DRAW_DISCARD][value]
+
+    return bytes(out)
@@ -0,0 +1,52 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import time
+
+import niquests
+
+from houou_logs.exceptions import HTTPStatusError
+
+NOT_FOUND = 404
+
+# The breaker opens after this many consecutive failures that point to
+# the server being unavailable rather than to a missing log.
+FAILURE_THRESHOLD = 5
+
+# While open, the breaker waits this long before the next probe,
+# doubling the delay after each failed probe.
+INITIAL_PROBE_DELAY = 30.0  # seconds
+MAX_PROBE_DELAY = 600.0  # seconds
+
+
+def is_unavailable_error(e: Exception) -> bool:
+    # A log that does not exist is answered with 404 or with a page
+    # without mjlog. Anything else failing means the server could not
+    # answer at all.
+    if isinstance(e, HTTPStatusError):
+        return e.status_code != NOT_FOUND
+    return isinstance(e, niquests.exceptions.RequestException)
+
+
+class CircuitBreaker:
+    __slots__ = ("failures", "probe_delay")
+
+    def __init__(self) -> None:
+        self.failures = 0
+        self.probe_delay = INITIAL_PROBE_DELAY
+
+    @property
+    def is_open(self) -> bool:
+        return self.failures >= FAILURE_THRESHOLD
+
+    def record(self, *, unavailable: bool) -> None:
+        if unavailable:
+            self.failures += 1
+        else:
+            self.failures = 0
+            self.probe_delay = INITIAL_PROBE_DELAY
+
+    def wait_for_probe(self) -> None:
+        time.sleep(self.probe_delay)
+        self.probe_delay = min(self.probe_delay * 2, MAX_PROBE_DELAY)
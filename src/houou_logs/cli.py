@@ -4,6 +4,7 @@
 
 import sqlite3
 import sys
+import tarfile
 import xml.etree.ElementTree as ET
 import zipfile
 import zlib
@@ -14,8 +15,26 @@ from pathlib import Path
 
 from niquests.exceptions import RequestException
 
-from houou_logs import download, export, fetch, import_, validate, yakuman
+from houou_logs import (
+    convert,
+    download,
+    export,
+    fetch,
+    import_,
+    ingest,
+    merge,
+    sync,
+    validate,
+    yakuman,
+)
 from houou_logs.exceptions import UserInputError
+from houou_logs.pacing import DEFAULT_MAX_RATE, DEFAULT_MIN_RATE
+from houou_logs.parallel import default_jobs
+from houou_logs.session import (
+    DEFAULT_MAX_TIMEOUT,
+    DEFAULT_MIN_TIMEOUT,
+    MIN_READ_TIMEOUT,
+)
 
 IO_ERROR_EXIT_CODE = 1
 USER_INPUT_ERROR_EXIT_CODE = 2
@@ -27,6 +46,7 @@ EXTERNAL_IO_ERRORS = (
     EOFError,
     zlib.error,
     zipfile.BadZipFile,
+    tarfile.TarError,
     ET.ParseError,
     UnicodeDecodeError,
     RequestException,
@@ -41,22 +61,55 @@ def set_import_args(parser: ArgumentParser) -> ArgumentParser:
         metavar="db-path",
     )
     parser.add_argument(
-        "archive_path",
+        "archive_paths",
         type=Path,
-        help="Path to an archive file (.zip).",
+        nargs="+",
+        help="Paths to archive files (.zip) or directories containing them.",
         metavar="archive-path",
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Load into an empty database with the journal in memory and syncing disabled and build the index once at the end. The database may be corrupted if the process is killed.",  # noqa: E501
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=default_jobs(),
+        help="Number of worker processes. Default is the number of CPUs.",
+    )
     return parser
 
 
 def import_cli(args: Namespace) -> None:
-    num_logs = import_.import_(args.db_path, args.archive_path)
+    num_logs = import_.import_(
+        args.db_path,
+        args.archive_paths,
+        jobs=args.jobs,
+        bulk=args.bulk,
+    )
     print(
         f"Number of log entries inserted into the DB: {num_logs}",
         file=sys.stderr,
     )
 
 
+def add_timeout_args(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--min-timeout",
+        type=float,
+        default=DEFAULT_MIN_TIMEOUT,
+        help=f"Lower bound in seconds of the request timeouts, which adapt to recent response times. Read timeouts stay at or above {MIN_READ_TIMEOUT}. Default is {DEFAULT_MIN_TIMEOUT}.",  # noqa: E501
+    )
+    parser.add_argument(
+        "--max-timeout",
+        type=float,
+        default=DEFAULT_MAX_TIMEOUT,
+        help=f"Upper bound in seconds of the request timeouts, which adapt to recent response times. Default is {DEFAULT_MAX_TIMEOUT}.",  # noqa: E501
+    )
+
+
 def set_fetch_args(parser: ArgumentParser) -> ArgumentParser:
     parser.add_argument(
         "db_path",
@@ -70,11 +123,24 @@ def set_fetch_args(parser: ArgumentParser) -> ArgumentParser:
         action="store_true",
         help="Fetch log IDs from Jan 1 of the current year through 7 days ago.",  # noqa: E501
     )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        help="Directory to cache downloaded files in. Cached files are revalidated with conditional requests or reused if their size matches the FileIndex.",  # noqa: E501
+        metavar="cache-dir",
+    )
+    add_timeout_args(parser)
     return parser
 
 
 def fetch_cli(args: Namespace) -> None:
-    num_logs = fetch.fetch(args.db_path, archive=args.archive)
+    num_logs = fetch.fetch(
+        args.db_path,
+        archive=args.archive,
+        cache_dir=args.cache_dir,
+        min_timeout=args.min_timeout,
+        max_timeout=args.max_timeout,
+    )
     if num_logs == -1:
         msg = "Skipping fetch: last fetch was within 20 minutes."
     else:
@@ -92,27 +158,84 @@ def set_yakuman_args(parser: ArgumentParser) -> ArgumentParser:
     parser.add_argument(
         "year",
         type=int,
+        nargs="?",
         help="Year to fetch for yakuman logs (e.g., 2006).",
     )
     parser.add_argument(
         "month",
         type=int,
+        nargs="?",
         help="Month to fetch for yakuman logs (1-12).",
     )
+    parser.add_argument(
+        "--from",
+        type=str,
+        dest="from_month",
+        help="First month to fetch (YYYY-MM). Use instead of year and month to fetch a range of months.",  # noqa: E501
+        metavar="YYYY-MM",
+    )
+    parser.add_argument(
+        "--to",
+        type=str,
+        dest="to_month",
+        help="Last month to fetch (YYYY-MM). If omitted, the current month is used.",  # noqa: E501
+        metavar="YYYY-MM",
+    )
+    add_timeout_args(parser)
     return parser
 
 
+def resolve_yakuman_months(
+    args: Namespace,
+    now: datetime,
+) -> tuple[tuple[int, int], tuple[int, int]]:
+    if args.from_month is None:
+        if args.to_month is not None:
+            msg = "'--to' requires '--from'"
+            raise UserInputError(msg)
+        if args.year is None or args.month is None:
+            msg = "year and month are required unless '--from' is given"
+            raise UserInputError(msg)
+        return ((args.year, args.month), (args.year, args.month))
+
+    if args.year is not None or args.month is not None:
+        msg = "year and month cannot be used with '--from'"
+        raise UserInputError(msg)
+
+    start = yakuman.parse_year_month(args.from_month)
+    if args.to_month is None:
+        return (start, (now.year, now.month))
+    return (start, yakuman.parse_year_month(args.to_month))
+
+
 def yakuman_cli(args: Namespace, now: datetime | None = None) -> None:
     if now is None:
         now = datetime.now(UTC)
 
-    if args.year == now.year and args.month == now.month:
+    start, end = resolve_yakuman_months(args, now)
+    if end == (now.year, now.month):
         print(
             "Warning: This month is not finished yet. More logs may appear later.",  # noqa: E501
             file=sys.stderr,
         )
 
-    num_logs = yakuman.yakuman(args.db_path, args.year, args.month, now)
+    if start == end:
+        num_logs = yakuman.yakuman(
+            args.db_path,
+            *start,
+            now,
+            min_timeout=args.min_timeout,
+            max_timeout=args.max_timeout,
+        )
+    else:
+        num_logs = yakuman.yakuman_range(
+            args.db_path,
+            start,
+            end,
+            now,
+            min_timeout=args.min_timeout,
+            max_timeout=args.max_timeout,
+        )
     print(
         f"Number of log entries inserted into the DB: {num_logs}",
         file=sys.stderr,
@@ -143,15 +266,55 @@ def set_download_args(parser: ArgumentParser) -> ArgumentParser:
         type=int,
         help="Max number of logs to download. If omitted, all available logs are downloaded.",  # noqa: E501
     )
+    parser.add_argument(
+        "--reuse-from",
+        type=Path,
+        nargs="+",
+        help="Other DB files to copy already downloaded log contents from before downloading.",  # noqa: E501
+        metavar="db-path",
+    )
+    parser.add_argument(
+        "--min-rate",
+        type=float,
+        default=DEFAULT_MIN_RATE,
+        help=f"Lowest request rate in requests per second when slowing down under server pressure. Default is {DEFAULT_MIN_RATE}.",  # noqa: E501
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=DEFAULT_MAX_RATE,
+        help=f"Highest request rate in requests per second when speeding up while responses are fast. Default is {DEFAULT_MAX_RATE}.",  # noqa: E501
+    )
+    parser.add_argument(
+        "--wait-on-outage",
+        action="store_true",
+        help="Wait and probe until the server is available again instead of stopping when it looks unavailable.",  # noqa: E501
+    )
+    parser.add_argument(
+        "--retry-errors",
+        action="store_true",
+        help="Retry failed downloads whose error may be transient and whose retry delay has passed, instead of downloading new logs.",  # noqa: E501
+    )
+    add_timeout_args(parser)
     return parser
 
 
 def download_cli(args: Namespace) -> None:
+    if args.reuse_from:
+        num_reused = download.reuse_log_contents(args.db_path, args.reuse_from)
+        print(f"Number of logs reused: {num_reused}", file=sys.stderr)
+
     num_logs = download.download(
         args.db_path,
         args.players,
         args.length,
         args.limit,
+        min_rate=args.min_rate,
+        max_rate=args.max_rate,
+        wait_on_outage=args.wait_on_outage,
+        retry_errors=args.retry_errors,
+        min_timeout=args.min_timeout,
+        max_timeout=args.max_timeout,
     )
     print(f"Number of logs downloaded: {num_logs}", file=sys.stderr)
 
@@ -163,11 +326,34 @@ def set_validate_args(parser: ArgumentParser) -> ArgumentParser:
         help="Path to the SQLite database file.",
         metavar="db-path",
     )
+    parser.add_argument(
+        "--index-rounds",
+        action="store_true",
+        help="Store the byte offsets of each round of valid logs for random access.",  # noqa: E501
+    )
+    parser.add_argument(
+        "--level",
+        type=str,
+        default="structural",
+        help="Validation level: 'structural' checks the tag structure, 'semantic' also checks that score changes are consistent with the scores at each round start and the final scores, 'wall' also rebuilds the walls from the SHUFFLE seed and checks hands and draws against them. Default is 'structural'.",  # noqa: E501
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=default_jobs(),
+        help="Number of worker processes. Default is the number of CPUs.",
+    )
     return parser
 
 
 def validate_cli(args: Namespace) -> None:
-    were_errors, num_valid, total = validate.validate(args.db_path)
+    were_errors, num_valid, total = validate.validate(
+        args.db_path,
+        index_rounds=args.index_rounds,
+        level=args.level,
+        jobs=args.jobs,
+    )
     if not were_errors:
         print(
             f"Everything is fine, checked {num_valid}/{total} (valid logs / all IDs)",  # noqa: E501
@@ -226,6 +412,161 @@ def export_cli(args: Namespace) -> None:
     print(f"Number of logs exported: {num_logs}", file=sys.stderr)
 
 
+def set_convert_storage_args(parser: ArgumentParser) -> ArgumentParser:
+    parser.add_argument(
+        "db_path",
+        type=Path,
+        help="Path to the SQLite database file.",
+        metavar="db-path",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        type=str,
+        default="binary",
+        help="Storage format of log contents: 'binary' for the compact event encoding, 'gzip' for gzip-compressed XML. Default is 'binary'.",  # noqa: E501
+    )
+    parser.add_argument(
+        "--keep-xml",
+        action="store_true",
+        help="Store the binary encoding in a separate table and keep the gzip-compressed XML.",  # noqa: E501
+    )
+    return parser
+
+
+def convert_storage_cli(args: Namespace) -> None:
+    num_logs = convert.convert_storage(
+        args.db_path,
+        args.format,
+        keep_xml=args.keep_xml,
+    )
+    print(f"Number of logs converted: {num_logs}", file=sys.stderr)
+
+
+def set_ingest_args(parser: ArgumentParser) -> ArgumentParser:
+    parser.add_argument(
+        "db_path",
+        type=Path,
+        help="Path to the SQLite database file.",
+        metavar="db-path",
+    )
+    parser.add_argument(
+        "source_path",
+        type=Path,
+        help="Path to a directory or tar file containing '<log ID>.xml' or '<log ID>.xml.gz' files.",  # noqa: E501
+        metavar="source-path",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=default_jobs(),
+        help="Number of worker processes. Default is the number of CPUs.",
+    )
+    return parser
+
+
+def ingest_cli(args: Namespace) -> None:
+    num_logs = ingest.ingest(args.db_path, args.source_path, jobs=args.jobs)
+    print(f"Number of logs ingested: {num_logs}", file=sys.stderr)
+
+
+def set_merge_args(parser: ArgumentParser) -> ArgumentParser:
+    parser.add_argument(
+        "dst_path",
+        type=Path,
+        help="Path to the SQLite database file to merge into. Created if it does not exist.",  # noqa: E501
+        metavar="dst-path",
+    )
+    parser.add_argument(
+        "src_paths",
+        type=Path,
+        nargs="+",
+        help="Paths to the SQLite database files to merge.",
+        metavar="src-path",
+    )
+    return parser
+
+
+def merge_cli(args: Namespace) -> None:
+    num_logs = merge.merge(args.dst_path, args.src_paths)
+    print(f"Number of logs merged: {num_logs}", file=sys.stderr)
+
+
+def set_split_args(parser: ArgumentParser) -> ArgumentParser:
+    parser.add_argument(
+        "src_path",
+        type=Path,
+        help="Path to the SQLite database file to split.",
+        metavar="src-path",
+    )
+    parser.add_argument(
+        "--by",
+        type=str,
+        default="year",
+        help="Period of each output file: 'year' or 'month'. Default is 'year'.",  # noqa: E501
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=Path,
+        help="Directory to write the output files to. If omitted, the directory of the source file is used.",  # noqa: E501
+        metavar="output-dir",
+    )
+    return parser
+
+
+def split_cli(args: Namespace) -> None:
+    results = merge.split(args.src_path, args.by, args.output_dir)
+    for dst_path, num_logs in results:
+        print(f"{dst_path}: {num_logs} logs", file=sys.stderr)
+    print(f"Number of DB files written: {len(results)}", file=sys.stderr)
+
+
+def set_diff_args(parser: ArgumentParser) -> ArgumentParser:
+    parser.add_argument(
+        "db_path",
+        type=Path,
+        help="Path to the SQLite database file.",
+        metavar="db-path",
+    )
+    parser.add_argument(
+        "other_path",
+        type=Path,
+        help="Path to the SQLite database file to compare with.",
+        metavar="other-path",
+    )
+    return parser
+
+
+def diff_cli(args: Namespace) -> None:
+    entries = sync.diff(args.db_path, args.other_path)
+    for log_id, state, other_state in entries:
+        print(f"{log_id}\t{state}\t{other_state}")
+    print(f"Number of different logs: {len(entries)}", file=sys.stderr)
+
+
+def set_sync_args(parser: ArgumentParser) -> ArgumentParser:
+    parser.add_argument(
+        "dst_path",
+        type=Path,
+        help="Path to the SQLite database file to update.",
+        metavar="dst-path",
+    )
+    parser.add_argument(
+        "src_path",
+        type=Path,
+        help="Path to the SQLite database file to copy missing or newer logs from.",  # noqa: E501
+        metavar="src-path",
+    )
+    return parser
+
+
+def sync_cli(args: Namespace) -> None:
+    num_logs = sync.sync(args.dst_path, args.src_path)
+    print(f"Number of logs synced: {num_logs}", file=sys.stderr)
+
+
 def format_external_io_error(error: Exception) -> str:
     message = str(error) or error.__class__.__name__
     return f"I/O error: {message}"
@@ -259,6 +600,30 @@ def main() -> None:
     parser_export = set_export_args(parser_export)
     parser_export.set_defaults(func=export_cli)
 
+    parser_convert_storage = subparsers.add_parser("convert-storage")
+    parser_convert_storage = set_convert_storage_args(parser_convert_storage)
+    parser_convert_storage.set_defaults(func=convert_storage_cli)
+
+    parser_ingest = subparsers.add_parser("ingest")
+    parser_ingest = set_ingest_args(parser_ingest)
+    parser_ingest.set_defaults(func=ingest_cli)
+
+    parser_merge = subparsers.add_parser("merge")
+    parser_merge = set_merge_args(parser_merge)
+    parser_merge.set_defaults(func=merge_cli)
+
+    parser_split = subparsers.add_parser("split")
+    parser_split = set_split_args(parser_split)
+    parser_split.set_defaults(func=split_cli)
+
+    parser_diff = subparsers.add_parser("diff")
+    parser_diff = set_diff_args(parser_diff)
+    parser_diff.set_defaults(func=diff_cli)
+
+    parser_sync = subparsers.add_parser("sync")
+    parser_sync = set_sync_args(parser_sync)
+    parser_sync.set_defaults(func=sync_cli)
+
     args = parser.parse_args()
 
     if not hasattr(args, "func"):
@@ -0,0 +1,71 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+from contextlib import closing
+from pathlib import Path
+
+from tqdm import tqdm
+
+from houou_logs import db
+from houou_logs.download import validate_db_path
+from houou_logs.exceptions import UserInputError
+from houou_logs.storage import (
+    STORAGE_FORMAT_BINARY,
+    convert_log_content,
+    validate_storage_format,
+)
+from houou_logs.validate import iter_processed_log_id_batches
+
+CONVERT_BATCH_SIZE = 1000
+
+
+def convert_storage(
+    db_path: Path,
+    storage_format: str,
+    *,
+    keep_xml: bool,
+) -> int:
+    validate_db_path(db_path)
+    validate_storage_format(storage_format)
+    if keep_xml and storage_format != STORAGE_FORMAT_BINARY:
+        msg = "'--keep-xml' can only be used with the binary format"
+        raise UserInputError(msg)
+
+    num_logs = 0
+    with closing(db.open_db(db_path)) as conn, conn:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+
+        total = db.count_all_log_contents(cursor)
+        with tqdm(total=total) as progress:
+            for log_ids in iter_processed_log_id_batches(
+                cursor,
+                CONVERT_BATCH_SIZE,
+            ):
+                for log_id in log_ids:
+                    progress.update(1)
+                    blob = db.get_log_content(cursor, log_id)
+                    if blob is None:
+                        continue
+
+                    try:
+                        converted = convert_log_content(blob, storage_format)
+                    except Exception as e:  # noqa: BLE001
+                        tqdm.write(f"{log_id}: failed to convert: {e}")
+                        continue
+
+                    if converted is None:
+                        continue
+
+                    # The decompressed content is the same, so the
+                    # stored content hash stays valid.
+                    if keep_xml:
+                        db.upsert_binary_log_content(cursor, log_id, converted)
+                    else:
+                        db.update_log_content(cursor, log_id, converted)
+                    num_logs += 1
+
+                conn.commit()
+
+    return num_logs
@@ -4,14 +4,16 @@
 
 import sqlite3
 import sys
-from collections.abc import Iterator
-from dataclasses import dataclass
+from collections.abc import Generator, Iterable, Iterator
+from contextlib import contextmanager
 from datetime import UTC, datetime
 from pathlib import Path
+from typing import NamedTuple
 
 
-@dataclass
-class LogEntry:
+class LogEntry(NamedTuple):
+    # A row of the logs table in column order, so that entries can be
+    # passed to executemany as they are.
     id: str
     date: str
     num_players: int  # 4 or 3
@@ -33,9 +35,57 @@ def setup_table(conn: sqlite3.Connection) -> None:
         create_fetch_state_table(conn)
         migrate_last_fetch_time_to_fetch_state(conn)
         create_file_index_table(conn)
+        create_import_index_table(conn)
+        create_yakuman_index_table(conn)
+        create_download_errors_table(conn)
+        create_round_index_table(conn)
+        create_binary_logs_table(conn)
+        create_log_hashes_table(conn)
         create_logs_status_filter_index(conn)
 
 
+@contextmanager
+def bulk_load(conn: sqlite3.Connection) -> Generator[None]:
+    # Keeps the rollback journal in memory and disables fsync while
+    # loading into a fresh DB. A failed load can still be rolled back,
+    # but a crash in the meantime can leave the file corrupted. These
+    # settings cannot be changed inside a transaction.
+    conn.commit()
+    conn.autocommit = True
+    journal_mode = conn.execute("PRAGMA journal_mode;").fetchone()[0]
+    synchronous = conn.execute("PRAGMA synchronous;").fetchone()[0]
+    conn.execute("PRAGMA journal_mode = MEMORY;")
+    conn.execute("PRAGMA synchronous = OFF;")
+    conn.autocommit = False
+    try:
+        yield
+    finally:
+        conn.autocommit = True
+        conn.execute(f"PRAGMA journal_mode = {journal_mode};")
+        conn.execute(f"PRAGMA synchronous = {synchronous};")
+        conn.autocommit = False
+
+
+@contextmanager
+def attach_db(
+    conn: sqlite3.Connection,
+    db_path: str | Path,
+    schema: str,
+) -> Generator[None]:
+    # Changes made while the DB is attached are committed on exit, since
+    # an attached DB cannot be detached inside a transaction.
+    conn.execute(f"ATTACH DATABASE ? AS {schema};", (str(db_path),))
+    try:
+        yield
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+    finally:
+        conn.execute(f"DETACH DATABASE {schema};")
+
+
 def create_logs_table(conn: sqlite3.Connection) -> None:
     conn.execute(
         """
@@ -105,6 +155,86 @@ def create_file_index_table(conn: sqlite3.Connection) -> None:
     )
 
 
+def create_import_index_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS import_index (
+            member TEXT PRIMARY KEY,
+            crc INTEGER NOT NULL,
+            size INTEGER NOT NULL CHECK(size >= 0)
+        ) WITHOUT ROWID;
+        """,
+    )
+
+
+def create_yakuman_index_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS yakuman_index (
+            month TEXT PRIMARY KEY,
+            size INTEGER NOT NULL CHECK(size >= 0),
+            etag TEXT,
+            is_complete INTEGER NOT NULL CHECK(is_complete IN (0, 1))
+        ) WITHOUT ROWID;
+        """,
+    )
+
+
+def create_download_errors_table(conn: sqlite3.Connection) -> None:
+    # next_attempt_time is NULL for errors that are not retried.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS download_errors (
+            id TEXT PRIMARY KEY,
+            error_class TEXT NOT NULL,
+            http_status INTEGER,
+            attempts INTEGER NOT NULL CHECK(attempts > 0),
+            next_attempt_time REAL
+        ) WITHOUT ROWID;
+        """,
+    )
+
+
+def create_round_index_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS round_index (
+            id TEXT PRIMARY KEY,
+            size INTEGER NOT NULL CHECK(size > 0),
+            num_rounds INTEGER NOT NULL CHECK(num_rounds >= 0),
+            offsets BLOB NOT NULL
+        ) WITHOUT ROWID;
+        """,
+    )
+
+
+def create_binary_logs_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS binary_logs (
+            id TEXT PRIMARY KEY,
+            log BLOB NOT NULL
+        ) WITHOUT ROWID;
+        """,
+    )
+
+
+def create_log_hashes_table(
+    conn: sqlite3.Connection,
+    schema: str = "main",
+) -> None:
+    # Hashes of the decompressed contents, kept for every entry with a
+    # content, so that DBs can be compared without reading the contents.
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {schema}.log_hashes (
+            id TEXT PRIMARY KEY,
+            hash BLOB NOT NULL
+        ) WITHOUT ROWID;
+        """,
+    )
+
+
 def create_logs_status_filter_index(conn: sqlite3.Connection) -> None:
     conn.execute(
         """
@@ -114,25 +244,23 @@ def create_logs_status_filter_index(conn: sqlite3.Connection) -> None:
     )
 
 
+def drop_logs_status_filter_index(conn: sqlite3.Connection) -> None:
+    conn.execute("DROP INDEX IF EXISTS idx_logs_status_filter;")
+
+
 def insert_log_entries(
     cursor: sqlite3.Cursor,
-    entries: list[LogEntry],
-) -> None:
-    if not entries:
-        return
+    entries: Iterable[LogEntry],
+) -> int:
+    # Returns the number of entries given, including those skipped
+    # because the ID already exists.
+    num_entries = 0
 
-    values = (
-        (
-            entry.id,
-            entry.date,
-            entry.num_players,
-            int(entry.is_tonpu),
-            int(entry.is_processed),
-            int(entry.was_error),
-            entry.log,
-        )
-        for entry in entries
-    )
+    def count_entries() -> Iterator[LogEntry]:
+        nonlocal num_entries
+        for entry in entries:
+            num_entries += 1
+            yield entry
 
     cursor.executemany(
         """
@@ -140,19 +268,440 @@ def insert_log_entries(
         VALUES (?, ?, ?, ?, ?, ?, ?)
         ON CONFLICT(id) DO NOTHING;
         """,  # noqa: E501
-        values,
+        count_entries(),
     )
+    return num_entries
 
 
-def list_undownloaded_log_ids_after(
+def upsert_log_contents(
     cursor: sqlite3.Cursor,
-    players: int | None,
-    length: str | None,
-    after_id: str | None,
+    entries: Iterable[LogEntry],
+) -> int:
+    # Inserts downloaded entries. Existing entries get the content only
+    # if they do not have one yet. Returns the number of changed rows.
+    cursor.executemany(
+        """
+        INSERT INTO logs (id, date, num_players, is_tonpu, is_processed, was_error, log)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            is_processed=excluded.is_processed,
+            was_error=excluded.was_error,
+            log=excluded.log
+        WHERE logs.log IS NULL;
+        """,  # noqa: E501
+        entries,
+    )
+    return cursor.rowcount
+
+
+def copy_log_contents_from(cursor: sqlite3.Cursor, schema: str) -> int:
+    # Fills undownloaded entries with the contents stored for the same
+    # IDs in the attached DB. Returns the number of updated entries.
+    # The hashes are copied first, while the entries to fill can still
+    # be told apart.
+    if "log_hashes" in list_attached_tables(cursor, schema):
+        cursor.execute(
+            f"""
+            INSERT INTO log_hashes (id, hash)
+            SELECT source.id, source_hash.hash
+            FROM {schema}.logs AS source
+            JOIN {schema}.log_hashes AS source_hash
+                ON source_hash.id = source.id
+            JOIN logs ON logs.id = source.id
+            WHERE logs.is_processed = 0
+                AND logs.was_error = 0
+                AND source.is_processed = 1
+                AND source.was_error = 0
+                AND source.log IS NOT NULL
+            ON CONFLICT(id) DO UPDATE SET
+                hash=excluded.hash;
+            """,  # noqa: S608
+        )
+    cursor.execute(
+        f"""
+        UPDATE logs
+        SET is_processed = 1, was_error = 0, log = source.log
+        FROM {schema}.logs AS source
+        WHERE source.id = logs.id
+            AND logs.is_processed = 0
+            AND logs.was_error = 0
+            AND source.is_processed = 1
+            AND source.was_error = 0
+            AND source.log IS NOT NULL;
+        """,  # noqa: S608
+    )
+    return cursor.rowcount
+
+
+def list_attached_tables(cursor: sqlite3.Cursor, schema: str) -> set[str]:
+    cursor.execute(
+        f"""
+        SELECT name
+        FROM {schema}.sqlite_master
+        WHERE type='table';
+        """,  # noqa: S608
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def build_id_range_condition(
+    column: str,
+    id_range: tuple[str, str] | None,
+) -> tuple[str, list]:
+    if id_range is None:
+        return ("TRUE", [])
+    return (f"{column} >= ? AND {column} < ?", list(id_range))
+
+
+def merge_logs_from(
+    cursor: sqlite3.Cursor,
+    schema: str,
+    id_range: tuple[str, str] | None = None,
+) -> int:
+    # Copies the entries of the attached DB, only those with IDs in
+    # [start, end) if 'id_range' is given. Existing entries without a
+    # content take the state and content of the source entry if it was
+    # processed. Returns the number of inserted or updated entries.
+    condition, params = build_id_range_condition("id", id_range)
+    cursor.execute(
+        f"""
+        INSERT INTO logs (id, date, num_players, is_tonpu, is_processed, was_error, log)
+        SELECT id, date, num_players, is_tonpu, is_processed, was_error, log
+        FROM {schema}.logs
+        WHERE {condition}
+        ON CONFLICT(id) DO UPDATE SET
+            is_processed=excluded.is_processed,
+            was_error=excluded.was_error,
+            log=excluded.log
+        WHERE logs.log IS NULL
+            AND excluded.is_processed = 1
+            AND (excluded.log IS NOT NULL OR logs.is_processed = 0);
+        """,  # noqa: E501, S608
+        params,
+    )
+    return cursor.rowcount
+
+
+def merge_log_hashes_from(
+    cursor: sqlite3.Cursor,
+    schema: str,
+    id_range: tuple[str, str] | None = None,
+) -> None:
+    # Copies the hashes of the source entries whose content is taken by
+    # merge_logs_from, so it must run first. These are the entries the
+    # destination does not have or has without a content.
+    if "log_hashes" not in list_attached_tables(cursor, schema):
+        return
+
+    condition, params = build_id_range_condition("source.id", id_range)
+    cursor.execute(
+        f"""
+        INSERT INTO log_hashes (id, hash)
+        SELECT source.id, source_hash.hash
+        FROM {schema}.logs AS source
+        JOIN {schema}.log_hashes AS source_hash
+            ON source_hash.id = source.id
+        LEFT JOIN logs ON logs.id = source.id
+        WHERE {condition}
+            AND source.is_processed = 1
+            AND source.log IS NOT NULL
+            AND logs.log IS NULL
+        ON CONFLICT(id) DO UPDATE SET
+            hash=excluded.hash;
+        """,  # noqa: S608
+        params,
+    )
+
+
+def merge_log_indexes_from(
+    cursor: sqlite3.Cursor,
+    schema: str,
+    id_range: tuple[str, str] | None = None,
+) -> None:
+    # Round indexes and binary encodings describe the game, not the
+    # stored blob, so those of the destination are kept on conflict.
+    tables = list_attached_tables(cursor, schema)
+    condition, params = build_id_range_condition("id", id_range)
+    if "round_index" in tables:
+        cursor.execute(
+            f"""
+            INSERT INTO round_index (id, size, num_rounds, offsets)
+            SELECT id, size, num_rounds, offsets
+            FROM {schema}.round_index
+            WHERE {condition}
+            ON CONFLICT(id) DO NOTHING;
+            """,  # noqa: S608
+            params,
+        )
+    if "binary_logs" in tables:
+        cursor.execute(
+            f"""
+            INSERT INTO binary_logs (id, log)
+            SELECT id, log
+            FROM {schema}.binary_logs
+            WHERE {condition}
+            ON CONFLICT(id) DO NOTHING;
+            """,  # noqa: S608
+            params,
+        )
+
+
+def merge_download_errors_from(
+    cursor: sqlite3.Cursor,
+    schema: str,
+    id_range: tuple[str, str] | None = None,
+) -> None:
+    # Copies the errors of the entries that are failed downloads after
+    # the merge, keeping those of the destination on conflict. Errors of
+    # entries that now have a content are dropped.
+    if "download_errors" not in list_attached_tables(cursor, schema):
+        return
+
+    condition, params = build_id_range_condition("source.id", id_range)
+    cursor.execute(
+        f"""
+        INSERT INTO download_errors (
+            id,
+            error_class,
+            http_status,
+            attempts,
+            next_attempt_time
+        )
+        SELECT
+            source.id,
+            source.error_class,
+            source.http_status,
+            source.attempts,
+            source.next_attempt_time
+        FROM {schema}.download_errors AS source
+        JOIN logs ON logs.id = source.id
+        WHERE {condition}
+            AND logs.was_error = 1
+        ON CONFLICT(id) DO NOTHING;
+        """,  # noqa: S608
+        params,
+    )
+    condition, params = build_id_range_condition("id", id_range)
+    cursor.execute(
+        f"""
+        DELETE FROM download_errors
+        WHERE {condition}
+            AND id IN (
+                SELECT id
+                FROM logs
+                WHERE was_error = 0
+            );
+        """,  # noqa: S608
+        params,
+    )
+
+
+def merge_fetch_metadata_from(cursor: sqlite3.Cursor, schema: str) -> None:
+    # Keeps the latest fetch attempt and the largest known size of each
+    # file, so that merged DBs do not fetch more often or refetch files.
+    tables = list_attached_tables(cursor, schema)
+    if "fetch_state" in tables:
+        cursor.execute(
+            f"""
+            INSERT INTO fetch_state (kind, last_attempt_time)
+            SELECT kind, last_attempt_time
+            FROM {schema}.fetch_state
+            WHERE TRUE
+            ON CONFLICT(kind) DO UPDATE SET
+                last_attempt_time=MAX(
+                    last_attempt_time,
+                    excluded.last_attempt_time
+                );
+            """,  # noqa: S608
+        )
+    if "file_index" in tables:
+        cursor.execute(
+            f"""
+            INSERT INTO file_index (file, size)
+            SELECT file, size
+            FROM {schema}.file_index
+            WHERE TRUE
+            ON CONFLICT(file) DO UPDATE SET
+                size=MAX(size, excluded.size);
+            """,  # noqa: S608
+        )
+    if "yakuman_index" in tables:
+        cursor.execute(
+            f"""
+            INSERT INTO yakuman_index (month, size, etag, is_complete)
+            SELECT month, size, etag, is_complete
+            FROM {schema}.yakuman_index
+            WHERE TRUE
+            ON CONFLICT(month) DO UPDATE SET
+                size=excluded.size,
+                etag=excluded.etag,
+                is_complete=excluded.is_complete
+            WHERE excluded.is_complete > yakuman_index.is_complete;
+            """,  # noqa: S608
+        )
+    if "import_index" in tables:
+        cursor.execute(
+            f"""
+            INSERT INTO import_index (member, crc, size)
+            SELECT member, crc, size
+            FROM {schema}.import_index
+            WHERE TRUE
+            ON CONFLICT(member) DO NOTHING;
+            """,  # noqa: S608
+        )
+
+
+def iter_log_flags(
+    cursor: sqlite3.Cursor,
+    schema: str,
+) -> Iterator[tuple[str, int, int]]:
+    # Unordered, so that only the status filter index is read.
+    cursor.execute(
+        f"""
+        SELECT id, is_processed, was_error
+        FROM {schema}.logs;
+        """,  # noqa: S608
+    )
+    yield from cursor
+
+
+def iter_log_hashes(
+    cursor: sqlite3.Cursor,
+    schema: str,
+) -> Iterator[tuple[str, bytes]]:
+    cursor.execute(
+        f"""
+        SELECT id, hash
+        FROM {schema}.log_hashes;
+        """,  # noqa: S608
+    )
+    yield from cursor
+
+
+def iter_log_states(
+    cursor: sqlite3.Cursor,
+    schema: str,
+    id_range: tuple[str, str] | None = None,
+) -> Iterator[tuple[str, int, int, bytes | None]]:
+    # Yields (log ID, is_processed, was_error, hash) in ID order.
+    condition, params = build_id_range_condition("logs.id", id_range)
+    cursor.execute(
+        f"""
+        SELECT logs.id, logs.is_processed, logs.was_error, log_hashes.hash
+        FROM {schema}.logs AS logs
+        LEFT JOIN {schema}.log_hashes AS log_hashes
+            ON log_hashes.id = logs.id
+        WHERE {condition}
+        ORDER BY logs.id ASC;
+        """,  # noqa: S608
+        params,
+    )
+    yield from cursor
+
+
+def list_unhashed_log_contents(
+    cursor: sqlite3.Cursor,
+    schema: str,
     limit: int,
+) -> list[tuple[str, bytes]]:
+    # Returns contents stored without a hash, e.g. by older versions.
+    cursor.execute(
+        f"""
+        SELECT logs.id, logs.log
+        FROM {schema}.logs AS logs
+        LEFT JOIN {schema}.log_hashes AS log_hashes
+            ON log_hashes.id = logs.id
+        WHERE logs.log IS NOT NULL
+            AND log_hashes.id IS NULL
+        ORDER BY logs.id ASC
+        LIMIT ?;
+        """,  # noqa: S608
+        (limit,),
+    )
+    return cursor.fetchall()
+
+
+def upsert_log_hashes(
+    cursor: sqlite3.Cursor,
+    hashes: Iterable[tuple[str, bytes]],
+    schema: str = "main",
+) -> None:
+    cursor.executemany(
+        f"""
+        INSERT INTO {schema}.log_hashes (id, hash)
+        VALUES (?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            hash=excluded.hash;
+        """,  # noqa: S608
+        hashes,
+    )
+
+
+def upsert_stored_log_hashes(
+    cursor: sqlite3.Cursor,
+    hashes: Iterable[tuple[str, bytes | None, bytes]],
+) -> None:
+    # Takes (log ID, content, hash) and stores the hash only if the
+    # entry holds that content, e.g. after upsert_log_contents skipped
+    # entries that already had one.
+    cursor.executemany(
+        """
+        INSERT INTO log_hashes (id, hash)
+        SELECT id, ?
+        FROM logs
+        WHERE id = ? AND log = ?
+        ON CONFLICT(id) DO UPDATE SET
+            hash=excluded.hash;
+        """,
+        ((log_hash, log_id, log) for log_id, log, log_hash in hashes),
+    )
+
+
+def delete_log_hash(cursor: sqlite3.Cursor, log_id: str) -> None:
+    cursor.execute("DELETE FROM log_hashes WHERE id = ?;", (log_id,))
+
+
+def list_log_id_prefixes(
+    cursor: sqlite3.Cursor,
+    length: int,
 ) -> list[str]:
-    conditions = ["is_processed = 0", "was_error = 0"]
-    params: list = []
+    cursor.execute(
+        """
+        SELECT DISTINCT substr(id, 1, ?)
+        FROM logs
+        ORDER BY 1 ASC;
+        """,
+        (length,),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def build_download_conditions(
+    players: int | None,
+    length: str | None,
+    retry_time: datetime | None,
+) -> tuple[list[str], list]:
+    # Selects undownloaded entries, or with 'retry_time' the failed ones
+    # that may be retried at that time. Failed entries without a
+    # recorded error are from older versions and are retried as well.
+    if retry_time is None:
+        conditions = ["is_processed = 0", "was_error = 0"]
+        params: list = []
+    else:
+        conditions = [
+            "is_processed = 1",
+            "was_error = 1",
+            """NOT EXISTS (
+                SELECT 1
+                FROM download_errors
+                WHERE download_errors.id = logs.id
+                    AND (
+                        next_attempt_time IS NULL
+                        OR next_attempt_time > ?
+                    )
+            )""",
+        ]
+        params = [retry_time.astimezone(UTC).timestamp()]
 
     if players is not None:
         conditions.append("num_players = ?")
@@ -168,6 +717,23 @@ def list_undownloaded_log_ids_after(
                 msg = f"unknown length: {length}"
                 raise ValueError(msg)
 
+    return (conditions, params)
+
+
+def list_undownloaded_log_ids_after(
+    cursor: sqlite3.Cursor,
+    players: int | None,
+    length: str | None,
+    after_id: str | None,
+    limit: int,
+    retry_time: datetime | None = None,
+) -> list[str]:
+    conditions, params = build_download_conditions(
+        players,
+        length,
+        retry_time,
+    )
+
     if after_id is not None:
         conditions.append("id > ?")
         params.append(after_id)
@@ -190,23 +756,13 @@ def count_undownloaded_log_ids(
     players: int | None,
     length: str | None,
     limit: int | None,
+    retry_time: datetime | None = None,
 ) -> int:
-    conditions = ["is_processed = 0", "was_error = 0"]
-    params: list = []
-
-    if players is not None:
-        conditions.append("num_players = ?")
-        params.append(players)
-
-    if length is not None:
-        match length:
-            case "t":
-                conditions.append("is_tonpu = 1")
-            case "h":
-                conditions.append("is_tonpu = 0")
-            case _:
-                msg = f"unknown length: {length}"
-                raise ValueError(msg)
+    conditions, params = build_download_conditions(
+        players,
+        length,
+        retry_time,
+    )
 
     sql = f"""
         SELECT COUNT(*)
@@ -303,7 +859,11 @@ def iter_log_contents(
     length: str | None,
     limit: int | None,
     offset: int,
+    *,
+    prefer_binary: bool = False,
 ) -> Iterator[tuple[str, bytes]]:
+    # With 'prefer_binary', the binary encoding stored next to the XML
+    # by 'convert-storage --keep-xml' is returned where there is one.
     conditions = ["is_processed = 1", "was_error = 0"]
     params: list = []
 
@@ -321,12 +881,21 @@ def iter_log_contents(
                 msg = f"unknown length: {length}"
                 raise ValueError(msg)
 
-    sql = f"""
-        SELECT id, log
-        FROM logs
-        WHERE {" AND ".join(conditions)}
-        ORDER BY id ASC
-        """  # noqa: S608
+    if prefer_binary:
+        sql = f"""
+            SELECT id, COALESCE(binary_logs.log, logs.log)
+            FROM logs
+            LEFT JOIN binary_logs USING (id)
+            WHERE {" AND ".join(conditions)}
+            ORDER BY id ASC
+            """  # noqa: S608
+    else:
+        sql = f"""
+            SELECT id, log
+            FROM logs
+            WHERE {" AND ".join(conditions)}
+            ORDER BY id ASC
+            """  # noqa: S608
 
     if limit is not None:
         sql += " LIMIT ? OFFSET ?"
@@ -391,6 +960,92 @@ def reset_log_content(cursor: sqlite3.Cursor, log_id: str) -> None:
         """,
         (log_id,),
     )
+    cursor.execute("DELETE FROM round_index WHERE id = ?;", (log_id,))
+    cursor.execute("DELETE FROM binary_logs WHERE id = ?;", (log_id,))
+    cursor.execute("DELETE FROM log_hashes WHERE id = ?;", (log_id,))
+
+
+def update_log_content(
+    cursor: sqlite3.Cursor,
+    log_id: str,
+    log: bytes,
+) -> None:
+    cursor.execute(
+        """
+        UPDATE logs SET log = ?
+        WHERE id = ?;
+        """,
+        (log, log_id),
+    )
+
+
+def upsert_binary_log_content(
+    cursor: sqlite3.Cursor,
+    log_id: str,
+    log: bytes,
+) -> None:
+    cursor.execute(
+        """
+        INSERT INTO binary_logs (id, log)
+        VALUES (?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            log=excluded.log;
+        """,
+        (log_id, log),
+    )
+
+
+def get_binary_log_content(
+    cursor: sqlite3.Cursor,
+    log_id: str,
+) -> bytes | None:
+    cursor.execute(
+        """
+        SELECT log
+        FROM binary_logs
+        WHERE id = ?;
+        """,
+        (log_id,),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return row[0]
+
+
+def upsert_round_index(
+    cursor: sqlite3.Cursor,
+    log_id: str,
+    size: int,
+    num_rounds: int,
+    offsets: bytes,
+) -> None:
+    cursor.execute(
+        """
+        INSERT INTO round_index (id, size, num_rounds, offsets)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            size=excluded.size,
+            num_rounds=excluded.num_rounds,
+            offsets=excluded.offsets;
+        """,
+        (log_id, size, num_rounds, offsets),
+    )
+
+
+def get_round_index(
+    cursor: sqlite3.Cursor,
+    log_id: str,
+) -> tuple[int, int, bytes] | None:
+    cursor.execute(
+        """
+        SELECT size, num_rounds, offsets
+        FROM round_index
+        WHERE id = ?;
+        """,
+        (log_id,),
+    )
+    return cursor.fetchone()
 
 
 def update_fetch_attempt_time(
@@ -473,3 +1128,155 @@ def insert_file_index(cursor: sqlite3.Cursor, file: str, size: int) -> None:
         """,
         (file, size),
     )
+
+
+def list_changed_import_index(
+    cursor: sqlite3.Cursor,
+    import_index: dict[str, tuple[int, int]],
+) -> set[str]:
+    if not import_index:
+        return set()
+
+    try:
+        cursor.execute(
+            """
+            CREATE TEMP TABLE input_import_index (
+                member TEXT PRIMARY KEY,
+                crc INTEGER NOT NULL,
+                size INTEGER NOT NULL CHECK(size >= 0)
+            ) WITHOUT ROWID;
+            """,
+        )
+        cursor.executemany(
+            """
+            INSERT INTO input_import_index(member, crc, size)
+            VALUES (?, ?, ?);
+            """,
+            (
+                (member, crc, size)
+                for member, (crc, size) in import_index.items()
+            ),
+        )
+        cursor.execute(
+            """
+            SELECT input.member
+            FROM input_import_index AS input
+            LEFT JOIN import_index AS stored
+                ON stored.member = input.member
+                AND stored.crc = input.crc
+                AND stored.size = input.size
+            WHERE stored.member IS NULL;
+            """,
+        )
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.execute("DROP TABLE IF EXISTS input_import_index;")
+
+
+def insert_import_index(
+    cursor: sqlite3.Cursor,
+    member: str,
+    crc: int,
+    size: int,
+) -> None:
+    cursor.execute(
+        """
+        INSERT INTO import_index (member, crc, size)
+        VALUES (?, ?, ?)
+        ON CONFLICT(member) DO UPDATE SET
+            crc=excluded.crc,
+            size=excluded.size;
+        """,
+        (member, crc, size),
+    )
+
+
+def get_download_error_attempts(cursor: sqlite3.Cursor, log_id: str) -> int:
+    cursor.execute(
+        """
+        SELECT attempts
+        FROM download_errors
+        WHERE id = ?;
+        """,
+        (log_id,),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return 0
+    return row[0]
+
+
+def upsert_download_error(
+    cursor: sqlite3.Cursor,
+    log_id: str,
+    error_class: str,
+    http_status: int | None,
+    attempts: int,
+    next_attempt_time: datetime | None,
+) -> None:
+    if next_attempt_time is not None:
+        timestamp = next_attempt_time.astimezone(UTC).timestamp()
+    else:
+        timestamp = None
+    cursor.execute(
+        """
+        INSERT INTO download_errors (
+            id,
+            error_class,
+            http_status,
+            attempts,
+            next_attempt_time
+        )
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            error_class=excluded.error_class,
+            http_status=excluded.http_status,
+            attempts=excluded.attempts,
+            next_attempt_time=excluded.next_attempt_time;
+        """,
+        (log_id, error_class, http_status, attempts, timestamp),
+    )
+
+
+def delete_download_error(cursor: sqlite3.Cursor, log_id: str) -> None:
+    cursor.execute("DELETE FROM download_errors WHERE id = ?;", (log_id,))
+
+
+def get_yakuman_index(
+    cursor: sqlite3.Cursor,
+    month: str,
+) -> tuple[int, str | None, bool] | None:
+    cursor.execute(
+        """
+        SELECT size, etag, is_complete
+        FROM yakuman_index
+        WHERE month = ?;
+        """,
+        (month,),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+
+    size, etag, is_complete = row
+    return (size, etag, bool(is_complete))
+
+
+def upsert_yakuman_index(
+    cursor: sqlite3.Cursor,
+    month: str,
+    size: int,
+    etag: str | None,
+    is_complete: bool,  # noqa: FBT001
+) -> None:
+    cursor.execute(
+        """
+        INSERT INTO yakuman_index (month, size, etag, is_complete)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(month) DO UPDATE SET
+            size=excluded.size,
+            etag=excluded.etag,
+            is_complete=excluded.is_complete;
+        """,
+        (month, size, etag, int(is_complete)),
+    )
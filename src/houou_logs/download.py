@@ -4,19 +4,68 @@
 
 import gzip
 import sqlite3
-from collections.abc import Iterator
+import zlib
+from collections import deque
+from collections.abc import Iterable, Iterator
 from contextlib import closing
+from datetime import UTC, datetime, timedelta
+from itertools import chain
 from pathlib import Path
+from typing import NamedTuple
 
 import niquests
 from niquests import Session
 from tqdm import tqdm
 
 from houou_logs import db
-from houou_logs.exceptions import UserInputError
-from houou_logs.session import TIMEOUT, create_session
+from houou_logs.breaker import CircuitBreaker, is_unavailable_error
+from houou_logs.exceptions import HTTPStatusError, UserInputError
+from houou_logs.http_cache import STREAM_CHUNK_SIZE
+from houou_logs.log_id import iter_gzip_decompressed
+from houou_logs.pacing import (
+    DEFAULT_MAX_RATE,
+    DEFAULT_MIN_RATE,
+    Pacer,
+    is_congestion_error,
+)
+from houou_logs.session import (
+    DEFAULT_MAX_TIMEOUT,
+    DEFAULT_MIN_TIMEOUT,
+    ENDPOINT_LOG,
+    create_session,
+    timed_request,
+    validate_timeouts,
+)
+from houou_logs.storage import (
+    GZIP_MAGIC,
+    LOG_MARKER,
+    contains_log_marker,
+    hash_log_content,
+)
 
 DOWNLOAD_BATCH_SIZE = 1000
+REUSE_SCHEMA = "source"
+NOT_FOUND = 404
+GZIP_CONTENT_ENCODING = "gzip"
+
+# Failed downloads are recorded with one of these classes. Transient
+# errors are retried by 'download --retry-errors', doubling the delay
+# after each attempt.
+ERROR_NOT_FOUND = "not_found"
+ERROR_NO_CONTENT = "no_content"
+ERROR_HTTP = "http"
+ERROR_TRANSPORT = "transport"
+ERROR_COMPRESS = "compress"
+TRANSIENT_ERROR_CLASSES = frozenset(
+    (ERROR_HTTP, ERROR_TRANSPORT, ERROR_COMPRESS),
+)
+RETRY_BASE_DELAY = timedelta(hours=1)
+RETRY_MAX_DELAY = timedelta(days=7)
+
+
+class DownloadError(NamedTuple):
+    error_class: str
+    http_status: int | None
 
 
 def validate_db_path(db_path: Path) -> None:
@@ -47,48 +96,123 @@ def build_url(log_id: str) -> str:
     return f"https://tenhou.net/0/log/?{log_id}"
 
 
-def fetch_log_content(session: Session, url: str) -> bytes:
-    resp = session.get(url, timeout=TIMEOUT)
-    if resp.status_code != niquests.codes["ok"]:
-        msg = f"failed to fetch: HTTP {resp.status_code}"
-        raise RuntimeError(msg)
-
-    text = resp.text
-    if text is None:
-        msg = "response text is None (failed to decode or empty response)"
-        raise RuntimeError(msg)
-
-    if "mjlog" not in text:
+def iter_collected_chunks(
+    chunks: Iterable[bytes],
+    collected: list[bytes],
+) -> Iterator[bytes]:
+    for chunk in chunks:
+        collected.append(chunk)
+        yield chunk
+
+
+def read_gzip_log_content(resp: niquests.Response) -> bytes:
+    # Keeps the gzip payload as sent by the server. It is decompressed
+    # as it arrives only to check that it is complete and holds a log;
+    # the decompressed data is not kept.
+    raw_chunks: list[bytes] = []
+    has_log = contains_log_marker(
+        iter_gzip_decompressed(
+            iter_collected_chunks(
+                resp.iter_raw(STREAM_CHUNK_SIZE),
+                raw_chunks,
+            ),
+        ),
+    )
+    if not has_log:
         msg = "no log content in response"
         raise RuntimeError(msg)
+    return b"".join(raw_chunks)
 
-    content = resp.content
-    if content is None:
-        msg = "content could not be retrieved"
-        raise RuntimeError(msg)
 
-    return content
+def fetch_log_content(session: Session, url: str) -> bytes:
+    # Returns the log content, or the gzip payload as sent by the server
+    # if the response has a gzip Content-Encoding.
+    with timed_request(session, ENDPOINT_LOG, url) as resp:
+        if resp.status_code is None:
+            # The server closed the connection before sending a status.
+            msg = "no status code in response"
+            raise niquests.exceptions.ConnectionError(msg)
+        if resp.status_code != niquests.codes["ok"]:
+            raise HTTPStatusError(resp.status_code)
+
+        encoding = resp.headers.get("Content-Encoding", "")
+        if encoding.strip().lower() == GZIP_CONTENT_ENCODING:
+            return read_gzip_log_content(resp)
+
+        content = resp.content
+        if content is None:
+            msg = "content could not be retrieved"
+            raise RuntimeError(msg)
+
+        if LOG_MARKER not in content:
+            msg = "no log content in response"
+            raise RuntimeError(msg)
+
+        return content
+
+
+def classify_download_error(e: Exception) -> DownloadError:
+    if isinstance(e, HTTPStatusError):
+        if e.status_code == NOT_FOUND:
+            return DownloadError(ERROR_NOT_FOUND, e.status_code)
+        return DownloadError(ERROR_HTTP, e.status_code)
+    if isinstance(
+        e,
+        niquests.exceptions.RequestException | EOFError | zlib.error,
+    ):
+        # EOFError and zlib.error are a gzip payload that ended early or
+        # was corrupted in transit.
+        return DownloadError(ERROR_TRANSPORT, None)
+    # The server answered 200 with something that is not a log.
+    return DownloadError(ERROR_NO_CONTENT, None)
+
+
+def compute_next_attempt_time(
+    error_class: str,
+    attempts: int,
+    now: datetime,
+) -> datetime | None:
+    if error_class not in TRANSIENT_ERROR_CLASSES:
+        return None
+    max_exponent = (RETRY_MAX_DELAY // RETRY_BASE_DELAY).bit_length()
+    exponent = min(attempts - 1, max_exponent)
+    return now + min(RETRY_BASE_DELAY * 2**exponent, RETRY_MAX_DELAY)
 
 
 def fetch_log_content_for_download(
     session: Session,
     log_id: str,
-) -> tuple[bool, bytes]:
+    pacer: Pacer | None = None,
+    breaker: CircuitBreaker | None = None,
+) -> tuple[DownloadError | None, bytes]:
     url = build_url(log_id)
 
+    if pacer is not None:
+        pacer.wait()
     try:
         content = fetch_log_content(session, url)
     except Exception as e:  # noqa: BLE001
+        if pacer is not None:
+            pacer.record(congested=is_congestion_error(e))
+        if breaker is not None:
+            breaker.record(unavailable=is_unavailable_error(e))
         tqdm.write(f"{log_id}: {e}")
-        return (True, b"")
+        return (classify_download_error(e), b"")
 
-    return (False, content)
+    if pacer is not None:
+        pacer.record(congested=False)
+    if breaker is not None:
+        breaker.record(unavailable=False)
+    return (None, content)
 
 
 def compress_log_content(
     log_id: str,
     content: bytes,
 ) -> tuple[bool, bytes | None]:
+    # Content kept compressed from the response is stored as is.
+    if content.startswith(GZIP_MAGIC):
+        return (False, content)
     try:
         return (False, gzip.compress(content))
     except Exception as e:  # noqa: BLE001
@@ -96,12 +220,57 @@ def compress_log_content(
         return (True, None)
 
 
+def record_download_error(
+    cursor: sqlite3.Cursor,
+    log_id: str,
+    error: DownloadError,
+) -> None:
+    attempts = db.get_download_error_attempts(cursor, log_id) + 1
+    next_attempt_time = compute_next_attempt_time(
+        error.error_class,
+        attempts,
+        datetime.now(UTC),
+    )
+    db.update_log_entries(cursor, log_id, True, None)  # noqa: FBT003
+    db.delete_log_hash(cursor, log_id)
+    db.upsert_download_error(
+        cursor,
+        log_id,
+        error.error_class,
+        error.http_status,
+        attempts,
+        next_attempt_time,
+    )
+
+
+def store_log_content(
+    cursor: sqlite3.Cursor,
+    log_id: str,
+    error: DownloadError | None,
+    content: bytes,
+) -> None:
+    if error is None:
+        _, compressed_content = compress_log_content(log_id, content)
+        if compressed_content is not None:
+            db.update_log_entries(cursor, log_id, False, compressed_content)  # noqa: FBT003
+            db.upsert_log_hashes(
+                cursor,
+                [(log_id, hash_log_content(compressed_content))],
+            )
+            db.delete_download_error(cursor, log_id)
+            return
+        error = DownloadError(ERROR_COMPRESS, None)
+
+    record_download_error(cursor, log_id, error)
+
+
 def iter_undownloaded_log_id_batches(
     cursor: sqlite3.Cursor,
     players: int | None,
     length: str | None,
     limit: int | None,
     batch_size: int,
+    retry_time: datetime | None = None,
 ) -> Iterator[list[str]]:
     last_id = None
     num_logs = 0
@@ -116,6 +285,7 @@ def iter_undownloaded_log_id_batches(
             length,
             last_id,
             current_batch_size,
+            retry_time,
         )
         if not log_ids:
             break
@@ -125,11 +295,101 @@ def iter_undownloaded_log_id_batches(
         yield log_ids
 
 
+def reuse_log_contents(db_path: Path, source_paths: list[Path]) -> int:
+    validate_db_path(db_path)
+    for source_path in source_paths:
+        validate_db_path(source_path)
+        if source_path.resolve() == db_path.resolve():
+            msg = f"cannot reuse logs from the same DB: {source_path}"
+            raise UserInputError(msg)
+
+    num_logs = 0
+    with closing(db.open_db(db_path)) as conn:
+        cursor = conn.cursor()
+        for source_path in tqdm(source_paths):
+            with db.attach_db(conn, source_path, REUSE_SCHEMA):
+                num_logs += db.copy_log_contents_from(cursor, REUSE_SCHEMA)
+
+    return num_logs
+
+
+def download_log_ids(
+    conn: sqlite3.Connection,
+    session: Session,
+    log_ids: Iterator[str],
+    progress: tqdm,
+    pacer: Pacer,
+    breaker: CircuitBreaker,
+    *,
+    wait_on_outage: bool,
+) -> int:
+    cursor = conn.cursor()
+    # IDs that failed because the server was unavailable are held back
+    # until the server answers again. They are left undownloaded if the
+    # circuit breaker opens.
+    retry_ids: deque[str] = deque()
+    unavailable: list[tuple[str, DownloadError]] = []
+    num_logs = 0
+    while (
+        log_id := retry_ids.popleft() if retry_ids else next(log_ids, None)
+    ) is not None:
+        error, content = fetch_log_content_for_download(
+            session,
+            log_id,
+            pacer,
+            breaker,
+        )
+        if error is not None and breaker.failures > 0:
+            unavailable.append((log_id, error))
+            if not breaker.is_open:
+                continue
+            if not wait_on_outage:
+                tqdm.write("server unavailable, stopping download")
+                return num_logs
+
+            tqdm.write(
+                f"server unavailable, retrying in {breaker.probe_delay:.0f} s",
+            )
+            breaker.wait_for_probe()
+            retry_ids.extendleft(
+                failed_id for failed_id, _ in reversed(unavailable)
+            )
+            unavailable.clear()
+            continue
+
+        for failed_id, failed_error in unavailable:
+            record_download_error(cursor, failed_id, failed_error)
+        store_log_content(cursor, log_id, error, content)
+        num_logs += len(unavailable) + 1
+        progress.set_postfix_str(f"{pacer.rate:.2f} req/s", refresh=False)
+        progress.update(len(unavailable) + 1)
+        unavailable.clear()
+
+        conn.commit()
+
+    # The last failures did not open the breaker, so they are recorded
+    # like any other failure.
+    for failed_id, failed_error in unavailable:
+        record_download_error(cursor, failed_id, failed_error)
+    num_logs += len(unavailable)
+    progress.update(len(unavailable))
+    conn.commit()
+
+    return num_logs
+
+
 def download(
     db_path: Path,
     players: int | None,
     length: str | None,
     limit: int | None,
+    *,
+    min_rate: float = DEFAULT_MIN_RATE,
+    max_rate: float = DEFAULT_MAX_RATE,
+    wait_on_outage: bool = False,
+    retry_errors: bool = False,
+    min_timeout: float = DEFAULT_MIN_TIMEOUT,
+    max_timeout: float = DEFAULT_MAX_TIMEOUT,
 ) -> int:
     validate_db_path(db_path)
     if players is not None:
@@ -138,48 +398,41 @@ def download(
         validate_length(length)
     if limit is not None:
         validate_limit(limit)
+    validate_timeouts(min_timeout, max_timeout)
+    pacer = Pacer(min_rate, max_rate)
+    breaker = CircuitBreaker()
+    retry_time = datetime.now(UTC) if retry_errors else None
 
-    num_logs = 0
     with closing(db.open_db(db_path)) as conn, conn:
+        db.setup_table(conn)
         cursor = conn.cursor()
 
-        with create_session() as session:
+        with create_session(min_timeout, max_timeout) as session:
             total = db.count_undownloaded_log_ids(
                 cursor,
                 players,
                 length,
                 limit,
+                retry_time,
             )
-
-            with tqdm(total=total) as progress:
-                for ids in iter_undownloaded_log_id_batches(
+            log_ids = chain.from_iterable(
+                iter_undownloaded_log_id_batches(
                     cursor,
                     players,
                     length,
                     limit,
                     DOWNLOAD_BATCH_SIZE,
-                ):
-                    for log_id in ids:
-                        was_error, content = fetch_log_content_for_download(
-                            session,
-                            log_id,
-                        )
-
-                        compressed_content = None
-                        if not was_error:
-                            was_error, compressed_content = (
-                                compress_log_content(log_id, content)
-                            )
-
-                        db.update_log_entries(
-                            cursor,
-                            log_id,
-                            was_error,
-                            compressed_content,
-                        )
-                        num_logs += 1
-                        progress.update(1)
-
-                        conn.commit()
+                    retry_time,
+                ),
+            )
 
-    return num_logs
+            with tqdm(total=total) as progress:
+                return download_log_ids(
+                    conn,
+                    session,
+                    log_ids,
+                    progress,
+                    pacer,
+                    breaker,
+                    wait_on_outage=wait_on_outage,
+                )
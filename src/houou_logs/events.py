@@ -0,0 +1,347 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import gzip
+import io
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from enum import IntEnum
+from xml.parsers import expat
+
+from houou_logs.binary_log import (
+    OP_DISCARD,
+    OP_MELD,
+    is_binary_log,
+    iter_records,
+)
+
+READ_CHUNK_SIZE = 64 * 1024
+
+DRAW_TAG_PLAYERS = {"T": 0, "U": 1, "V": 2, "W": 3}
+DISCARD_TAG_PLAYERS = {"D": 0, "E": 1, "F": 2, "G": 3}
+
+MELD_FROM_MASK = 0x3
+MELD_CHI_FLAG = 0x4
+MELD_PON_FLAG = 0x8
+MELD_KAKAN_FLAG = 0x10
+MELD_NUKI_FLAG = 0x20
+
+
+class MeldKind(IntEnum):
+    CHI = 0
+    PON = 1
+    KAKAN = 2
+    MINKAN = 3
+    ANKAN = 4
+    NUKI = 5
+
+
+@dataclass(slots=True, frozen=True)
+class Shuffle:
+    seed: str
+
+
+@dataclass(slots=True, frozen=True)
+class Init:
+    round: int
+    honba: int
+    riichi: int
+    dice: tuple[int, int]
+    dora_indicator: int
+    ten: tuple[int, ...]
+    oya: int
+    hands: tuple[tuple[int, ...], ...]
+
+
+@dataclass(slots=True, frozen=True)
+class Draw:
+    who: int
+    tile: int
+
+
+@dataclass(slots=True, frozen=True)
+class Discard:
+    who: int
+    tile: int
+
+
+@dataclass(slots=True, frozen=True)
+class Meld:
+    who: int
+    code: int
+    kind: MeldKind
+    tiles: tuple[int, ...]
+    called: int  # -1 for ankan and nuki
+    from_who: int
+
+
+@dataclass(slots=True, frozen=True)
+class Reach:
+    who: int
+    step: int
+    ten: tuple[int, ...]
+
+
+@dataclass(slots=True, frozen=True)
+class Dora:
+    tile: int
+
+
+@dataclass(slots=True, frozen=True)
+class Agari:
+    who: int
+    from_who: int
+    honba: int
+    riichi: int
+    hand: tuple[int, ...]
+    melds: tuple[int, ...]
+    machi: int
+    ten: tuple[int, ...]  # fu, points, limit
+    yaku: tuple[tuple[int, int], ...]  # (yaku ID, han)
+    yakuman: tuple[int, ...]
+    dora_indicators: tuple[int, ...]
+    ura_indicators: tuple[int, ...]
+    sc: tuple[int, ...]
+    owari: tuple[float, ...] | None
+    pao_who: int | None
+
+
+@dataclass(slots=True, frozen=True)
+class Ryuukyoku:
+    honba: int
+    riichi: int
+    kind: str | None
+    sc: tuple[int, ...]
+    hands: tuple[tuple[int, ...] | None, ...]
+    owari: tuple[float, ...] | None
+
+
+Event = (
+    Shuffle | Init | Draw | Discard | Meld | Reach | Dora | Agari | Ryuukyoku
+)
+
+
+def parse_ints(value: str) -> tuple[int, ...]:
+    if not value:
+        return ()
+    return tuple(map(int, value.split(",")))
+
+
+def parse_floats(value: str) -> tuple[float, ...]:
+    return tuple(map(float, value.split(",")))
+
+
+def decode_meld(who: int, code: int) -> Meld:
+    from_who = (who + (code & MELD_FROM_MASK)) % 4
+
+    if code & MELD_CHI_FLAG:
+        pattern = code >> 10
+        called = pattern % 3
+        base = pattern // 3
+        base = (base // 7) * 9 + base % 7
+        tiles = (
+            4 * base + ((code >> 3) & 0x3),
+            4 * (base + 1) + ((code >> 5) & 0x3),
+            4 * (base + 2) + ((code >> 7) & 0x3),
+        )
+        return Meld(who, code, MeldKind.CHI, tiles, tiles[called], from_who)
+
+    if code & (MELD_PON_FLAG | MELD_KAKAN_FLAG):
+        unused = (code >> 5) & 0x3
+        pattern = code >> 9
+        called = pattern % 3
+        base = pattern // 3
+        pon_tiles = tuple(4 * base + i for i in range(4) if i != unused)
+        if code & MELD_PON_FLAG:
+            kind = MeldKind.PON
+            tiles = pon_tiles
+        else:
+            kind = MeldKind.KAKAN
+            tiles = (*pon_tiles, 4 * base + unused)
+        return Meld(who, code, kind, tiles, pon_tiles[called], from_who)
+
+    if code & MELD_NUKI_FLAG:
+        return Meld(who, code, MeldKind.NUKI, (code >> 8,), -1, who)
+
+    tile = code >> 8
+    base = tile // 4
+    tiles = tuple(4 * base + i for i in range(4))
+    if code & MELD_FROM_MASK:
+        return Meld(who, code, MeldKind.MINKAN, tiles, tile, from_who)
+    return Meld(who, code, MeldKind.ANKAN, tiles, -1, who)
+
+
+def decode_shuffle(attrs: dict[str, str]) -> Shuffle:
+    return Shuffle(attrs["seed"])
+
+
+def decode_init(attrs: dict[str, str]) -> Init:
+    seed = parse_ints(attrs["seed"])
+    return Init(
+        round=seed[0],
+        honba=seed[1],
+        riichi=seed[2],
+        dice=(seed[3], seed[4]),
+        dora_indicator=seed[5],
+        ten=parse_ints(attrs["ten"]),
+        oya=int(attrs["oya"]),
+        hands=tuple(parse_ints(attrs.get(f"hai{i}", "")) for i in range(4)),
+    )
+
+
+def decode_reach(attrs: dict[str, str]) -> Reach:
+    return Reach(
+        who=int(attrs["who"]),
+        step=int(attrs["step"]),
+        ten=parse_ints(attrs.get("ten", "")),
+    )
+
+
+def decode_dora(attrs: dict[str, str]) -> Dora:
+    return Dora(int(attrs["hai"]))
+
+
+def decode_n(attrs: dict[str, str]) -> Meld:
+    return decode_meld(int(attrs["who"]), int(attrs["m"]))
+
+
+def decode_agari(attrs: dict[str, str]) -> Agari:
+    honba, riichi = parse_ints(attrs["ba"])
+    yaku = parse_ints(attrs.get("yaku", ""))
+    owari = attrs.get("owari")
+    pao_who = attrs.get("paoWho")
+    return Agari(
+        who=int(attrs["who"]),
+        from_who=int(attrs["fromWho"]),
+        honba=honba,
+        riichi=riichi,
+        hand=parse_ints(attrs["hai"]),
+        melds=parse_ints(attrs.get("m", "")),
+        machi=int(attrs["machi"]),
+        ten=parse_ints(attrs["ten"]),
+        yaku=tuple(zip(yaku[0::2], yaku[1::2], strict=True)),
+        yakuman=parse_ints(attrs.get("yakuman", "")),
+        dora_indicators=parse_ints(attrs["doraHai"]),
+        ura_indicators=parse_ints(attrs.get("doraHaiUra", "")),
+        sc=parse_ints(attrs["sc"]),
+        owari=None if owari is None else parse_floats(owari),
+        pao_who=None if pao_who is None else int(pao_who),
+    )
+
+
+def decode_ryuukyoku(attrs: dict[str, str]) -> Ryuukyoku:
+    honba, riichi = parse_ints(attrs["ba"])
+    owari = attrs.get("owari")
+    return Ryuukyoku(
+        honba=honba,
+        riichi=riichi,
+        kind=attrs.get("type"),
+        sc=parse_ints(attrs["sc"]),
+        hands=tuple(
+            parse_ints(attrs[f"hai{i}"]) if f"hai{i}" in attrs else None
+            for i in range(4)
+        ),
+        owari=None if owari is None else parse_floats(owari),
+    )
+
+
+NAMED_TAG_DECODERS: dict[str, Callable[[dict[str, str]], Event]] = {
+    "SHUFFLE": decode_shuffle,
+    "INIT": decode_init,
+    "N": decode_n,
+    "REACH": decode_reach,
+    "DORA": decode_dora,
+    "AGARI": decode_agari,
+    "RYUUKYOKU": decode_ryuukyoku,
+}
+
+
+def decode_element(tagname: str, attrs: dict[str, str]) -> Event | None:
+    decoder = NAMED_TAG_DECODERS.get(tagname)
+    if decoder is not None:
+        return decoder(attrs)
+
+    # Draw and discard tags carry the tile in the tag name: <T12/>.
+    tile = tagname[1:]
+    if not tile.isdigit():
+        # Tags that are not part of round content (GO, UN, TAIKYOKU,
+        # BYE and the root) are skipped.
+        return None
+
+    who = DRAW_TAG_PLAYERS.get(tagname[0])
+    if who is not None:
+        return Draw(who, int(tile))
+
+    who = DISCARD_TAG_PLAYERS.get(tagname[0])
+    if who is not None:
+        return Discard(who, int(tile))
+
+    return None
+
+
+def iter_events_from_chunks(chunks: Iterable[bytes]) -> Iterator[Event]:
+    parser = expat.ParserCreate()
+    pending: list[Event] = []
+
+    def start_element(tagname: str, attrs: dict[str, str]) -> None:
+        event = decode_element(tagname, attrs)
+        if event is not None:
+            pending.append(event)
+
+    parser.StartElementHandler = start_element
+
+    for chunk in chunks:
+        parser.Parse(chunk, False)  # noqa: FBT003
+        yield from pending
+        pending.clear()
+
+    parser.Parse(b"", True)  # noqa: FBT003
+    yield from pending
+
+
+def iter_chunks(fileobj: io.BufferedIOBase) -> Iterator[bytes]:
+    while chunk := fileobj.read(READ_CHUNK_SIZE):
+        yield chunk
+
+
+def iter_events(content: bytes) -> Iterator[Event]:
+    return iter_events_from_chunks((content,))
+
+
+def iter_binary_log_events(blob: bytes) -> Iterator[Event]:
+    # Draws, discards and melds come straight from the record stream.
+    # Only literal records go through the XML parser.
+    parser = expat.ParserCreate()
+    pending: list[Event] = []
+
+    def start_element(tagname: str, attrs: dict[str, str]) -> None:
+        event = decode_element(tagname, attrs)
+        if event is not None:
+            pending.append(event)
+
+    parser.StartElementHandler = start_element
+
+    for op, who, value, literal in iter_records(blob):
+        if literal is not None:
+            parser.Parse(literal.tobytes(), False)  # noqa: FBT003
+            yield from pending
+            pending.clear()
+        elif op == OP_MELD:
+            yield decode_meld(who, value)
+        elif op < OP_DISCARD:
+            yield Draw(who, value)
+        else:
+            yield Discard(who, value)
+
+    parser.Parse(b"", True)  # noqa: FBT003
+    yield from pending
+
+
+def iter_log_events(compressed_content: bytes) -> Iterator[Event]:
+    if is_binary_log(compressed_content):
+        yield from iter_binary_log_events(compressed_content)
+        return
+
+    with gzip.GzipFile(fileobj=io.BytesIO(compressed_content)) as gz:
+        yield from iter_events_from_chunks(iter_chunks(gz))
@@ -5,3 +5,11 @@
 
 class UserInputError(Exception):
     """Raised when arguments are invalid or out of allowed range."""
+
+
+class HTTPStatusError(RuntimeError):
+    """Raised when a server answers with an unexpected HTTP status."""
+
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"failed to fetch: HTTP {status_code}")
+        self.status_code = status_code
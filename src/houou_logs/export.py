@@ -2,8 +2,6 @@
 # SPDX-License-Identifier: MIT
 # This file is part of https://github.com/Apricot-S/houou-logs
 
-import gzip
-import io
 import shutil
 from contextlib import closing
 from pathlib import Path
@@ -18,6 +16,7 @@ from houou_logs.download import (
     validate_players,
 )
 from houou_logs.exceptions import UserInputError
+from houou_logs.storage import open_log_content
 
 
 def validate_offset(offset: int) -> None:
@@ -67,12 +66,10 @@ def export(
             filename = (output_dir / log_id).with_suffix(".xml")
             try:
                 with (
-                    gzip.GzipFile(
-                        fileobj=io.BytesIO(compressed_content),
-                    ) as gz,
+                    open_log_content(compressed_content) as content,
                     filename.open("wb") as f,
                 ):
-                    shutil.copyfileobj(gz, f)
+                    shutil.copyfileobj(content, f)
             except Exception as e:  # noqa: BLE001
                 tqdm.write(f"{log_id}: failed to decompress: {e}")
                 num_logs -= 1
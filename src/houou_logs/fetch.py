@@ -2,20 +2,44 @@
 # SPDX-License-Identifier: MIT
 # This file is part of https://github.com/Apricot-S/houou-logs
 
-import io
 import re
+from collections.abc import Iterator
 from contextlib import closing
 from datetime import UTC, datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 
 import niquests
 from tqdm import tqdm
 
 from houou_logs import db
-from houou_logs.log_id import HOUOU_ARCHIVE_PREFIX, extract_log_entries
-from houou_logs.session import TIMEOUT, create_session
+from houou_logs.http_cache import (
+    STREAM_CHUNK_SIZE,
+    fetch_cached_content,
+    get_cached_content_size,
+    iter_cached_body,
+    iter_cached_content,
+)
+from houou_logs.log_id import (
+    HOUOU_ARCHIVE_PREFIX,
+    iter_log_entries_from_chunks,
+)
+from houou_logs.parallel import prefetch
+from houou_logs.session import (
+    DEFAULT_MAX_TIMEOUT,
+    DEFAULT_MIN_TIMEOUT,
+    ENDPOINT_FILE_INDEX,
+    ENDPOINT_LOG_FILE,
+    create_session,
+    timed_get,
+    timed_request,
+    validate_timeouts,
+)
 
 MIN_FETCH_INTERVAL = timedelta(minutes=20)
+FETCH_BATCH_SIZE = 10000
+MAX_PREFETCHED_CHUNKS = 64
 FETCH_KIND_LATEST = "latest"
 FETCH_KIND_ARCHIVE = "archive"
 
@@ -42,8 +66,21 @@ def should_fetch(
     return now - last_attempt_time > MIN_FETCH_INTERVAL
 
 
-def fetch_file_index_text(session: niquests.Session, url: str) -> str:
-    res = session.get(url, timeout=TIMEOUT)
+def fetch_file_index_text(
+    session: niquests.Session,
+    url: str,
+    cache_dir: Path | None = None,
+) -> str:
+    if cache_dir is not None:
+        content = fetch_cached_content(
+            session,
+            url,
+            cache_dir,
+            endpoint=ENDPOINT_FILE_INDEX,
+        )
+        return content.decode("utf-8")
+
+    res = timed_get(session, ENDPOINT_FILE_INDEX, url)
     res.raise_for_status()
 
     text = res.text
@@ -54,16 +91,56 @@ def fetch_file_index_text(session: niquests.Session, url: str) -> str:
     return text
 
 
-def fetch_log_file_content(session: niquests.Session, url: str) -> bytes:
-    res = session.get(url, timeout=TIMEOUT)
-    res.raise_for_status()
-
-    content = res.content
-    if content is None:
-        msg = "response content is None"
-        raise RuntimeError(msg)
-
-    return content
+def iter_log_file_content(
+    session: niquests.Session,
+    url: str,
+    cache_dir: Path | None = None,
+) -> Iterator[bytes]:
+    # Streams the response body in chunks as it arrives.
+    if cache_dir is not None:
+        yield from iter_cached_content(
+            session,
+            url,
+            cache_dir,
+            endpoint=ENDPOINT_LOG_FILE,
+        )
+        return
+
+    with timed_request(session, ENDPOINT_LOG_FILE, url) as res:
+        res.raise_for_status()
+        yield from res.iter_content(STREAM_CHUNK_SIZE)
+
+
+def iter_log_file_chunks(
+    session: niquests.Session,
+    url: str,
+    size: int,
+    cache_dir: Path | None,
+) -> Iterator[bytes]:
+    # A cached file with the size listed in the FileIndex is streamed
+    # from disk without a request.
+    if (
+        cache_dir is not None
+        and get_cached_content_size(cache_dir, url) == size
+    ):
+        yield from iter_cached_body(cache_dir, url)
+        return
+
+    yield from iter_log_file_content(session, url, cache_dir)
+
+
+def iter_changed_file_chunks(
+    session: niquests.Session,
+    changed_files: dict[str, int],
+    cache_dir: Path | None,
+) -> Iterator[tuple[str, int, bytes]]:
+    # Yields (filename, size, chunk). Every file ends with an empty
+    # chunk, so that empty files are still reported.
+    for filename, size in changed_files.items():
+        url = f"{LOG_DOWNLOAD_URL}{filename}"
+        for chunk in iter_log_file_chunks(session, url, size, cache_dir):
+            yield (filename, size, chunk)
+        yield (filename, size, b"")
 
 
 def parse_file_index(response: str) -> dict[str, int]:
@@ -86,7 +163,16 @@ def filter_houou_files(file_index: dict[str, int]) -> dict[str, int]:
     }
 
 
-def fetch(db_path: str | Path, *, archive: bool) -> int:
+def fetch(
+    db_path: str | Path,
+    *,
+    archive: bool,
+    cache_dir: Path | None = None,
+    min_timeout: float = DEFAULT_MIN_TIMEOUT,
+    max_timeout: float = DEFAULT_MAX_TIMEOUT,
+) -> int:
+    validate_timeouts(min_timeout, max_timeout)
+
     num_logs = 0
     with closing(db.open_db(db_path)) as conn, conn:
         db.setup_table(conn)
@@ -100,26 +186,41 @@ def fetch(db_path: str | Path, *, archive: bool) -> int:
         db.update_fetch_attempt_time(cursor, kind, datetime.now(UTC))
         conn.commit()
 
-        with create_session() as session:
+        with create_session(min_timeout, max_timeout) as session:
             index_url = INDEX_URL_OLD if archive else INDEX_URL_LATEST
-            resp = fetch_file_index_text(session, index_url)
+            resp = fetch_file_index_text(session, index_url, cache_dir)
 
             file_index = parse_file_index(resp)
             file_index = filter_houou_files(file_index)
 
             changed_files = db.list_changed_file_index(cursor, file_index)
 
-            for filename, size in tqdm(changed_files.items()):
-                url = f"{LOG_DOWNLOAD_URL}{filename}"
-                content = fetch_log_file_content(session, url)
-
-                with io.BytesIO(content) as f:
-                    entries = extract_log_entries(filename, f)
-
-                db.insert_log_entries(cursor, entries)
-                num_logs += len(entries)
+            # The session streams the files in the background while
+            # this thread decompresses, parses and inserts the chunks
+            # received so far. A file's entries and its FileIndex size
+            # are always committed together.
+            chunks = prefetch(
+                iter_changed_file_chunks(session, changed_files, cache_dir),
+                max_pending=MAX_PREFETCHED_CHUNKS,
+            )
+            num_uncommitted_logs = 0
+            for (filename, size), file_chunks in tqdm(
+                groupby(chunks, key=itemgetter(0, 1)),
+                total=len(changed_files),
+            ):
+                num_file_logs = db.insert_log_entries(
+                    cursor,
+                    iter_log_entries_from_chunks(
+                        filename,
+                        (chunk for _, _, chunk in file_chunks),
+                    ),
+                )
                 db.insert_file_index(cursor, filename, size)
 
-                conn.commit()
+                num_logs += num_file_logs
+                num_uncommitted_logs += num_file_logs
+                if num_uncommitted_logs >= FETCH_BATCH_SIZE:
+                    conn.commit()
+                    num_uncommitted_logs = 0
 
     return num_logs
@@ -0,0 +1,160 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import hashlib
+import json
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+
+import niquests
+
+from houou_logs.session import timed_request
+
+NOT_MODIFIED = 304
+BODY_SUFFIX = ".body"
+METADATA_SUFFIX = ".json"
+TEMP_SUFFIX = ".tmp"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Response header -> request header sent to revalidate the response.
+VALIDATOR_HEADERS = {
+    "ETag": "If-None-Match",
+    "Last-Modified": "If-Modified-Since",
+}
+
+
+def build_cache_path(cache_dir: Path, url: str) -> Path:
+    # Returns the path of the cached body without a suffix.
+    return cache_dir / hashlib.sha256(url.encode()).hexdigest()
+
+
+def build_body_path(cache_dir: Path, url: str) -> Path:
+    return build_cache_path(cache_dir, url).with_suffix(BODY_SUFFIX)
+
+
+def build_temp_path(path: Path) -> Path:
+    return path.with_name(path.name + TEMP_SUFFIX)
+
+
+def write_file_atomically(path: Path, data: bytes) -> None:
+    temp_path = build_temp_path(path)
+    temp_path.write_bytes(data)
+    temp_path.replace(path)
+
+
+def read_cached_content(cache_dir: Path, url: str) -> bytes | None:
+    try:
+        return build_body_path(cache_dir, url).read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def get_cached_content_size(cache_dir: Path, url: str) -> int | None:
+    try:
+        return build_body_path(cache_dir, url).stat().st_size
+    except FileNotFoundError:
+        return None
+
+
+def iter_cached_body(
+    cache_dir: Path,
+    url: str,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    # Streams the cached body from disk, like a response body.
+    with build_body_path(cache_dir, url).open("rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def read_cache_validators(cache_dir: Path, url: str) -> dict[str, str]:
+    # Returns the conditional request headers for the cached response,
+    # or an empty dict if it has no validators.
+    path = build_cache_path(cache_dir, url)
+    try:
+        metadata = json.loads(path.with_suffix(METADATA_SUFFIX).read_bytes())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+    if metadata.get("url") != url:
+        return {}
+    return {
+        request_header: metadata[response_header]
+        for response_header, request_header in VALIDATOR_HEADERS.items()
+        if metadata.get(response_header)
+    }
+
+
+def replace_cached_content(
+    cache_dir: Path,
+    url: str,
+    temp_body_path: Path,
+    headers: Mapping[str, str],
+) -> None:
+    # The old metadata is removed before the body is replaced, so that a
+    # crash in between never leaves validators of a different body.
+    path = build_cache_path(cache_dir, url)
+    metadata_path = path.with_suffix(METADATA_SUFFIX)
+    metadata_path.unlink(missing_ok=True)
+    temp_body_path.replace(path.with_suffix(BODY_SUFFIX))
+
+    metadata = {"url": url}
+    for response_header in VALIDATOR_HEADERS:
+        value = headers.get(response_header)
+        if value:
+            metadata[response_header] = value
+    write_file_atomically(metadata_path, json.dumps(metadata).encode())
+
+
+def write_cached_content(
+    cache_dir: Path,
+    url: str,
+    content: bytes,
+    headers: Mapping[str, str],
+) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    temp_body_path = build_temp_path(build_body_path(cache_dir, url))
+    temp_body_path.write_bytes(content)
+    replace_cached_content(cache_dir, url, temp_body_path, headers)
+
+
+def iter_cached_content(
+    session: niquests.Session,
+    url: str,
+    cache_dir: Path,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    *,
+    endpoint: str,
+) -> Iterator[bytes]:
+    # Sends a conditional GET and yields the cached body if the server
+    # answers 304 Not Modified. Other responses are streamed to the
+    # caller and replace the cache entry once they are complete.
+    is_cached = build_body_path(cache_dir, url).is_file()
+    validators = read_cache_validators(cache_dir, url) if is_cached else {}
+
+    with timed_request(session, endpoint, url, headers=validators) as res:
+        if res.status_code == NOT_MODIFIED and is_cached:
+            yield from iter_cached_body(cache_dir, url, chunk_size)
+            return
+        res.raise_for_status()
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_body_path = build_temp_path(build_body_path(cache_dir, url))
+        with temp_body_path.open("wb") as f:
+            for chunk in res.iter_content(chunk_size):
+                f.write(chunk)
+                yield chunk
+        replace_cached_content(cache_dir, url, temp_body_path, res.headers)
+
+
+def fetch_cached_content(
+    session: niquests.Session,
+    url: str,
+    cache_dir: Path,
+    *,
+    endpoint: str,
+) -> bytes:
+    return b"".join(
+        iter_cached_content(session, url, cache_dir, endpoint=endpoint),
+    )
@@ -2,8 +2,10 @@
 # SPDX-License-Identifier: MIT
 # This file is part of https://github.com/Apricot-S/houou-logs
 
+import sqlite3
 from collections.abc import Iterator
 from contextlib import closing
+from operator import attrgetter
 from pathlib import Path
 from zipfile import ZipFile, ZipInfo, is_zipfile
 
@@ -11,7 +13,13 @@ from tqdm import tqdm
 
 from houou_logs import db
 from houou_logs.exceptions import UserInputError
-from houou_logs.log_id import HOUOU_ARCHIVE_PREFIX, extract_log_entries
+from houou_logs.log_id import HOUOU_ARCHIVE_PREFIX, iter_log_entries
+from houou_logs.parallel import imap_batched, validate_jobs
+
+ARCHIVE_SUFFIX = ".zip"
+IMPORT_BATCH_SIZE = 10000
+BULK_IMPORT_BATCH_SIZE = 100000
+MEMBER_BATCH_SIZE = 8
 
 
 def validate_archive(archive_path: Path) -> None:
@@ -24,6 +32,29 @@ def validate_archive(archive_path: Path) -> None:
         raise UserInputError(msg)
 
 
+def collect_archive_paths(paths: list[Path]) -> list[Path]:
+    # Directories are expanded to the archive files directly in them.
+    archive_paths: list[Path] = []
+    for path in paths:
+        if not path.is_dir():
+            archive_paths.append(path)
+            continue
+
+        found = sorted(
+            p
+            for p in path.iterdir()
+            if p.suffix == ARCHIVE_SUFFIX and p.is_file()
+        )
+        if not found:
+            msg = f"no archive files found in directory: {path}"
+            raise UserInputError(msg)
+        archive_paths.extend(found)
+
+    for archive_path in archive_paths:
+        validate_archive(archive_path)
+    return archive_paths
+
+
 def iter_houou_archive_files(zf: ZipFile) -> Iterator[ZipInfo]:
     for info in zf.infolist():
         if info.is_dir():
@@ -33,21 +64,124 @@ def iter_houou_archive_files(zf: ZipFile) -> Iterator[ZipInfo]:
             yield info
 
 
-def import_(db_path: str | Path, archive_path: Path) -> int:
-    validate_archive(archive_path)
+def list_archive_members(archive_path: Path) -> list[tuple[Path, ZipInfo]]:
+    with ZipFile(archive_path) as zf:
+        return [(archive_path, info) for info in iter_houou_archive_files(zf)]
+
+
+def filter_changed_members(
+    cursor: sqlite3.Cursor,
+    members: list[tuple[Path, ZipInfo]],
+) -> list[tuple[Path, ZipInfo]]:
+    # CRC32 and size come from the central directory of the archive, so
+    # unchanged members are skipped without being decompressed.
+    import_index = {
+        info.filename: (info.CRC, info.file_size) for _, info in members
+    }
+    changed = db.list_changed_import_index(cursor, import_index)
+    return [member for member in members if member[1].filename in changed]
+
+
+def extract_archive_member_entries(
+    archive_path: Path,
+    member_name: str,
+) -> list[db.LogEntry]:
+    # Runs in worker processes.
+    with ZipFile(archive_path) as zf, zf.open(member_name) as f:
+        return list(iter_log_entries(member_name, f))
+
+
+def validate_empty_db(cursor: sqlite3.Cursor) -> None:
+    if db.count_all_ids(cursor) > 0:
+        msg = "bulk mode requires a database without log IDs"
+        raise UserInputError(msg)
+
 
+def insert_archive_members(
+    cursor: sqlite3.Cursor,
+    members: list[tuple[Path, ZipInfo]],
+    *,
+    jobs: int,
+    batch_size: int,
+    sort: bool,
+) -> int:
+    # Members are parsed in worker processes. Only this process writes
+    # to the DB, in batches of 'batch_size' entries.
     num_logs = 0
-    with closing(db.open_db(db_path)) as conn, conn:
+    pending: list[db.LogEntry] = []
+
+    def flush() -> None:
+        if sort:
+            # Inserting in key order appends to the B-tree instead of
+            # splitting pages all over it.
+            pending.sort(key=attrgetter("id"))
+        db.insert_log_entries(cursor, pending)
+        pending.clear()
+
+    results = imap_batched(
+        extract_archive_member_entries,
+        ((archive_path, info.filename) for archive_path, info in members),
+        jobs=jobs,
+        batch_size=MEMBER_BATCH_SIZE,
+    )
+    for (_, info), entries in tqdm(
+        zip(members, results, strict=True),
+        total=len(members),
+    ):
+        db.insert_import_index(cursor, info.filename, info.CRC, info.file_size)
+        pending.extend(entries)
+        num_logs += len(entries)
+        if len(pending) >= batch_size:
+            flush()
+
+    if pending:
+        flush()
+
+    return num_logs
+
+
+def import_(
+    db_path: str | Path,
+    archive_paths: list[Path],
+    *,
+    jobs: int = 1,
+    bulk: bool = False,
+) -> int:
+    archive_paths = collect_archive_paths(archive_paths)
+    validate_jobs(jobs)
+
+    members = [
+        member
+        for archive_path in archive_paths
+        for member in list_archive_members(archive_path)
+    ]
+
+    with closing(db.open_db(db_path)) as conn:
         db.setup_table(conn)
         cursor = conn.cursor()
+        members = filter_changed_members(cursor, members)
+        if not bulk:
+            with conn:
+                return insert_archive_members(
+                    cursor,
+                    members,
+                    jobs=jobs,
+                    batch_size=IMPORT_BATCH_SIZE,
+                    sort=False,
+                )
 
-        with ZipFile(archive_path) as zf:
-            archive_files = list(iter_houou_archive_files(zf))
-            for info in tqdm(archive_files):
-                with zf.open(info) as f:
-                    entries = extract_log_entries(info.filename, f)
-
-                db.insert_log_entries(cursor, entries)
-                num_logs += len(entries)
+        validate_empty_db(cursor)
+        # The secondary index is built once at the end instead of being
+        # maintained row by row. Everything runs in one transaction.
+        with db.bulk_load(conn), conn:
+            db.drop_logs_status_filter_index(conn)
+            num_logs = insert_archive_members(
+                cursor,
+                members,
+                jobs=jobs,
+                batch_size=BULK_IMPORT_BATCH_SIZE,
+                sort=True,
+            )
+            db.create_logs_status_filter_index(conn)
 
     return num_logs
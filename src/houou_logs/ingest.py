@@ -0,0 +1,189 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import gzip
+import sqlite3
+import tarfile
+from collections.abc import Iterator
+from contextlib import closing
+from pathlib import Path
+
+from tqdm import tqdm
+
+from houou_logs import db
+from houou_logs.exceptions import UserInputError
+from houou_logs.log_id import iter_gzip_decompressed, parse_id
+from houou_logs.parallel import imap_batched, validate_jobs
+from houou_logs.storage import (
+    GZIP_MAGIC,
+    LOG_MARKER,
+    contains_log_marker,
+    hash_log_content,
+)
+
+INGEST_BATCH_SIZE = 1000
+XML_SUFFIX = ".xml"
+GZIP_SUFFIX = ".gz"
+
+
+def validate_source(source_path: Path) -> None:
+    if source_path.is_dir():
+        return
+
+    if not source_path.is_file():
+        msg = f"source not found: {source_path}"
+        raise UserInputError(msg)
+
+    if not tarfile.is_tarfile(source_path):
+        msg = f"source must be a directory or tar file: {source_path}"
+        raise UserInputError(msg)
+
+
+def parse_log_filename(filename: str) -> tuple[str, bool] | None:
+    # Returns (log ID, whether the file is gzip-compressed) for
+    # '<id>.xml' and '<id>.xml.gz', or None for other files.
+    name = Path(filename).name
+    is_gzip = name.endswith(GZIP_SUFFIX)
+    if is_gzip:
+        name = name.removesuffix(GZIP_SUFFIX)
+
+    if not name.endswith(XML_SUFFIX):
+        return None
+    return (name.removesuffix(XML_SUFFIX), is_gzip)
+
+
+def build_log_entry(
+    log_id: str,
+    content: bytes,
+    is_gzip: bool,  # noqa: FBT001
+) -> db.LogEntry:
+    # Gzip files are decompressed in full to reject truncated or corrupt
+    # ones, but are stored as they are.
+    if is_gzip:
+        if not content.startswith(GZIP_MAGIC):
+            msg = "not a gzip file"
+            raise ValueError(msg)
+        has_log = contains_log_marker(iter_gzip_decompressed((content,)))
+    else:
+        has_log = LOG_MARKER in content
+
+    if not has_log:
+        msg = "no log content in file"
+        raise ValueError(msg)
+
+    compressed_content = content if is_gzip else gzip.compress(content)
+
+    # Log IDs carry the hour the game started, but not the minute.
+    entry = parse_id(f"{log_id[8:10]}:00", log_id)
+    return entry._replace(is_processed=True, log=compressed_content)
+
+
+def load_log_entry(
+    filename: str,
+    log_id: str,
+    is_gzip: bool,  # noqa: FBT001
+    source: Path | bytes,
+) -> tuple[db.LogEntry, bytes] | None:
+    # Returns (entry, content hash). Runs in worker processes. Files in
+    # a directory are read by the worker, members of a tar file are read
+    # by the caller.
+    try:
+        content = source.read_bytes() if isinstance(source, Path) else source
+        entry = build_log_entry(log_id, content, is_gzip)
+    except Exception as e:  # noqa: BLE001
+        tqdm.write(f"{filename}: {e}")
+        return None
+
+    if entry.log is None:
+        return None
+    return (entry, hash_log_content(entry.log))
+
+
+def iter_directory_files(
+    source_path: Path,
+) -> Iterator[tuple[str, Path | bytes]]:
+    for path in source_path.rglob("*"):
+        if path.is_file():
+            yield (str(path), path)
+
+
+def iter_tar_files(source_path: Path) -> Iterator[tuple[str, Path | bytes]]:
+    # Streaming mode reads members in order without seeking.
+    with tarfile.open(source_path, "r|*") as tar:
+        for member in tar:
+            if not member.isfile() or parse_log_filename(member.name) is None:
+                continue
+
+            f = tar.extractfile(member)
+            if f is None:
+                continue
+            with f:
+                yield (member.name, f.read())
+
+
+def iter_load_args(
+    files: Iterator[tuple[str, Path | bytes]],
+) -> Iterator[tuple[str, str, bool, Path | bytes]]:
+    for filename, source in files:
+        parsed = parse_log_filename(filename)
+        if parsed is None:
+            continue
+
+        log_id, is_gzip = parsed
+        try:
+            parse_id("00:00", log_id)
+        except ValueError as e:
+            tqdm.write(f"{filename}: {e}")
+            continue
+
+        yield (filename, log_id, is_gzip, source)
+
+
+def store_log_entries(
+    cursor: sqlite3.Cursor,
+    entries: list[tuple[db.LogEntry, bytes]],
+) -> int:
+    num_logs = db.upsert_log_contents(cursor, [entry for entry, _ in entries])
+    # Entries that already had a content keep it, and its hash.
+    db.upsert_stored_log_hashes(
+        cursor,
+        [(entry.id, entry.log, log_hash) for entry, log_hash in entries],
+    )
+    return num_logs
+
+
+def ingest(db_path: str | Path, source_path: Path, *, jobs: int = 1) -> int:
+    validate_source(source_path)
+    validate_jobs(jobs)
+
+    if source_path.is_dir():
+        files = iter_directory_files(source_path)
+    else:
+        files = iter_tar_files(source_path)
+
+    num_logs = 0
+    with closing(db.open_db(db_path)) as conn, conn:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+
+        pending: list[tuple[db.LogEntry, bytes]] = []
+        results = imap_batched(
+            load_log_entry,
+            iter_load_args(files),
+            jobs=jobs,
+        )
+        for result in tqdm(results):
+            if result is None:
+                continue
+
+            pending.append(result)
+            if len(pending) >= INGEST_BATCH_SIZE:
+                num_logs += store_log_entries(cursor, pending)
+                pending.clear()
+                conn.commit()
+
+        if pending:
+            num_logs += store_log_entries(cursor, pending)
+
+    return num_logs
@@ -4,7 +4,10 @@
 
 import gzip
 import re
-from typing import IO
+import zlib
+from collections.abc import Iterable, Iterator
+from functools import partial
+from typing import IO, Protocol
 
 from tqdm import tqdm
 
@@ -12,20 +15,30 @@ from houou_logs.db import LogEntry
 
 HOUOU_ARCHIVE_PREFIX = "scc"
 
-LINE_PATTERN = re.compile(r'^(\d{2}:\d{2}).*?log=([^">]+)', re.MULTILINE)
 LOG_ID_PATTERN = re.compile(
     r"^\d{10}gm-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{8}$",
 )
 
+# Matches a line and validates its log ID in one pass. Group 'id' is
+# set for valid IDs and group 'invalid' for anything else after 'log='.
+LINE_BYTES_PATTERN = re.compile(
+    rb"^(?P<time>\d{2}:\d{2}).*?log="
+    rb"(?:(?P<id>\d{10}gm-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{8})"
+    rb'(?![^">])|(?P<invalid>[^">]+))',
+    re.MULTILINE,
+)
+READ_CHUNK_SIZE = 64 * 1024
+GZIP_LOG_SUFFIX = ".html.gz"
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
 TYPE_IS_HANCHAN = 0x008
 TYPE_IS_3_PLAYERS = 0x010
 
 
-def extract_ids(text: str) -> list[tuple[str, str]]:
-    matches = LINE_PATTERN.findall(text)
-    if not matches:
-        return []
-    return matches
+class Readable(Protocol):
+    # Both IO[bytes] and GzipFile, which is not an IO[bytes] in the type
+    # stubs.
+    def read(self, size: int, /) -> bytes: ...
 
 
 def parse_date(time: str, log_date: str) -> str:
@@ -64,19 +77,98 @@ def parse_id(time: str, log_id: str) -> LogEntry:
     )
 
 
-def extract_log_entries(filename: str, fileobj: IO[bytes]) -> list[LogEntry]:
-    if filename.endswith(".html.gz"):
+def iter_line_blocks(fileobj: Readable) -> Iterator[bytes]:
+    yield from iter_line_blocks_from_chunks(
+        iter(partial(fileobj.read, READ_CHUNK_SIZE), b""),
+    )
+
+
+def iter_line_blocks_from_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    # Yields blocks of complete lines, so that a line never spans two
+    # blocks.
+    rest = b""
+    for chunk in chunks:
+        block = rest + chunk
+        end = block.rfind(b"\n") + 1
+        rest = block[end:]
+        if end:
+            yield block[:end]
+    if rest:
+        yield rest
+
+
+def iter_log_entries_from_blocks(
+    filename: str,
+    blocks: Iterator[bytes],
+) -> Iterator[LogEntry]:
+    for block in blocks:
+        for match in LINE_BYTES_PATTERN.finditer(block):
+            log_id = match["id"]
+            if log_id is None:
+                invalid = match["invalid"].decode("utf-8", "replace")
+                tqdm.write(f"{filename}: invalid log ID: {invalid}")
+                continue
+
+            log_id = log_id.decode("ascii")
+            time = match["time"].decode("ascii")
+            num_players, is_tonpu = parse_type(log_id[13:17])
+            yield LogEntry(
+                log_id,
+                parse_date(time, log_id[0:8]),
+                num_players,
+                is_tonpu,
+                False,  # noqa: FBT003
+                False,  # noqa: FBT003
+                None,
+            )
+
+
+def iter_log_entries(
+    filename: str,
+    fileobj: IO[bytes],
+) -> Iterator[LogEntry]:
+    if filename.endswith(GZIP_LOG_SUFFIX):
         # Logs from 2013 onwards are compressed
-        with gzip.open(fileobj, mode="rt", encoding="utf-8") as gz:
-            text = gz.read()
+        with gzip.GzipFile(fileobj=fileobj) as gz:
+            yield from iter_log_entries_from_blocks(
+                filename,
+                iter_line_blocks(gz),
+            )
     else:
-        text = fileobj.read().decode("utf-8")
-
-    ids = extract_ids(text)
-    entries = []
-    for time, log_id in ids:
-        try:
-            entries.append(parse_id(time, log_id))
-        except ValueError as e:
-            tqdm.write(f"{filename}: {e}")
-    return entries
+        yield from iter_log_entries_from_blocks(
+            filename,
+            iter_line_blocks(fileobj),
+        )
+
+
+def iter_gzip_decompressed(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    # Decompresses a gzip stream chunk by chunk. Like GzipFile, it reads
+    # concatenated members and fails on a truncated stream.
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+    is_empty = True
+    for chunk in chunks:
+        data = chunk
+        while data:
+            is_empty = False
+            if decompressor.eof:
+                decompressor = zlib.decompressobj(GZIP_WBITS)
+            if decompressed := decompressor.decompress(data):
+                yield decompressed
+            data = decompressor.unused_data
+
+    if not is_empty and not decompressor.eof:
+        msg = "compressed file ended before the end of the gzip stream"
+        raise EOFError(msg)
+
+
+def iter_log_entries_from_chunks(
+    filename: str,
+    chunks: Iterable[bytes],
+) -> Iterator[LogEntry]:
+    # Parses a file as its bytes arrive, e.g. from an HTTP response.
+    if filename.endswith(GZIP_LOG_SUFFIX):
+        chunks = iter_gzip_decompressed(chunks)
+    yield from iter_log_entries_from_blocks(
+        filename,
+        iter_line_blocks_from_chunks(chunks),
+    )
@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+from tqdm import tqdm
+
+from houou_logs import db
+from houou_logs.download import validate_db_path
+from houou_logs.exceptions import UserInputError
+
+MERGE_SCHEMA = "source"
+
+SPLIT_BY_YEAR = "year"
+SPLIT_BY_MONTH = "month"
+SPLIT_PERIODS = (SPLIT_BY_YEAR, SPLIT_BY_MONTH)
+
+# Log IDs start with 'YYYYMMDDHH'.
+YEAR_PREFIX_LENGTH = 4
+MONTH_PREFIX_LENGTH = 6
+MONTHS_PER_YEAR = 12
+
+
+def validate_source_paths(dst_path: Path, src_paths: list[Path]) -> None:
+    for src_path in src_paths:
+        validate_db_path(src_path)
+        if src_path.resolve() == dst_path.resolve():
+            msg = f"cannot merge a DB into itself: {src_path}"
+            raise UserInputError(msg)
+
+
+def validate_split_period(by: str) -> None:
+    if by not in SPLIT_PERIODS:
+        msg = f"invalid split period: {by}"
+        raise UserInputError(msg)
+
+
+def copy_range_from(
+    cursor: sqlite3.Cursor,
+    schema: str,
+    id_range: tuple[str, str] | None = None,
+) -> int:
+    # Copies the entries of the attached DB without its fetch metadata.
+    db.merge_log_hashes_from(cursor, schema, id_range)
+    num_logs = db.merge_logs_from(cursor, schema, id_range)
+    db.merge_log_indexes_from(cursor, schema, id_range)
+    db.merge_download_errors_from(cursor, schema, id_range)
+    return num_logs
+
+
+def copy_from_attached(
+    conn: sqlite3.Connection,
+    src_path: Path,
+    id_range: tuple[str, str] | None = None,
+) -> int:
+    cursor = conn.cursor()
+    with db.attach_db(conn, src_path, MERGE_SCHEMA):
+        num_logs = copy_range_from(cursor, MERGE_SCHEMA, id_range)
+        db.merge_fetch_metadata_from(cursor, MERGE_SCHEMA)
+    return num_logs
+
+
+def merge(dst_path: Path, src_paths: list[Path]) -> int:
+    validate_source_paths(dst_path, src_paths)
+
+    num_logs = 0
+    with closing(db.open_db(dst_path)) as conn, conn:
+        db.setup_table(conn)
+
+        # The status filter index is built once after all rows are in.
+        db.drop_logs_status_filter_index(conn)
+        for src_path in tqdm(src_paths):
+            num_logs += copy_from_attached(conn, src_path)
+        db.create_logs_status_filter_index(conn)
+
+    return num_logs
+
+
+def get_id_range(prefix: str) -> tuple[str, str]:
+    # Returns [start, end) of the IDs in the year or month of 'prefix'.
+    year = int(prefix[:YEAR_PREFIX_LENGTH])
+    if len(prefix) == YEAR_PREFIX_LENGTH:
+        return (prefix, f"{year + 1:04d}")
+
+    month = int(prefix[YEAR_PREFIX_LENGTH:])
+    if month == MONTHS_PER_YEAR:
+        return (prefix, f"{year + 1:04d}01")
+    return (prefix, f"{year:04d}{month + 1:02d}")
+
+
+def format_period(prefix: str) -> str:
+    if len(prefix) == YEAR_PREFIX_LENGTH:
+        return prefix
+    return f"{prefix[:YEAR_PREFIX_LENGTH]}-{prefix[YEAR_PREFIX_LENGTH:]}"
+
+
+def build_split_path(src_path: Path, output_dir: Path, prefix: str) -> Path:
+    name = f"{src_path.stem}-{format_period(prefix)}{src_path.suffix}"
+    return output_dir / name
+
+
+def split(
+    src_path: Path,
+    by: str,
+    output_dir: Path | None = None,
+) -> list[tuple[Path, int]]:
+    # Writes the entries of each year or month to a new DB next to
+    # 'src_path' or in 'output_dir'. The fetch metadata is copied to
+    # every output.
+    validate_db_path(src_path)
+    validate_split_period(by)
+    if output_dir is None:
+        output_dir = src_path.parent
+
+    prefix_length = (
+        YEAR_PREFIX_LENGTH if by == SPLIT_BY_YEAR else MONTH_PREFIX_LENGTH
+    )
+    with closing(db.open_db(src_path)) as conn:
+        prefixes = db.list_log_id_prefixes(conn.cursor(), prefix_length)
+
+    dst_paths = [
+        build_split_path(src_path, output_dir, prefix) for prefix in prefixes
+    ]
+    for dst_path in dst_paths:
+        if dst_path.exists():
+            msg = f"output file already exists: {dst_path}"
+            raise UserInputError(msg)
+
+    results: list[tuple[Path, int]] = []
+    for prefix, dst_path in zip(tqdm(prefixes), dst_paths, strict=True):
+        with closing(db.open_db(dst_path)) as conn, conn:
+            db.setup_table(conn)
+            db.drop_logs_status_filter_index(conn)
+            num_logs = copy_from_attached(
+                conn,
+                src_path,
+                get_id_range(prefix),
+            )
+            db.create_logs_status_filter_index(conn)
+        results.append((dst_path, num_logs))
+
+    return results
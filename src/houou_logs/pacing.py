@@ -0,0 +1,99 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import time
+
+import niquests
+
+from houou_logs.exceptions import HTTPStatusError, UserInputError
+
+# Request rates are in requests per second.
+DEFAULT_MIN_RATE = 0.2
+DEFAULT_MAX_RATE = 5.0
+DEFAULT_INITIAL_RATE = 1.0
+
+# The rate grows by RATE_INCREASE_STEP after each healthy response and
+# is multiplied by RATE_DECREASE_FACTOR after a slow or failed one.
+RATE_INCREASE_STEP = 0.05
+RATE_DECREASE_FACTOR = 0.5
+SLOW_RESPONSE_TIME = 2.0  # seconds
+
+# The bucket holds at most one token, so requests are never sent in a
+# burst after an idle period.
+BUCKET_CAPACITY = 1.0
+
+TOO_MANY_REQUESTS = 429
+SERVER_ERROR = 500
+
+
+def validate_rates(min_rate: float, max_rate: float) -> None:
+    if min_rate <= 0:
+        msg = f"invalid min rate: {min_rate}"
+        raise UserInputError(msg)
+    if max_rate < min_rate:
+        msg = f"max rate must not be less than min rate: {max_rate}"
+        raise UserInputError(msg)
+
+
+def is_congestion_error(e: Exception) -> bool:
+    # Timeouts, dropped connections, 429 and 5xx mean the server is
+    # under pressure. Other errors say nothing about the load.
+    if isinstance(e, HTTPStatusError):
+        return (
+            e.status_code == TOO_MANY_REQUESTS or e.status_code >= SERVER_ERROR
+        )
+    return isinstance(
+        e,
+        niquests.exceptions.Timeout | niquests.exceptions.ConnectionError,
+    )
+
+
+class Pacer:
+    # Token bucket whose refill rate is adjusted by AIMD (additive
+    # increase, multiplicative decrease) from the outcome of each
+    # request. Requests are sequential, so only one is ever in flight.
+    __slots__ = (
+        "last_time",
+        "max_rate",
+        "min_rate",
+        "rate",
+        "sent_time",
+        "tokens",
+    )
+
+    def __init__(
+        self,
+        min_rate: float = DEFAULT_MIN_RATE,
+        max_rate: float = DEFAULT_MAX_RATE,
+    ) -> None:
+        validate_rates(min_rate, max_rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(DEFAULT_INITIAL_RATE, min_rate), max_rate)
+        self.tokens = BUCKET_CAPACITY
+        self.last_time = time.monotonic()
+        self.sent_time = self.last_time
+
+    def wait(self) -> None:
+        # Blocks until a token is available and takes it.
+        now = time.monotonic()
+        elapsed = now - self.last_time
+        self.tokens = min(BUCKET_CAPACITY, self.tokens + elapsed * self.rate)
+        if self.tokens < 1.0:
+            delay = (1.0 - self.tokens) / self.rate
+            time.sleep(delay)
+            now += delay
+            self.tokens = 1.0
+
+        self.tokens -= 1.0
+        self.last_time = now
+        self.sent_time = now
+
+    def record(self, *, congested: bool) -> None:
+        # Adjusts the rate from the request sent by the last wait().
+        response_time = time.monotonic() - self.sent_time
+        if congested or response_time > SLOW_RESPONSE_TIME:
+            self.rate = max(self.min_rate, self.rate * RATE_DECREASE_FACTOR)
+        else:
+            self.rate = min(self.max_rate, self.rate + RATE_INCREASE_STEP)
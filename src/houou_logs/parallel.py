@@ -0,0 +1,117 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import multiprocessing
+import os
+import queue
+import threading
+from collections import deque
+from collections.abc import Callable, Generator, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from itertools import batched
+from typing import Any
+
+from houou_logs.exceptions import UserInputError
+
+DEFAULT_BATCH_SIZE = 64
+MAX_PENDING_BATCHES_PER_JOB = 2
+PREFETCH_POLL_INTERVAL = 0.1  # seconds
+WORKER_START_METHOD = "spawn"
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+def validate_jobs(jobs: int) -> None:
+    if jobs <= 0:
+        msg = f"invalid number of jobs: {jobs}"
+        raise UserInputError(msg)
+
+
+def run_batch[T](
+    func: Callable[..., T],
+    batch: tuple[tuple[Any, ...], ...],
+) -> list[T]:
+    return [func(*args) for args in batch]
+
+
+def imap_batched[T](
+    func: Callable[..., T],
+    iterable: Iterable[tuple[Any, ...]],
+    *,
+    jobs: int,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[T]:
+    # Like Executor.map, but results keep the input order and only a
+    # bounded number of batches are in flight, so iterating a whole DB
+    # does not load every blob into memory.
+    if jobs == 1:
+        for args in iterable:
+            yield func(*args)
+        return
+
+    max_pending = jobs * MAX_PENDING_BATCHES_PER_JOB
+    # Forking a process that already runs threads, such as the monitor
+    # thread of tqdm, can deadlock, so workers are spawned instead.
+    mp_context = multiprocessing.get_context(WORKER_START_METHOD)
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=mp_context,
+    ) as executor:
+        run: Callable[[tuple[tuple[Any, ...], ...]], list[T]] = partial(
+            run_batch,
+            func,
+        )
+        pending: deque[Future[list[T]]] = deque()
+        for batch in batched(iterable, batch_size):
+            pending.append(executor.submit(run, batch))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+
+
+def prefetch[T](iterable: Iterable[T], *, max_pending: int) -> Generator[T]:
+    # Iterates 'iterable' in a background thread, at most 'max_pending'
+    # items ahead of the caller, so that I/O in the iterator overlaps
+    # with the work on earlier items. Exceptions raised by the iterator
+    # are re-raised in the caller.
+    items: queue.Queue[tuple[bool, Any]] = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+
+    def put(message: tuple[bool, Any]) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(message, timeout=PREFETCH_POLL_INTERVAL)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not put((True, item)):
+                    return
+        except BaseException as e:  # noqa: BLE001
+            put((False, e))
+            return
+        put((False, None))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            is_item, value = items.get()
+            if not is_item:
+                if value is not None:
+                    raise value
+                return
+            yield value
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,245 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+from array import array
+from collections.abc import Callable, Iterator
+from contextlib import closing
+from pathlib import Path
+
+from houou_logs import db
+from houou_logs.download import (
+    validate_db_path,
+    validate_length,
+    validate_limit,
+    validate_players,
+)
+from houou_logs.events import (
+    Agari,
+    Discard,
+    Dora,
+    Draw,
+    Event,
+    Init,
+    Meld,
+    MeldKind,
+    Reach,
+    Ryuukyoku,
+    iter_log_events,
+)
+from houou_logs.export import validate_offset
+from houou_logs.parallel import imap_batched, validate_jobs
+
+NUM_SEATS = 4
+NUM_TILE_KINDS = 34
+MAX_POND_SIZE = 32
+MAX_MELDS = 8  # up to 4 melds plus 4 nuki in three-player games
+MAX_DORA_INDICATORS = 5
+RIICHI_DEPOSIT = 10  # in units of 100 points
+
+RIICHI_NONE = 0
+RIICHI_DECLARED = 1
+RIICHI_ACCEPTED = 2
+
+type EventCallback = Callable[[GameState, Event], None]
+
+
+class GameState:
+    # Per-seat state lives in flat preallocated arrays indexed by
+    # seat * width + i, so replaying does not allocate per event.
+    __slots__ = (
+        "dora_indicators",
+        "hands",
+        "honba",
+        "melds",
+        "num_dora_indicators",
+        "num_melds",
+        "oya",
+        "pond_sizes",
+        "ponds",
+        "riichi",
+        "riichi_sticks",
+        "round",
+        "scores",
+    )
+
+    def __init__(self) -> None:
+        self.round = 0
+        self.honba = 0
+        self.riichi_sticks = 0
+        self.oya = 0
+        self.hands = array("B", bytes(NUM_SEATS * NUM_TILE_KINDS))
+        self.ponds = array("B", bytes(NUM_SEATS * MAX_POND_SIZE))
+        self.pond_sizes = array("B", bytes(NUM_SEATS))
+        self.melds = array("i", bytes(4 * NUM_SEATS * MAX_MELDS))
+        self.num_melds = array("B", bytes(NUM_SEATS))
+        self.scores = array("i", bytes(4 * NUM_SEATS))  # 100 points
+        self.riichi = array("B", bytes(NUM_SEATS))
+        self.dora_indicators = array("B", bytes(MAX_DORA_INDICATORS))
+        self.num_dora_indicators = 0
+
+    def copy(self) -> "GameState":
+        state = GameState()
+        state.round = self.round
+        state.honba = self.honba
+        state.riichi_sticks = self.riichi_sticks
+        state.oya = self.oya
+        state.hands[:] = self.hands
+        state.ponds[:] = self.ponds
+        state.pond_sizes[:] = self.pond_sizes
+        state.melds[:] = self.melds
+        state.num_melds[:] = self.num_melds
+        state.scores[:] = self.scores
+        state.riichi[:] = self.riichi
+        state.dora_indicators[:] = self.dora_indicators
+        state.num_dora_indicators = self.num_dora_indicators
+        return state
+
+    def hand(self, who: int) -> array:
+        start = who * NUM_TILE_KINDS
+        return self.hands[start : start + NUM_TILE_KINDS]
+
+    def pond(self, who: int) -> array:
+        start = who * MAX_POND_SIZE
+        return self.ponds[start : start + self.pond_sizes[who]]
+
+    def meld_codes(self, who: int) -> array:
+        start = who * MAX_MELDS
+        return self.melds[start : start + self.num_melds[who]]
+
+    def apply(self, event: Event) -> None:
+        match event:
+            case Draw(who, tile):
+                self.hands[who * NUM_TILE_KINDS + tile // 4] += 1
+            case Discard(who, tile):
+                self.hands[who * NUM_TILE_KINDS + tile // 4] -= 1
+                self.ponds[who * MAX_POND_SIZE + self.pond_sizes[who]] = tile
+                self.pond_sizes[who] += 1
+            case Meld():
+                self.apply_meld(event)
+            case Reach(who, step, ten):
+                self.apply_reach(who, step, ten)
+            case Dora(tile):
+                self.dora_indicators[self.num_dora_indicators] = tile
+                self.num_dora_indicators += 1
+            case Agari(sc=sc):
+                self.apply_score_changes(sc)
+                self.riichi_sticks = 0
+            case Ryuukyoku(sc=sc):
+                self.apply_score_changes(sc)
+            case Init():
+                self.start_round(event)
+
+    def start_round(self, init: Init) -> None:
+        self.round = init.round
+        self.honba = init.honba
+        self.riichi_sticks = init.riichi
+        self.oya = init.oya
+
+        self.hands[:] = array("B", bytes(len(self.hands)))
+        for who, hand in enumerate(init.hands):
+            offset = who * NUM_TILE_KINDS
+            for tile in hand:
+                self.hands[offset + tile // 4] += 1
+
+        self.pond_sizes[:] = array("B", bytes(NUM_SEATS))
+        self.num_melds[:] = array("B", bytes(NUM_SEATS))
+        self.riichi[:] = array("B", bytes(NUM_SEATS))
+        for who, ten in enumerate(init.ten):
+            self.scores[who] = ten
+
+        self.dora_indicators[0] = init.dora_indicator
+        self.num_dora_indicators = 1
+
+    def apply_meld(self, meld: Meld) -> None:
+        match meld.kind:
+            case MeldKind.KAKAN:
+                removed: tuple[int, ...] = meld.tiles[-1:]
+            case MeldKind.ANKAN | MeldKind.NUKI:
+                removed = meld.tiles
+            case _:
+                removed = tuple(t for t in meld.tiles if t != meld.called)
+
+        offset = meld.who * NUM_TILE_KINDS
+        for tile in removed:
+            self.hands[offset + tile // 4] -= 1
+
+        self.melds[meld.who * MAX_MELDS + self.num_melds[meld.who]] = meld.code
+        self.num_melds[meld.who] += 1
+
+    def apply_reach(self, who: int, step: int, ten: tuple[int, ...]) -> None:
+        if step == RIICHI_DECLARED:
+            self.riichi[who] = RIICHI_DECLARED
+            return
+
+        self.riichi[who] = RIICHI_ACCEPTED
+        self.riichi_sticks += 1
+        if ten:
+            for seat, score in enumerate(ten):
+                self.scores[seat] = score
+        else:
+            self.scores[who] -= RIICHI_DEPOSIT
+
+    def apply_score_changes(self, sc: tuple[int, ...]) -> None:
+        for who in range(len(sc) // 2):
+            self.scores[who] += sc[2 * who + 1]
+
+
+def replay_log(
+    compressed_content: bytes,
+    callback: EventCallback | None = None,
+) -> GameState:
+    state = GameState()
+    for event in iter_log_events(compressed_content):
+        state.apply(event)
+        if callback is not None:
+            callback(state, event)
+    return state
+
+
+def iter_replay_results[T](
+    db_path: Path,
+    func: Callable[[str, bytes], T],
+    players: int | None,
+    length: str | None,
+    limit: int | None,
+    offset: int,
+    *,
+    jobs: int,
+) -> Iterator[tuple[str, T]]:
+    # 'func' runs in worker processes, so it must be a module-level
+    # function. It typically calls replay_log with its own callback.
+    validate_db_path(db_path)
+    if players is not None:
+        validate_players(players)
+    if length is not None:
+        validate_length(length)
+    if limit is not None:
+        validate_limit(limit)
+    validate_offset(offset)
+    validate_jobs(jobs)
+
+    with closing(db.open_db(db_path)) as conn:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+        logs_iter = db.iter_log_contents(
+            cursor,
+            players,
+            length,
+            limit,
+            offset,
+            prefer_binary=True,
+        )
+        yield from imap_batched(
+            replay_with_id,
+            ((func, log_id, blob) for log_id, blob in logs_iter),
+            jobs=jobs,
+        )
+
+
+def replay_with_id[T](
+    func: Callable[[str, bytes], T],
+    log_id: str,
+    compressed_content: bytes,
+) -> tuple[str, T]:
+    return (log_id, func(log_id, compressed_content))
@@ -0,0 +1,131 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import sqlite3
+import sys
+from array import array
+from typing import Any
+from xml.parsers import expat
+
+from houou_logs import db
+from houou_logs.storage import decompress_log_content
+
+OFFSET_TYPECODE = "I"
+ROUND_CONTENT_TAG_DEPTH = 2
+
+
+def build_round_offsets(content: bytes) -> list[int]:
+    # Returns the byte offset of every <INIT> followed by the end offset
+    # of the element that carries 'owari', so that round k is
+    # content[offsets[k]:offsets[k + 1]].
+    parser = expat.ParserCreate()
+    offsets: list[int] = []
+    end_offset: int | None = None
+    game_ended = False
+    depth = 0
+
+    def start_element(name: str, attrs: dict[str, Any]) -> None:
+        nonlocal depth, end_offset, game_ended
+        depth += 1
+        if depth != ROUND_CONTENT_TAG_DEPTH or end_offset is not None:
+            return
+
+        if game_ended:
+            # Trailing UN/BYE tags are not part of any round.
+            end_offset = parser.CurrentByteIndex
+        elif name == "INIT":
+            offsets.append(parser.CurrentByteIndex)
+        elif name in ("AGARI", "RYUUKYOKU") and "owari" in attrs:
+            game_ended = True
+
+    def end_element(_name: str) -> None:
+        nonlocal depth, end_offset
+        if depth == 1 and game_ended and end_offset is None:
+            end_offset = parser.CurrentByteIndex
+        depth -= 1
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.Parse(content, True)  # noqa: FBT003
+
+    if not game_ended or end_offset is None:
+        msg = "log ended without 'owari' attribute"
+        raise ValueError(msg)
+
+    offsets.append(end_offset)
+    return offsets
+
+
+def pack_round_offsets(offsets: list[int]) -> bytes:
+    packed = array(OFFSET_TYPECODE, offsets)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_round_offsets(data: bytes) -> array:
+    offsets = array(OFFSET_TYPECODE)
+    offsets.frombytes(data)
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    return offsets
+
+
+def index_game_rounds(
+    cursor: sqlite3.Cursor,
+    log_id: str,
+    content: bytes,
+) -> None:
+    offsets = build_round_offsets(content)
+    db.upsert_round_index(
+        cursor,
+        log_id,
+        len(content),
+        len(offsets) - 1,
+        pack_round_offsets(offsets),
+    )
+
+
+def slice_game_round(content: bytes, offsets: array, round_index: int) -> str:
+    if not (0 <= round_index < len(offsets) - 1):
+        msg = f"round index out of range: {round_index}"
+        raise IndexError(msg)
+
+    start = offsets[round_index]
+    end = offsets[round_index + 1]
+    return content[start:end].decode("utf-8").strip()
+
+
+def count_game_rounds(cursor: sqlite3.Cursor, log_id: str) -> int:
+    row = db.get_round_index(cursor, log_id)
+    if row is None:
+        msg = f"round index not found: {log_id}"
+        raise RuntimeError(msg)
+
+    return row[1]
+
+
+def get_game_round(
+    cursor: sqlite3.Cursor,
+    log_id: str,
+    round_index: int,
+) -> str:
+    row = db.get_round_index(cursor, log_id)
+    if row is None:
+        msg = f"round index not found: {log_id}"
+        raise RuntimeError(msg)
+
+    size, _, packed_offsets = row
+    compressed_content = db.get_log_content(cursor, log_id)
+    if compressed_content is None:
+        msg = f"log content not found: {log_id}"
+        raise RuntimeError(msg)
+
+    content = decompress_log_content(compressed_content)
+    if len(content) != size:
+        msg = f"round index is stale: {log_id}"
+        raise RuntimeError(msg)
+
+    offsets = unpack_round_offsets(packed_offsets)
+    return slice_game_round(content, offsets, round_index)
@@ -2,19 +2,205 @@
 # SPDX-License-Identifier: MIT
 # This file is part of https://github.com/Apricot-S/houou-logs
 
+import math
+import time
+from collections import deque
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any
+from weakref import WeakKeyDictionary
+
 import niquests
+from niquests.models import ReadTimeoutError
+
+from houou_logs.exceptions import UserInputError
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/148.0.0.0 Safari/537.36 Edg/148.0.0.0",  # noqa: E501
 }
 
+# Used until enough responses of an endpoint have been seen.
 TIMEOUT = (
     5.0,  # connect timeout
     5.0,  # read timeout
 )
+DEFAULT_MIN_TIMEOUT = 1.0  # seconds
+DEFAULT_MAX_TIMEOUT = 30.0  # seconds
+# Read timeouts never go below the former fixed read timeout, so that
+# a fast endpoint does not make a large response time out.
+MIN_READ_TIMEOUT = TIMEOUT[1]
+
+# The connect timeout is TIMEOUT_MULTIPLIER times the TIMEOUT_PERCENTILE
+# of the times to the response headers of the last TIMEOUT_WINDOW
+# requests to the endpoint, and the read timeout that of the times to
+# the end of the response body.
+TIMEOUT_WINDOW = 200
+MIN_TIMEOUT_SAMPLES = 20
+TIMEOUT_PERCENTILE = 0.99
+TIMEOUT_MULTIPLIER = 3.0
+
+ENDPOINT_FILE_INDEX = "list.cgi"
+ENDPOINT_LOG_FILE = "dat"
+ENDPOINT_YAKUMAN = "ykm.js"
+ENDPOINT_LOG = "log"
+ENDPOINTS = (
+    ENDPOINT_FILE_INDEX,
+    ENDPOINT_LOG_FILE,
+    ENDPOINT_YAKUMAN,
+    ENDPOINT_LOG,
+)
+
+
+def validate_timeouts(min_timeout: float, max_timeout: float) -> None:
+    if min_timeout <= 0:
+        msg = f"invalid min timeout: {min_timeout}"
+        raise UserInputError(msg)
+    if max_timeout < min_timeout:
+        msg = f"max timeout must not be less than min timeout: {max_timeout}"
+        raise UserInputError(msg)
+
+
+class AdaptiveTimeout:
+    __slots__ = ("latencies", "max_timeout", "min_timeout", "response_times")
+
+    def __init__(
+        self,
+        min_timeout: float = DEFAULT_MIN_TIMEOUT,
+        max_timeout: float = DEFAULT_MAX_TIMEOUT,
+    ) -> None:
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.latencies: deque[float] = deque(maxlen=TIMEOUT_WINDOW)
+        self.response_times: deque[float] = deque(maxlen=TIMEOUT_WINDOW)
+
+    def compute(
+        self,
+        samples: deque[float],
+        default: float,
+        min_timeout: float,
+    ) -> float:
+        if len(samples) < MIN_TIMEOUT_SAMPLES:
+            timeout = default
+        else:
+            # Nearest-rank percentile.
+            sorted_samples = sorted(samples)
+            index = math.ceil(len(sorted_samples) * TIMEOUT_PERCENTILE) - 1
+            timeout = sorted_samples[index] * TIMEOUT_MULTIPLIER
+        return min(max(timeout, min_timeout), self.max_timeout)
+
+    def get(self) -> tuple[float, float]:
+        return (
+            self.compute(self.latencies, TIMEOUT[0], self.min_timeout),
+            self.compute(
+                self.response_times,
+                TIMEOUT[1],
+                max(self.min_timeout, MIN_READ_TIMEOUT),
+            ),
+        )
+
+    def record(self, latency: float, response_time: float | None) -> None:
+        # 'response_time' is None if the body was not read to the end.
+        self.latencies.append(latency)
+        if response_time is not None:
+            self.response_times.append(response_time)
+
+
+# Timeouts adapt over the lifetime of a session, per endpoint.
+session_timeouts: WeakKeyDictionary[
+    niquests.Session,
+    dict[str, AdaptiveTimeout],
+] = WeakKeyDictionary()
+
+
+def get_adaptive_timeout(
+    session: niquests.Session,
+    endpoint: str,
+) -> AdaptiveTimeout:
+    timeouts = session_timeouts.setdefault(session, {})
+    return timeouts.setdefault(endpoint, AdaptiveTimeout())
+
+
+def is_timeout_error(e: Exception) -> bool:
+    # A read timeout while streaming the body is raised by niquests as a
+    # ConnectionError that wraps the ReadTimeoutError of urllib3. The
+    # class is imported from niquests, since niquests may use its own
+    # copy of urllib3.
+    if isinstance(e, niquests.exceptions.Timeout):
+        return True
+    return isinstance(e, niquests.exceptions.ConnectionError) and any(
+        isinstance(arg, ReadTimeoutError) for arg in e.args
+    )
+
+
+def timed_get(
+    session: niquests.Session,
+    endpoint: str,
+    url: str,
+    **kwargs: Any,  # noqa: ANN401
+) -> niquests.Response:
+    # Sends a GET that is not streamed with the current timeouts of
+    # 'endpoint' and records how long the server took to answer. A
+    # request that times out counts as taking the whole timeout, so
+    # timeouts grow on a slow link. Streamed requests use
+    # timed_request instead.
+    adaptive_timeout = get_adaptive_timeout(session, endpoint)
+    timeout = adaptive_timeout.get()
+    start = time.monotonic()
+    try:
+        res = session.get(url, timeout=timeout, **kwargs)
+    except niquests.exceptions.Timeout:
+        adaptive_timeout.record(max(timeout), max(timeout))
+        raise
+
+    response_time = time.monotonic() - start
+    adaptive_timeout.record(response_time, response_time)
+    return res
+
+
+@contextmanager
+def timed_request(
+    session: niquests.Session,
+    endpoint: str,
+    url: str,
+    **kwargs: Any,  # noqa: ANN401
+) -> Generator[niquests.Response]:
+    # Sends a streamed GET with the current timeouts of 'endpoint'. The
+    # body is read inside the block, so the recorded response time and
+    # any timeout while reading it include the whole transfer. The
+    # response is closed when the block exits.
+    adaptive_timeout = get_adaptive_timeout(session, endpoint)
+    timeout = adaptive_timeout.get()
+    start = time.monotonic()
+    try:
+        res = session.get(url, timeout=timeout, stream=True, **kwargs)
+    except niquests.exceptions.Timeout:
+        adaptive_timeout.record(max(timeout), max(timeout))
+        raise
+
+    latency = time.monotonic() - start
+    response_time = None
+    try:
+        yield res
+        response_time = time.monotonic() - start
+    except Exception as e:
+        response_time = time.monotonic() - start
+        if is_timeout_error(e):
+            response_time = max(response_time, *timeout)
+        raise
+    finally:
+        res.close()
+        adaptive_timeout.record(latency, response_time)
 
 
-def create_session() -> niquests.Session:
+def create_session(
+    min_timeout: float = DEFAULT_MIN_TIMEOUT,
+    max_timeout: float = DEFAULT_MAX_TIMEOUT,
+) -> niquests.Session:
+    validate_timeouts(min_timeout, max_timeout)
     session = niquests.Session()
     session.headers.update(HEADERS)
+    session_timeouts[session] = {
+        endpoint: AdaptiveTimeout(min_timeout, max_timeout)
+        for endpoint in ENDPOINTS
+    }
     return session
@@ -0,0 +1,85 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import gzip
+import hashlib
+import io
+from collections.abc import Iterable
+
+from houou_logs.binary_log import (
+    decode_log_content,
+    encode_log_content,
+    is_binary_log,
+)
+from houou_logs.exceptions import UserInputError
+
+STORAGE_FORMAT_GZIP = "gzip"
+STORAGE_FORMAT_BINARY = "binary"
+STORAGE_FORMATS = (STORAGE_FORMAT_GZIP, STORAGE_FORMAT_BINARY)
+
+GZIP_MAGIC = b"\x1f\x8b"
+# Every mjlog document contains this, an error page does not.
+LOG_MARKER = b"mjlog"
+
+LOG_HASH_SIZE = 16
+# Stored as the hash of a content that cannot be decompressed.
+CORRUPT_LOG_HASH = b""
+
+
+def validate_storage_format(storage_format: str) -> None:
+    if storage_format not in STORAGE_FORMATS:
+        msg = f"invalid storage format: {storage_format}"
+        raise UserInputError(msg)
+
+
+def contains_log_marker(chunks: Iterable[bytes]) -> bool:
+    # Reads all of 'chunks' even after the marker is found, so that a
+    # decompressing iterator still raises on a corrupt or truncated
+    # stream.
+    has_log = False
+    tail = b""
+    for chunk in chunks:
+        if not has_log:
+            data = tail + chunk
+            has_log = LOG_MARKER in data
+            tail = data[-(len(LOG_MARKER) - 1) :]
+    return has_log
+
+
+def decompress_log_content(blob: bytes) -> bytes:
+    if is_binary_log(blob):
+        return decode_log_content(blob)
+    return gzip.decompress(blob)
+
+
+def hash_log_content(blob: bytes) -> bytes:
+    # Hashes the decompressed content, so that the same log stored in
+    # another format or with another gzip header has the same hash.
+    try:
+        content = decompress_log_content(blob)
+    except Exception:  # noqa: BLE001
+        return CORRUPT_LOG_HASH
+    return hashlib.blake2b(content, digest_size=LOG_HASH_SIZE).digest()
+
+
+def open_log_content(blob: bytes) -> io.BufferedIOBase:
+    if is_binary_log(blob):
+        return io.BytesIO(decode_log_content(blob))
+    return gzip.GzipFile(fileobj=io.BytesIO(blob))
+
+
+def convert_log_content(blob: bytes, storage_format: str) -> bytes | None:
+    # Returns None when the blob is already in the requested format.
+    if is_binary_log(blob) == (storage_format == STORAGE_FORMAT_BINARY):
+        return None
+
+    content = decompress_log_content(blob)
+    if storage_format == STORAGE_FORMAT_GZIP:
+        return gzip.compress(content)
+
+    converted = encode_log_content(content)
+    if decode_log_content(converted) != content:
+        msg = "binary encoding did not reproduce the original content"
+        raise RuntimeError(msg)
+    return converted
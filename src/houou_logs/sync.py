@@ -0,0 +1,226 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import hashlib
+import sqlite3
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import closing
+from pathlib import Path
+
+from tqdm import tqdm
+
+from houou_logs import db
+from houou_logs.download import validate_db_path
+from houou_logs.exceptions import UserInputError
+from houou_logs.merge import copy_range_from
+from houou_logs.storage import CORRUPT_LOG_HASH, hash_log_content
+
+MAIN_SCHEMA = "main"
+OTHER_SCHEMA = "other"
+
+# Ranges are compared by year, month, day and hour of the log ID. Only
+# ranges whose digests differ are split further.
+PREFIX_LENGTHS = (4, 6, 8, 10)
+DIGEST_SIZE = 16
+DIGEST_MODULUS = 1 << (8 * DIGEST_SIZE)
+HASH_BATCH_SIZE = 1000
+
+STATE_MISSING = "missing"
+STATE_UNDOWNLOADED = "undownloaded"
+STATE_ERROR = "error"
+STATE_DOWNLOADED = "downloaded"
+STATE_CORRUPT = "corrupt"
+
+# (log ID, is_processed, was_error, content hash)
+type LogState = tuple[str, int, int, bytes | None]
+
+
+def validate_other_path(db_path: Path, other_path: Path) -> None:
+    validate_db_path(db_path)
+    validate_db_path(other_path)
+    if other_path.resolve() == db_path.resolve():
+        msg = f"cannot compare a DB with itself: {other_path}"
+        raise UserInputError(msg)
+
+
+def hash_unhashed_log_contents(conn: sqlite3.Connection, schema: str) -> int:
+    # Stores the hashes of contents written without one, e.g. by older
+    # versions. This reads those contents once, later comparisons only
+    # read the hashes. Returns the number of hashed contents.
+    db.create_log_hashes_table(conn, schema)
+    cursor = conn.cursor()
+    num_logs = 0
+    while contents := db.list_unhashed_log_contents(
+        cursor,
+        schema,
+        HASH_BATCH_SIZE,
+    ):
+        db.upsert_log_hashes(
+            cursor,
+            [(log_id, hash_log_content(log)) for log_id, log in contents],
+            schema,
+        )
+        num_logs += len(contents)
+        conn.commit()
+    return num_logs
+
+
+def get_prefix_range(prefix: str) -> tuple[str, str]:
+    # Returns [start, end) of the IDs starting with 'prefix'.
+    return (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+
+def compute_range_digests(
+    cursor: sqlite3.Cursor,
+    schema: str,
+) -> dict[str, int]:
+    # Returns the digest of every year, month, day and hour prefix of
+    # the log IDs. The digest of a range is the sum of the digests of
+    # its download states and content hashes, so the rows are read once
+    # in any order, from the status filter index and the hash table.
+    digests: defaultdict[str, int] = defaultdict(int)
+
+    def add(log_id: str, data: bytes) -> None:
+        digest = hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+        value = int.from_bytes(digest)
+        for prefix_length in PREFIX_LENGTHS:
+            prefix = log_id[:prefix_length]
+            digests[prefix] = (digests[prefix] + value) % DIGEST_MODULUS
+
+    for log_id, is_processed, was_error in db.iter_log_flags(cursor, schema):
+        add(log_id, f"state,{log_id},{is_processed},{was_error}".encode())
+    for log_id, log_hash in db.iter_log_hashes(cursor, schema):
+        add(log_id, f"hash,{log_id},".encode() + log_hash)
+    return digests
+
+
+def list_different_ranges(
+    digests: dict[str, int],
+    other_digests: dict[str, int],
+) -> list[tuple[str, str]]:
+    # Descends from years to hours into the ranges whose digests differ.
+    # Returns the differing hour ranges.
+    prefixes = digests.keys() | other_digests.keys()
+    different = [""]
+    parent_length = 0
+    for prefix_length in PREFIX_LENGTHS:
+        parents = set(different)
+        different = sorted(
+            prefix
+            for prefix in prefixes
+            if len(prefix) == prefix_length
+            and prefix[:parent_length] in parents
+            and digests.get(prefix) != other_digests.get(prefix)
+        )
+        parent_length = prefix_length
+    return [get_prefix_range(prefix) for prefix in different]
+
+
+def list_attached_different_ranges(
+    conn: sqlite3.Connection,
+) -> list[tuple[str, str]]:
+    # Compares the main DB with the one attached as OTHER_SCHEMA.
+    hash_unhashed_log_contents(conn, MAIN_SCHEMA)
+    hash_unhashed_log_contents(conn, OTHER_SCHEMA)
+    cursor = conn.cursor()
+    return list_different_ranges(
+        compute_range_digests(cursor, MAIN_SCHEMA),
+        compute_range_digests(cursor, OTHER_SCHEMA),
+    )
+
+
+def describe_state(state: LogState) -> str:
+    _, is_processed, was_error, log_hash = state
+    if not is_processed:
+        return STATE_UNDOWNLOADED
+    if was_error:
+        return STATE_ERROR
+    if log_hash == CORRUPT_LOG_HASH:
+        return STATE_CORRUPT
+    return STATE_DOWNLOADED
+
+
+def compare_entries(
+    state: LogState,
+    other_state: LogState,
+) -> tuple[str, str] | None:
+    # Returns the states to report, or None if the entries are the same.
+    description = describe_state(state)
+    other_description = describe_state(other_state)
+    if description != other_description:
+        return (description, other_description)
+    if description == STATE_DOWNLOADED and state[3] != other_state[3]:
+        return (description, other_description)
+    return None
+
+
+def iter_different_entries(
+    states: Iterator[LogState],
+    other_states: Iterator[LogState],
+) -> Iterator[tuple[str, str, str]]:
+    # Walks both ID-ordered streams once, like a merge join.
+    state = next(states, None)
+    other_state = next(other_states, None)
+    while state is not None and other_state is not None:
+        if state[0] < other_state[0]:
+            yield (state[0], describe_state(state), STATE_MISSING)
+            state = next(states, None)
+        elif other_state[0] < state[0]:
+            yield (other_state[0], STATE_MISSING, describe_state(other_state))
+            other_state = next(other_states, None)
+        else:
+            different = compare_entries(state, other_state)
+            if different is not None:
+                yield (state[0], *different)
+            state = next(states, None)
+            other_state = next(other_states, None)
+
+    while state is not None:
+        yield (state[0], describe_state(state), STATE_MISSING)
+        state = next(states, None)
+    while other_state is not None:
+        yield (other_state[0], STATE_MISSING, describe_state(other_state))
+        other_state = next(other_states, None)
+
+
+def diff(db_path: Path, other_path: Path) -> list[tuple[str, str, str]]:
+    # Returns (log ID, state in 'db_path', state in 'other_path') of the
+    # entries whose download state or log content differs. Only the
+    # entries of differing hour ranges are read. Both paths must be
+    # local or mounted files, since SQLite attaches them directly.
+    validate_other_path(db_path, other_path)
+
+    with (
+        closing(db.open_db(db_path)) as conn,
+        db.attach_db(conn, other_path, OTHER_SCHEMA),
+    ):
+        id_ranges = list_attached_different_ranges(conn)
+        cursor = conn.cursor()
+        other_cursor = conn.cursor()
+        return [
+            entry
+            for id_range in id_ranges
+            for entry in iter_different_entries(
+                db.iter_log_states(cursor, MAIN_SCHEMA, id_range),
+                db.iter_log_states(other_cursor, OTHER_SCHEMA, id_range),
+            )
+        ]
+
+
+def sync(dst_path: Path, src_path: Path) -> int:
+    # Copies the entries of 'src_path' that are missing in 'dst_path' or
+    # have a content there while 'dst_path' does not. Only differing
+    # hour ranges are copied. Returns the number of copied entries.
+    validate_other_path(dst_path, src_path)
+
+    num_logs = 0
+    with closing(db.open_db(dst_path)) as conn:
+        db.setup_table(conn)
+        with db.attach_db(conn, src_path, OTHER_SCHEMA):
+            cursor = conn.cursor()
+            for id_range in tqdm(list_attached_different_ranges(conn)):
+                num_logs += copy_range_from(cursor, OTHER_SCHEMA, id_range)
+            db.merge_fetch_metadata_from(cursor, OTHER_SCHEMA)
+    return num_logs
@@ -2,7 +2,6 @@
 # SPDX-License-Identifier: MIT
 # This file is part of https://github.com/Apricot-S/houou-logs
 
-import gzip
 import sqlite3
 import xml.etree.ElementTree as ET
 from collections.abc import Iterator
@@ -13,9 +12,25 @@ from tqdm import tqdm
 
 from houou_logs import db
 from houou_logs.download import validate_db_path
+from houou_logs.events import Agari, Init, Reach, Ryuukyoku, iter_events
+from houou_logs.exceptions import UserInputError
+from houou_logs.parallel import imap_batched, validate_jobs
+from houou_logs.replay import RIICHI_ACCEPTED, RIICHI_DEPOSIT
+from houou_logs.rounds import build_round_offsets, pack_round_offsets
+from houou_logs.storage import decompress_log_content
+from houou_logs.wall import verify_walls
 
 VALIDATE_BATCH_SIZE = 1000
 
+VALIDATION_LEVEL_STRUCTURAL = "structural"
+VALIDATION_LEVEL_SEMANTIC = "semantic"
+VALIDATION_LEVEL_WALL = "wall"
+VALIDATION_LEVELS = (
+    VALIDATION_LEVEL_STRUCTURAL,
+    VALIDATION_LEVEL_SEMANTIC,
+    VALIDATION_LEVEL_WALL,
+)
+
 
 def iter_processed_log_id_batches(
     cursor: sqlite3.Cursor,
@@ -87,59 +102,231 @@ def split_log_to_game_rounds(log_content: str) -> list[list[str]]:
     return rounds
 
 
-def is_valid_log_content(
-    log_id: str,
+def check_final_scores(
+    final_scores: list[int],
+    scores: list[int],
+    riichi_sticks: int,
+) -> None:
+    # Riichi sticks left on the table at the end of the game go to the
+    # first-place player without an sc entry.
+    diffs = [
+        final - score
+        for final, score in zip(final_scores, scores, strict=True)
+    ]
+    leftover = riichi_sticks * RIICHI_DEPOSIT
+    nonzero_diffs = [diff for diff in diffs if diff != 0]
+    if not nonzero_diffs or (leftover > 0 and nonzero_diffs == [leftover]):
+        return
+
+    msg = f"owari scores {final_scores} do not match the scores after the last sc {scores}"  # noqa: E501
+    raise ValueError(msg)
+
+
+def check_score_consistency(content: bytes) -> None:
+    # Replays the 'sc' deltas of AGARI/RYUUKYOKU and checks them against
+    # the scores at the start of each round and the final 'owari'.
+    scores: list[int] | None = None
+    riichi_sticks = 0
+    game_ended = False
+
+    for event in iter_events(content):
+        match event:
+            case Init(riichi=riichi, ten=ten):
+                if scores is not None and list(ten) != scores:
+                    msg = f"INIT ten {list(ten)} does not match the previous round result {scores}"  # noqa: E501
+                    raise ValueError(msg)
+                scores = list(ten)
+                riichi_sticks = riichi
+            case Reach(who=who, step=step, ten=ten) if (
+                step == RIICHI_ACCEPTED and scores is not None
+            ):
+                scores[who] -= RIICHI_DEPOSIT
+                riichi_sticks += 1
+                if ten and list(ten) != scores:
+                    msg = f"REACH ten {list(ten)} does not match the scores after the riichi deposit {scores}"  # noqa: E501
+                    raise ValueError(msg)
+            case Agari(sc=sc, owari=owari) | Ryuukyoku(sc=sc, owari=owari):
+                if scores is None:
+                    msg = "score change before the first INIT"
+                    raise ValueError(msg)
+                if len(sc) != 2 * len(scores):
+                    msg = f"sc has {len(sc)} values for {len(scores)} seats"
+                    raise ValueError(msg)
+
+                before = list(sc[0::2])
+                if before != scores:
+                    msg = f"sc scores {before} do not match the current scores {scores}"  # noqa: E501
+                    raise ValueError(msg)
+                scores = [
+                    score + delta
+                    for score, delta in zip(before, sc[1::2], strict=True)
+                ]
+                if isinstance(event, Agari):
+                    riichi_sticks = 0
+
+                if owari is not None:
+                    final_scores = [int(score) for score in owari[0::2]]
+                    check_final_scores(final_scores, scores, riichi_sticks)
+                    game_ended = True
+            case _:
+                pass
+
+    if not game_ended:
+        msg = "log ended without 'owari' attribute"
+        raise ValueError(msg)
+
+
+def check_log_content(
     compressed_content: bytes | None,
-) -> bool:
-    content = None
+    level: str,
+    *,
+    index_rounds: bool,
+) -> tuple[str | None, str | None, tuple[int, int, bytes] | None]:
+    # Returns (error, wall error, round index). Runs in worker
+    # processes. The log is only reset for an error, not a wall error.
     try:
-        if compressed_content is not None:
-            decompressed = gzip.decompress(compressed_content)
-            content = decompressed.decode("utf-8")
+        if compressed_content is None:
+            return ("no log content", None, None)
+        decompressed = decompress_log_content(compressed_content)
+        content = decompressed.decode("utf-8")
     except Exception as e:  # noqa: BLE001
-        tqdm.write(f"{log_id}: failed to decompress: {e}")
-        return False
+        return (f"failed to decompress: {e}", None, None)
 
     if not content:
-        return False
+        return ("empty log content", None, None)
 
     try:
         parsed_rounds = split_log_to_game_rounds(content)
     except Exception as e:  # noqa: BLE001
-        tqdm.write(f"{log_id}: failed to parse: {e}")
+        return (f"failed to parse: {e}", None, None)
+
+    if not parsed_rounds:
+        return ("no game rounds", None, None)
+
+    if level in (VALIDATION_LEVEL_SEMANTIC, VALIDATION_LEVEL_WALL):
+        try:
+            check_score_consistency(decompressed)
+        except Exception as e:  # noqa: BLE001
+            return (f"inconsistent scores: {e}", None, None)
+
+    wall_error = None
+    if level == VALIDATION_LEVEL_WALL:
+        try:
+            verify_walls(decompressed)
+        except Exception as e:  # noqa: BLE001
+            wall_error = f"inconsistent wall: {e}"
+
+    if not index_rounds:
+        return (None, wall_error, None)
+
+    offsets = build_round_offsets(decompressed)
+    return (
+        None,
+        wall_error,
+        (len(decompressed), len(offsets) - 1, pack_round_offsets(offsets)),
+    )
+
+
+def check_log_content_with_id(
+    log_id: str,
+    compressed_content: bytes | None,
+    level: str,
+    index_rounds: bool,  # noqa: FBT001
+) -> tuple[str, str | None, str | None, tuple[int, int, bytes] | None]:
+    error, wall_error, round_index = check_log_content(
+        compressed_content,
+        level,
+        index_rounds=index_rounds,
+    )
+    return (log_id, error, wall_error, round_index)
+
+
+def is_valid_log_content(
+    log_id: str,
+    compressed_content: bytes | None,
+) -> bool:
+    error, _, _ = check_log_content(
+        compressed_content,
+        VALIDATION_LEVEL_STRUCTURAL,
+        index_rounds=False,
+    )
+    if error is not None:
+        tqdm.write(f"{log_id}: {error}")
         return False
+    return True
 
-    return bool(parsed_rounds)
 
+def validate_level(level: str) -> None:
+    if level not in VALIDATION_LEVELS:
+        msg = f"invalid validation level: {level}"
+        raise UserInputError(msg)
 
-def validate(db_path: Path) -> tuple[bool, int, int]:
+
+def iter_log_contents_to_check(
+    cursor: sqlite3.Cursor,
+    level: str,
+    *,
+    index_rounds: bool,
+) -> Iterator[tuple[str, bytes | None, str, bool]]:
+    for log_ids in iter_processed_log_id_batches(cursor, VALIDATE_BATCH_SIZE):
+        for log_id in log_ids:
+            compressed_content = db.get_log_content(cursor, log_id)
+            yield (log_id, compressed_content, level, index_rounds)
+
+
+def validate(
+    db_path: Path,
+    *,
+    index_rounds: bool = False,
+    level: str = VALIDATION_LEVEL_STRUCTURAL,
+    jobs: int = 1,
+) -> tuple[bool, int, int]:
     validate_db_path(db_path)
+    validate_level(level)
+    validate_jobs(jobs)
 
     with closing(db.open_db(db_path)) as conn, conn:
-        cursor = conn.cursor()
+        db.setup_table(conn)
+        read_cursor = conn.cursor()
+        write_cursor = conn.cursor()
 
-        num_ids = db.count_all_ids(cursor)
-        num_logs = db.count_all_log_contents(cursor)
+        num_ids = db.count_all_ids(read_cursor)
+        num_logs = db.count_all_log_contents(read_cursor)
         were_errors = False
         num_valid_logs = 0
 
-        with tqdm(total=num_logs) as progress:
-            for log_ids in iter_processed_log_id_batches(
-                cursor,
-                VALIDATE_BATCH_SIZE,
-            ):
-                for log_id in log_ids:
-                    compressed_content = db.get_log_content(cursor, log_id)
-                    if is_valid_log_content(log_id, compressed_content):
-                        num_valid_logs += 1
-                        progress.update(1)
-                        continue
-
-                    were_errors = True
-                    msg = "Invalid log content detected. Reset to unprocessed."
-                    tqdm.write(msg)
-                    db.reset_log_content(cursor, log_id)
-
-                    progress.update(1)
+        results = imap_batched(
+            check_log_content_with_id,
+            iter_log_contents_to_check(
+                read_cursor,
+                level,
+                index_rounds=index_rounds,
+            ),
+            jobs=jobs,
+        )
+        for log_id, error, wall_error, round_index in tqdm(
+            results,
+            total=num_logs,
+        ):
+            if error is None:
+                if round_index is not None:
+                    db.upsert_round_index(write_cursor, log_id, *round_index)
+                if wall_error is None:
+                    num_valid_logs += 1
+                    continue
+
+                # The wall reconstruction is not yet checked against a
+                # real log, so a mismatch may be a bug in it rather than
+                # in the log. The content is reported but kept.
+                were_errors = True
+                tqdm.write(f"{log_id}: {wall_error}")
+                tqdm.write("Wall mismatch detected. Log content kept.")
+                continue
+
+            were_errors = True
+            tqdm.write(f"{log_id}: {error}")
+            msg = "Invalid log content detected. Reset to unprocessed."
+            tqdm.write(msg)
+            db.reset_log_content(write_cursor, log_id)
 
     return (were_errors, num_valid_logs, num_ids)
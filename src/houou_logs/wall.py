@@ -0,0 +1,287 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import base64
+import binascii
+import hashlib
+import random
+import sys
+from array import array
+from dataclasses import dataclass
+
+from houou_logs.events import (
+    Dora,
+    Draw,
+    Event,
+    Init,
+    Meld,
+    MeldKind,
+    Shuffle,
+    iter_events,
+)
+
+SHUFFLE_SEED_PREFIX = "mt19937ar-sha512-n288-base64,"
+
+MT_STATE_SIZE = 624
+MT_INIT_SEED = 19650218
+MT_MASK = 0xFFFFFFFF
+MT_STATE_VERSION = 3
+WORD_SIZE = 4
+
+# Every round consumes 288 MT outputs. They are hashed in 128-byte
+# blocks with SHA-512 into 144 words that drive the shuffle and dice.
+WORDS_PER_ROUND = 288
+HASH_BLOCK_SIZE = 2 * hashlib.sha512().digest_size
+ROUND_SOURCE_SIZE = WORDS_PER_ROUND * WORD_SIZE
+
+NUM_SEATS = 4
+WALL_SIZE = 136
+NUM_DICE_FACES = 6
+DICE_WORDS = (135, 136)
+
+# The wall is drawn from the end. The first 14 tiles form the dead wall.
+HAIPAI_BLOCKS = (4, 4, 4, 1)
+DEAD_WALL_SIZE = 14
+FIRST_LIVE_DRAW = WALL_SIZE - 1 - NUM_SEATS * sum(HAIPAI_BLOCKS)
+DORA_INDICATOR_POSITIONS = (5, 7, 9, 11, 13)
+RINSHAN_POSITIONS = (1, 0, 3, 2)
+KAN_KINDS = (MeldKind.MINKAN, MeldKind.KAKAN, MeldKind.ANKAN)
+
+
+@dataclass(slots=True, frozen=True)
+class Wall:
+    tiles: bytes  # tiles[135] is drawn first
+    dice: tuple[int, int]
+
+
+def decode_shuffle_seed(seed: str) -> array:
+    if not seed.startswith(SHUFFLE_SEED_PREFIX):
+        msg = f"unsupported shuffle seed format: {seed.split(',', 1)[0]}"
+        raise ValueError(msg)
+
+    try:
+        data = base64.b64decode(
+            seed[len(SHUFFLE_SEED_PREFIX) :],
+            validate=True,
+        )
+    except binascii.Error as e:
+        msg = f"invalid shuffle seed: {e}"
+        raise ValueError(msg) from e
+
+    if len(data) != MT_STATE_SIZE * WORD_SIZE:
+        msg = f"invalid shuffle seed length: {len(data)} bytes"
+        raise ValueError(msg)
+
+    return unpack_words(data)
+
+
+def unpack_words(data: bytes) -> array:
+    words = array("I")
+    words.frombytes(data)
+    if sys.byteorder != "little":
+        words.byteswap()
+    return words
+
+
+def pack_words(words: array) -> bytes:
+    packed = array("I", words)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def init_by_array(key: array) -> list[int]:
+    # init_by_array() of the reference MT19937 implementation.
+    mt = [0] * MT_STATE_SIZE
+    mt[0] = MT_INIT_SEED
+    for i in range(1, MT_STATE_SIZE):
+        prev = mt[i - 1]
+        mt[i] = (1812433253 * (prev ^ (prev >> 30)) + i) & MT_MASK
+
+    i = 1
+    j = 0
+    for _ in range(max(MT_STATE_SIZE, len(key))):
+        prev = mt[i - 1]
+        mt[i] = (
+            (mt[i] ^ ((prev ^ (prev >> 30)) * 1664525)) + key[j] + j
+        ) & MT_MASK
+        i += 1
+        j += 1
+        if i >= MT_STATE_SIZE:
+            mt[0] = mt[MT_STATE_SIZE - 1]
+            i = 1
+        if j >= len(key):
+            j = 0
+
+    for _ in range(MT_STATE_SIZE - 1):
+        prev = mt[i - 1]
+        mt[i] = ((mt[i] ^ ((prev ^ (prev >> 30)) * 1566083941)) - i) & MT_MASK
+        i += 1
+        if i >= MT_STATE_SIZE:
+            mt[0] = mt[MT_STATE_SIZE - 1]
+            i = 1
+
+    mt[0] = 0x80000000
+    return mt
+
+
+def create_generator(key: array) -> random.Random:
+    # random.Random is MT19937 and seeding it with an int runs the same
+    # init_by_array in C, as long as the key has no trailing zero words.
+    if key[-1] != 0:
+        return random.Random(int.from_bytes(pack_words(key), "little"))  # noqa: S311
+
+    generator = random.Random()  # noqa: S311
+    state = (*init_by_array(key), MT_STATE_SIZE)
+    generator.setstate((MT_STATE_VERSION, state, None))
+    return generator
+
+
+def shuffle_wall(rnd: array) -> Wall:
+    tiles = bytearray(range(WALL_SIZE))
+    for i in range(WALL_SIZE - 1):
+        j = i + rnd[i] % (WALL_SIZE - i)
+        tiles[i], tiles[j] = tiles[j], tiles[i]
+
+    dice = (
+        rnd[DICE_WORDS[0]] % NUM_DICE_FACES,
+        rnd[DICE_WORDS[1]] % NUM_DICE_FACES,
+    )
+    return Wall(bytes(tiles), dice)
+
+
+def generate_walls(seed: str, num_rounds: int) -> list[Wall]:
+    key = decode_shuffle_seed(seed)
+    generator = create_generator(key)
+
+    # Draw the MT outputs of all rounds at once. getrandbits() returns
+    # them as the little-endian words of a single integer.
+    num_bytes = ROUND_SOURCE_SIZE * num_rounds
+    source = generator.getrandbits(8 * num_bytes).to_bytes(num_bytes, "little")
+
+    walls: list[Wall] = []
+    for start in range(0, num_bytes, ROUND_SOURCE_SIZE):
+        digests = b"".join(
+            hashlib.sha512(source[i : i + HASH_BLOCK_SIZE]).digest()
+            for i in range(start, start + ROUND_SOURCE_SIZE, HASH_BLOCK_SIZE)
+        )
+        walls.append(shuffle_wall(unpack_words(digests)))
+    return walls
+
+
+def deal_hands(wall: Wall, oya: int) -> tuple[tuple[int, ...], ...]:
+    hands: list[list[int]] = [[] for _ in range(NUM_SEATS)]
+    pos = WALL_SIZE - 1
+    for block in HAIPAI_BLOCKS:
+        for i in range(NUM_SEATS):
+            hand = hands[(oya + i) % NUM_SEATS]
+            hand.extend(wall.tiles[pos - block + 1 : pos + 1][::-1])
+            pos -= block
+    return tuple(tuple(hand) for hand in hands)
+
+
+def find_shuffle_seed(events: list[Event]) -> str | None:
+    for event in events:
+        if isinstance(event, Shuffle):
+            return event.seed
+        if isinstance(event, Init):
+            break
+    return None
+
+
+def reconstruct_walls(content: bytes) -> list[Wall] | None:
+    # Returns None for logs whose walls cannot be rebuilt: logs without
+    # a SHUFFLE seed in the supported format and three-player logs.
+    events = list(iter_events(content))
+    return reconstruct_walls_from_events(events)
+
+
+def reconstruct_walls_from_events(events: list[Event]) -> list[Wall] | None:
+    seed = find_shuffle_seed(events)
+    if seed is None or not seed.startswith(SHUFFLE_SEED_PREFIX):
+        return None
+
+    inits = [event for event in events if isinstance(event, Init)]
+    if any(not init.hands[NUM_SEATS - 1] for init in inits):
+        return None
+
+    return generate_walls(seed, len(inits))
+
+
+def check_init(round_index: int, wall: Wall, init: Init) -> None:
+    if init.dice != wall.dice:
+        msg = f"round {round_index}: dice {init.dice} do not match the seed {wall.dice}"  # noqa: E501
+        raise ValueError(msg)
+
+    dora_indicator = wall.tiles[DORA_INDICATOR_POSITIONS[0]]
+    if init.dora_indicator != dora_indicator:
+        msg = f"round {round_index}: dora indicator {init.dora_indicator} does not match the wall tile {dora_indicator}"  # noqa: E501
+        raise ValueError(msg)
+
+    for who, hand in enumerate(deal_hands(wall, init.oya)):
+        if sorted(init.hands[who]) != sorted(hand):
+            msg = f"round {round_index}: hand of player {who} does not match the wall"  # noqa: E501
+            raise ValueError(msg)
+
+
+def verify_walls(content: bytes) -> bool:
+    # Raises ValueError on the first mismatch. Returns False if the
+    # walls of the log cannot be rebuilt.
+    events = list(iter_events(content))
+    walls = reconstruct_walls_from_events(events)
+    if walls is None:
+        return False
+
+    round_index = -1
+    wall: Wall | None = None
+    live_pos = FIRST_LIVE_DRAW
+    num_kans = 0
+    num_doras = 0
+    rinshan_pending = False
+
+    for event in events:
+        match event:
+            case Init():
+                round_index += 1
+                wall = walls[round_index]
+                check_init(round_index, wall, event)
+                live_pos = FIRST_LIVE_DRAW
+                num_kans = 0
+                num_doras = 0
+                rinshan_pending = False
+            case Meld(kind=kind) if kind in KAN_KINDS:
+                rinshan_pending = True
+            case Draw(tile=tile) if wall is not None:
+                if rinshan_pending:
+                    if num_kans >= len(RINSHAN_POSITIONS):
+                        msg = f"round {round_index}: too many kans"
+                        raise ValueError(msg)
+                    expected = wall.tiles[RINSHAN_POSITIONS[num_kans]]
+                    num_kans += 1
+                    rinshan_pending = False
+                else:
+                    # Each kan moves the last live tile into the dead
+                    # wall.
+                    if live_pos < DEAD_WALL_SIZE + num_kans:
+                        msg = f"round {round_index}: draw beyond the live wall"
+                        raise ValueError(msg)
+                    expected = wall.tiles[live_pos]
+                    live_pos -= 1
+
+                if tile != expected:
+                    msg = f"round {round_index}: draw {tile} does not match the wall tile {expected}"  # noqa: E501
+                    raise ValueError(msg)
+            case Dora(tile=tile) if wall is not None:
+                num_doras += 1
+                if num_doras >= len(DORA_INDICATOR_POSITIONS):
+                    msg = f"round {round_index}: too many dora indicators"
+                    raise ValueError(msg)
+                expected = wall.tiles[DORA_INDICATOR_POSITIONS[num_doras]]
+                if tile != expected:
+                    msg = f"round {round_index}: dora indicator {tile} does not match the wall tile {expected}"  # noqa: E501
+                    raise ValueError(msg)
+            case _:
+                pass
+
+    return True
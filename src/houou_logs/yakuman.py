@@ -2,10 +2,12 @@
 # SPDX-License-Identifier: MIT
 # This file is part of https://github.com/Apricot-S/houou-logs
 
-import ast
 import re
+import sqlite3
+from collections.abc import Iterable, Iterator
 from contextlib import closing
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+from itertools import batched, chain
 from pathlib import Path
 
 from niquests import Session
@@ -14,16 +16,42 @@ from tqdm import tqdm
 from houou_logs import db
 from houou_logs.exceptions import UserInputError
 from houou_logs.log_id import parse_type
-from houou_logs.session import TIMEOUT, create_session
+from houou_logs.session import (
+    DEFAULT_MAX_TIMEOUT,
+    DEFAULT_MIN_TIMEOUT,
+    ENDPOINT_YAKUMAN,
+    create_session,
+    timed_get,
+    validate_timeouts,
+)
 
 YAKUMAN_LOGS_AVAILABLE_FROM = datetime(2006, 10, 1, tzinfo=UTC)
-
-YKM_ARRAY_PATTERN = re.compile(r"ykm=(\[.*?\]);", re.DOTALL)
+# A month is treated as finished this long after it ends in UTC, so
+# that late updates of its list are still picked up.
+YAKUMAN_MONTH_SETTLE_TIME = timedelta(days=1)
+NOT_MODIFIED = 304
+MONTHS_PER_YEAR = 12
+
+YEAR_MONTH_PATTERN = re.compile(r"^(\d{4})-(\d{2})$")
+
+YKM_ARRAY_START = "ykm="
+YKM_TOKEN_PATTERN = re.compile(
+    r"\s*(?:(?P<open>\[)|(?P<close>\])|(?P<comma>,)"
+    r"|'(?P<single>(?:[^'\\]|\\.)*)'"
+    r'|"(?P<double>(?:[^"\\]|\\.)*)"'
+    r"|(?P<number>-?\d+(?:\.\d+)?))",
+    re.DOTALL,
+)
+YKM_ESCAPE_PATTERN = re.compile(r"\\(u[0-9a-fA-F]{4}|.)", re.DOTALL)
+YKM_ESCAPES = {"n": "\n", "r": "\r", "t": "\t"}
+YKM_NEW_ENTRY_SIZE = 5
 YAKUMAN_LOG_DATE_PATTERN = re.compile(r"^\d{2}/\d{2} \d{2}:\d{2}$")
 YAKUMAN_LOG_ID_PATTERN = re.compile(
     r"^\d{8}(?:\d{2})?gm-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{8}$",
 )
 
+type YkmValue = str | int | float | list[YkmValue]
+
 
 def validate_yakuman_log_date(year: int, month: int, now: datetime) -> None:
     if not (1 <= month <= 12):  # noqa: PLR2004
@@ -45,8 +73,46 @@ def build_url(year: int, month: int) -> str:
     return f"https://tenhou.net/sc/{year}/{month:02}/ykm.js"
 
 
-def fetch_yakuman_log_ids_text(session: Session, url: str) -> str:
-    res = session.get(url, timeout=TIMEOUT)
+def parse_year_month(text: str) -> tuple[int, int]:
+    match = YEAR_MONTH_PATTERN.fullmatch(text)
+    if not match:
+        msg = f"invalid month, expected YYYY-MM: {text}"
+        raise UserInputError(msg)
+    return (int(match[1]), int(match[2]))
+
+
+def iter_months(
+    start: tuple[int, int],
+    end: tuple[int, int],
+) -> Iterator[tuple[int, int]]:
+    year, month = start
+    while (year, month) <= end:
+        yield (year, month)
+        if month == MONTHS_PER_YEAR:
+            year, month = year + 1, 1
+        else:
+            month += 1
+
+
+def is_month_complete(year: int, month: int, now: datetime) -> bool:
+    if month == MONTHS_PER_YEAR:
+        next_month = datetime(year + 1, 1, 1, tzinfo=UTC)
+    else:
+        next_month = datetime(year, month + 1, 1, tzinfo=UTC)
+    return now >= next_month + YAKUMAN_MONTH_SETTLE_TIME
+
+
+def fetch_yakuman_log_ids_content(
+    session: Session,
+    url: str,
+    etag: str | None,
+) -> tuple[bytes | None, str | None]:
+    # Returns (content, ETag). The content is None if the server answers
+    # 304 Not Modified to the given ETag.
+    headers = {} if etag is None else {"If-None-Match": etag}
+    res = timed_get(session, ENDPOINT_YAKUMAN, url, headers=headers)
+    if res.status_code == NOT_MODIFIED and etag is not None:
+        return (None, etag)
     res.raise_for_status()
 
     content = res.content
@@ -54,30 +120,97 @@ def fetch_yakuman_log_ids_text(session: Session, url: str) -> str:
         msg = "response content is None"
         raise RuntimeError(msg)
 
-    return content.decode("utf-8")
+    return (content, res.headers.get("ETag"))
+
+
+def decode_ykm_string(text: str) -> str:
+    if "\\" not in text:
+        return text
+    return YKM_ESCAPE_PATTERN.sub(decode_ykm_escape, text)
+
 
+def decode_ykm_escape(match: re.Match[str]) -> str:
+    escape = match[1]
+    if len(escape) > 1:
+        return chr(int(escape[1:], 16))
+    return YKM_ESCAPES.get(escape, escape)
 
-def extract_ids_from_new_format(ykm_array: list) -> list[tuple[str, str]]:
+
+def decode_ykm_token(match: re.Match[str]) -> YkmValue:
+    match match.lastgroup:
+        case "single" | "double" as kind:
+            return decode_ykm_string(match[kind])
+        case "number":
+            number = match["number"]
+            return float(number) if "." in number else int(number)
+        case _:
+            msg = f"unexpected ykm token: {match[0]}"
+            raise RuntimeError(msg)
+
+
+def iter_ykm_array(text: str, pos: int) -> Iterator[YkmValue]:
+    # Tokenizes the array literal starting at text[pos] in one pass and
+    # yields its elements as soon as each one is complete. Nested arrays
+    # are built as lists.
+    stack: list[list[YkmValue]] = []
+    is_top_level_open = False
+    after_value = False
+    while True:
+        match = YKM_TOKEN_PATTERN.match(text, pos)
+        if match is None:
+            msg = f"failed to parse ykm array at offset {pos}"
+            raise RuntimeError(msg)
+        pos = match.end()
+
+        match match.lastgroup:
+            case "open" if not is_top_level_open:
+                is_top_level_open = True
+                continue
+            case "open" if not after_value:
+                stack.append([])
+                continue
+            case "comma" if after_value:
+                after_value = False
+                continue
+            case "close" if not stack:
+                return
+            case "close":
+                value: YkmValue = stack.pop()
+            case "single" | "double" | "number" if not after_value:
+                value = decode_ykm_token(match)
+            case _:
+                msg = f"failed to parse ykm array at offset {match.start()}"
+                raise RuntimeError(msg)
+
+        if stack:
+            stack[-1].append(value)
+        else:
+            yield value
+        after_value = True
+
+
+def iter_ids_from_new_format(
+    values: Iterable[YkmValue],
+) -> Iterator[tuple[str, str]]:
     # New format: format from February 2008
-    if len(ykm_array) % 5 != 0:
-        msg = "invalid new ykm array length"
-        raise RuntimeError(msg)
+    for entry in batched(values, YKM_NEW_ENTRY_SIZE):
+        if len(entry) != YKM_NEW_ENTRY_SIZE:
+            msg = "invalid new ykm array length"
+            raise RuntimeError(msg)
 
-    ids = []
-    for i in range(0, len(ykm_array), 5):
-        date = ykm_array[i]
-        log_id = ykm_array[i + 4]
+        date = entry[0]
+        log_id = entry[4]
         if not isinstance(date, str) or not isinstance(log_id, str):
             msg = "invalid new ykm array entry"
             raise TypeError(msg)
-        ids.append((date, log_id.split("&", 1)[0]))
-    return ids
+        yield (date, log_id.split("&", 1)[0])
 
 
-def extract_ids_from_old_format(ykm_array: list) -> list[tuple[str, str]]:
+def iter_ids_from_old_format(
+    values: Iterable[YkmValue],
+) -> Iterator[tuple[str, str]]:
     # Old format: format until January 2008
-    ids = []
-    for entry in ykm_array:
+    for entry in values:
         if (
             not isinstance(entry, list)
             or len(entry) < 5  # noqa: PLR2004
@@ -86,40 +219,36 @@ def extract_ids_from_old_format(ykm_array: list) -> list[tuple[str, str]]:
         ):
             tqdm.write("invalid old ykm array entry")
             continue
-        ids.append((entry[0], entry[4]))
-    return ids
+        yield (entry[0], entry[4])
 
 
-def extract_ids(text: str) -> list[tuple[str, str]]:
-    match = YKM_ARRAY_PATTERN.search(text)
-    if not match:
+def iter_ids(text: str) -> Iterator[tuple[str, str]]:
+    start = text.find(YKM_ARRAY_START)
+    pos = start + len(YKM_ARRAY_START)
+    if start == -1 or not text.startswith("[", pos):
         msg = "ykm array not found in input text"
         raise RuntimeError(msg)
 
-    ykm_text = match.group(1)
-    try:
-        ykm_array = ast.literal_eval(ykm_text)
-    except (SyntaxError, ValueError) as e:
-        msg = "failed to parse ykm array"
-        raise RuntimeError(msg) from e
-
-    if not isinstance(ykm_array, list):
-        msg = "ykm array must be a list"
-        raise TypeError(msg)
+    values = iter_ykm_array(text, pos)
+    first = next(values, None)
+    if first is None:
+        return
 
-    if len(ykm_array) == 0:
-        return []
-
-    match ykm_array[0]:
+    values = chain([first], values)
+    match first:
         case str():
-            return extract_ids_from_new_format(ykm_array)
+            yield from iter_ids_from_new_format(values)
         case list():
-            return extract_ids_from_old_format(ykm_array)
+            yield from iter_ids_from_old_format(values)
         case _:
             msg = "unsupported ykm array format"
             raise RuntimeError(msg)
 
 
+def extract_ids(text: str) -> list[tuple[str, str]]:
+    return list(iter_ids(text))
+
+
 def parse_id(year: int, date: str, log_id: str) -> db.LogEntry:
     if not YAKUMAN_LOG_DATE_PATTERN.fullmatch(date):
         msg = f"invalid yakuman log date: {date}"
@@ -144,31 +273,100 @@ def parse_id(year: int, date: str, log_id: str) -> db.LogEntry:
     )
 
 
-def parse_entries(year: int, ids: list[tuple[str, str]]) -> list[db.LogEntry]:
-    entries = []
+def parse_entries(
+    year: int,
+    ids: Iterable[tuple[str, str]],
+) -> Iterator[db.LogEntry]:
     for date, log_id in ids:
         try:
-            entries.append(parse_id(year, date, log_id))
+            yield parse_id(year, date, log_id)
         except ValueError as e:
             tqdm.write(str(e))
-    return entries
 
 
-def yakuman(db_path: Path, year: int, month: int, now: datetime) -> int:
-    validate_yakuman_log_date(year, month, now)
+def update_yakuman_month(
+    cursor: sqlite3.Cursor,
+    session: Session,
+    year: int,
+    month: int,
+    now: datetime,
+) -> int:
+    # Finished months already in yakuman_index are skipped. Others are
+    # only parsed if their ykm.js changed since the last run.
+    key = f"{year:04}-{month:02}"
+    state = db.get_yakuman_index(cursor, key)
+    if state is not None and state[2]:
+        return 0
+
+    etag = state[1] if state is not None else None
+    content, etag = fetch_yakuman_log_ids_content(
+        session,
+        build_url(year, month),
+        etag,
+    )
+    is_complete = is_month_complete(year, month, now)
+
+    if content is None or (state is not None and len(content) == state[0]):
+        size = state[0] if state is not None else 0
+        db.upsert_yakuman_index(cursor, key, size, etag, is_complete)
+        return 0
 
+    ids = iter_ids(content.decode("utf-8"))
+    entries = parse_entries(year, ids)
+    num_logs = db.insert_log_entries(cursor, entries)
+    db.upsert_yakuman_index(cursor, key, len(content), etag, is_complete)
+    return num_logs
+
+
+def yakuman_range(
+    db_path: Path,
+    start: tuple[int, int],
+    end: tuple[int, int],
+    now: datetime,
+    *,
+    min_timeout: float = DEFAULT_MIN_TIMEOUT,
+    max_timeout: float = DEFAULT_MAX_TIMEOUT,
+) -> int:
+    validate_yakuman_log_date(*start, now)
+    validate_yakuman_log_date(*end, now)
+    if start > end:
+        msg = "start month must not be after end month"
+        raise UserInputError(msg)
+    validate_timeouts(min_timeout, max_timeout)
+
+    num_logs = 0
     with closing(db.open_db(db_path)) as conn, conn:
         db.setup_table(conn)
         cursor = conn.cursor()
 
-        with create_session() as session:
-            url = build_url(year, month)
-            resp = fetch_yakuman_log_ids_text(session, url)
+        with create_session(min_timeout, max_timeout) as session:
+            for year, month in tqdm(list(iter_months(start, end))):
+                num_logs += update_yakuman_month(
+                    cursor,
+                    session,
+                    year,
+                    month,
+                    now,
+                )
+                conn.commit()
 
-            ids = extract_ids(resp)
-            entries = parse_entries(year, ids)
+    return num_logs
 
-            db.insert_log_entries(cursor, entries)
-            num_logs = len(entries)
 
-    return num_logs
+def yakuman(
+    db_path: Path,
+    year: int,
+    month: int,
+    now: datetime,
+    *,
+    min_timeout: float = DEFAULT_MIN_TIMEOUT,
+    max_timeout: float = DEFAULT_MAX_TIMEOUT,
+) -> int:
+    return yakuman_range(
+        db_path,
+        (year, month),
+        (year, month),
+        now,
+        min_timeout=min_timeout,
+        max_timeout=max_timeout,
+    )
@@ -2,11 +2,29 @@
 # SPDX-License-Identifier: MIT
 # This file is part of https://github.com/Apricot-S/houou-logs
 
+from collections.abc import Callable, Iterable
+from contextlib import closing
 from pathlib import Path
 
 import pytest
 
+from houou_logs import db
+
+type CreateDB = Callable[[Path, Iterable[db.LogEntry]], None]
+
 
 @pytest.fixture
 def db_path(tmp_path: Path) -> Path:
     return tmp_path / "test.db"
+
+
+@pytest.fixture
+def create_db() -> CreateDB:
+    # Returns a function that creates a DB with the current schema and
+    # the given entries.
+    def create(db_path: Path, entries: Iterable[db.LogEntry]) -> None:
+        with closing(db.open_db(db_path)) as conn, conn:
+            db.setup_table(conn)
+            db.insert_log_entries(conn.cursor(), entries)
+
+    return create
@@ -0,0 +1,71 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import gzip
+import zlib
+
+import pytest
+
+from houou_logs.binary_log import (
+    MAGIC,
+    OP_LITERAL,
+    OP_MELD,
+    decode_log_content,
+    encode_log_content,
+    encode_records,
+    is_binary_log,
+    iter_records,
+)
+
+LOG = (
+    b'<mjloggm ver="2.3"><INIT seed="0,0,0,2,4,52" oya="0"/>'
+    b'<T40/><D40/><U135/><F0/><N who="2" m="34314" /><W12/><G12/>'
+    b'<AGARI who="2" owari="250,0.0" /></mjloggm>'
+)
+
+
+def test_encode_records_compacts_draws_discards_and_melds() -> None:
+    payload = encode_records(b'<T40/><D40/><N who="2" m="34314" />')
+    assert payload == bytes([0x01, 40, 0x05, 40, OP_MELD, 2, 0x8A, 0x8C, 0x02])
+
+
+def test_encode_records_keeps_unusual_serializations_as_literals() -> None:
+    content = b'<T040/><T12 /><T256/><DORA hai="1"/>'
+    payload = encode_records(content)
+    assert payload[0] == OP_LITERAL
+    assert decode_log_content(MAGIC + zlib.compress(payload)) == content
+
+
+@pytest.mark.parametrize(
+    "content",
+    [b"", LOG, LOG + b"\n", "<mjloggm>東</mjloggm>".encode()],
+)
+def test_encode_log_content_roundtrip(content: bytes) -> None:
+    blob = encode_log_content(content)
+    assert is_binary_log(blob)
+    assert decode_log_content(blob) == content
+
+
+def test_encode_log_content_is_smaller_than_gzip() -> None:
+    content = LOG.replace(b"<T40/><D40/>", b"<T40/><D40/>" * 200)
+    assert len(encode_log_content(content)) < len(gzip.compress(content))
+
+
+def test_is_binary_log_rejects_gzip() -> None:
+    assert not is_binary_log(gzip.compress(LOG))
+
+
+def test_iter_records_rejects_non_binary_log() -> None:
+    with pytest.raises(ValueError, match="not a binary log"):
+        list(iter_records(gzip.compress(LOG)))
+
+
+def test_iter_records_rejects_unknown_opcode() -> None:
+    with pytest.raises(ValueError, match="unknown opcode"):
+        list(iter_records(MAGIC + zlib.compress(b"\xff")))
+
+
+def test_iter_records_rejects_truncated_literal() -> None:
+    with pytest.raises(ValueError, match="truncated literal"):
+        list(iter_records(MAGIC + zlib.compress(b"\x00\x05abc")))
@@ -0,0 +1,63 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+from unittest.mock import Mock, patch
+
+import pytest
+from niquests.exceptions import ConnectionError as RequestConnectionError
+
+from houou_logs.breaker import (
+    FAILURE_THRESHOLD,
+    INITIAL_PROBE_DELAY,
+    MAX_PROBE_DELAY,
+    CircuitBreaker,
+    is_unavailable_error,
+)
+from houou_logs.exceptions import HTTPStatusError
+
+
+@pytest.mark.parametrize(
+    "error",
+    [HTTPStatusError(503), HTTPStatusError(403), RequestConnectionError()],
+)
+def test_is_unavailable_error_on_server_errors(error: Exception) -> None:
+    assert is_unavailable_error(error)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [HTTPStatusError(404), RuntimeError("no log content in response")],
+)
+def test_is_unavailable_error_on_missing_log(error: Exception) -> None:
+    assert not is_unavailable_error(error)
+
+
+def test_circuit_breaker_opens_after_consecutive_failures() -> None:
+    breaker = CircuitBreaker()
+
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.record(unavailable=True)
+    assert not breaker.is_open
+
+    breaker.record(unavailable=False)
+    breaker.record(unavailable=True)
+    assert not breaker.is_open
+
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.record(unavailable=True)
+    assert breaker.is_open
+
+
+@patch("houou_logs.breaker.time")
+def test_circuit_breaker_backs_off_probes(mock_time: Mock) -> None:
+    breaker = CircuitBreaker()
+
+    for _ in range(10):
+        breaker.wait_for_probe()
+    breaker.record(unavailable=False)
+
+    assert mock_time.sleep.call_args_list[0].args == (INITIAL_PROBE_DELAY,)
+    assert mock_time.sleep.call_args_list[1].args == (INITIAL_PROBE_DELAY * 2,)
+    assert mock_time.sleep.call_args_list[-1].args == (MAX_PROBE_DELAY,)
+    assert breaker.probe_delay == INITIAL_PROBE_DELAY
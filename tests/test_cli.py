@@ -14,28 +14,54 @@ from houou_logs.cli import (
     INTERRUPTED_EXIT_CODE,
     IO_ERROR_EXIT_CODE,
     USER_INPUT_ERROR_EXIT_CODE,
+    convert_storage_cli,
+    diff_cli,
     download_cli,
     export_cli,
     fetch_cli,
     import_cli,
+    ingest_cli,
     main,
+    merge_cli,
+    set_convert_storage_args,
+    set_diff_args,
     set_download_args,
     set_export_args,
     set_fetch_args,
     set_import_args,
+    set_ingest_args,
+    set_merge_args,
+    set_split_args,
+    set_sync_args,
     set_validate_args,
     set_yakuman_args,
+    split_cli,
+    sync_cli,
     validate_cli,
     yakuman_cli,
 )
 from houou_logs.exceptions import UserInputError
+from houou_logs.pacing import DEFAULT_MAX_RATE, DEFAULT_MIN_RATE
+from houou_logs.session import DEFAULT_MAX_TIMEOUT, DEFAULT_MIN_TIMEOUT
 
 
 def test_set_import_args_parses_correctly() -> None:
     parser = set_import_args(ArgumentParser())
     args = parser.parse_args(["db.sqlite", "data.zip"])
     assert args.db_path == Path("db.sqlite")
-    assert args.archive_path == Path("data.zip")
+    assert args.archive_paths == [Path("data.zip")]
+    assert args.jobs >= 1
+    assert not args.bulk
+
+
+def test_set_import_args_multiple_archives() -> None:
+    parser = set_import_args(ArgumentParser())
+    args = parser.parse_args(
+        ["db.sqlite", "a.zip", "raw/", "-j", "4", "--bulk"],
+    )
+    assert args.archive_paths == [Path("a.zip"), Path("raw")]
+    assert args.jobs == 4
+    assert args.bulk
 
 
 def test_set_import_args_missing_args() -> None:
@@ -46,9 +72,19 @@ def test_set_import_args_missing_args() -> None:
 
 @patch("houou_logs.import_.import_")
 def test_import_cli_calls_import(mock_import: Mock) -> None:
-    args = Namespace(db_path=Path("db.sqlite"), archive_path=Path("data.zip"))
+    args = Namespace(
+        db_path=Path("db.sqlite"),
+        archive_paths=[Path("data.zip")],
+        jobs=2,
+        bulk=True,
+    )
     import_cli(args)
-    mock_import.assert_called_once_with(Path("db.sqlite"), Path("data.zip"))
+    mock_import.assert_called_once_with(
+        Path("db.sqlite"),
+        [Path("data.zip")],
+        jobs=2,
+        bulk=True,
+    )
 
 
 def test_set_fetch_args_latest() -> None:
@@ -56,6 +92,7 @@ def test_set_fetch_args_latest() -> None:
     args = parser.parse_args(["db.sqlite"])
     assert args.db_path == Path("db.sqlite")
     assert not args.archive
+    assert args.cache_dir is None
 
 
 def test_set_fetch_args_archive() -> None:
@@ -65,17 +102,84 @@ def test_set_fetch_args_archive() -> None:
     assert args.archive
 
 
+def test_set_fetch_args_cache_dir() -> None:
+    parser = set_fetch_args(ArgumentParser())
+    args = parser.parse_args(["db.sqlite", "--cache-dir", "cache"])
+    assert args.cache_dir == Path("cache")
+
+
+def test_set_fetch_args_timeouts() -> None:
+    parser = set_fetch_args(ArgumentParser())
+    args = parser.parse_args(
+        ["db.sqlite", "--min-timeout", "0.5", "--max-timeout", "10"],
+    )
+    assert args.min_timeout == 0.5
+    assert args.max_timeout == 10.0
+
+
 def test_set_fetch_args_missing_args() -> None:
     parser = set_fetch_args(ArgumentParser())
     with pytest.raises(SystemExit):
         parser.parse_args([])
 
 
+def test_set_diff_args() -> None:
+    parser = set_diff_args(ArgumentParser())
+    args = parser.parse_args(["a.sqlite", "b.sqlite"])
+    assert args.db_path == Path("a.sqlite")
+    assert args.other_path == Path("b.sqlite")
+
+
+@patch("houou_logs.sync.diff")
+def test_diff_cli_prints_entries(
+    mock_diff: Mock,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    mock_diff.return_value = [
+        ("2024060600gm-00a9-0000-00000000", "downloaded", "missing"),
+    ]
+    args = Namespace(db_path=Path("a.sqlite"), other_path=Path("b.sqlite"))
+    diff_cli(args)
+    mock_diff.assert_called_once_with(Path("a.sqlite"), Path("b.sqlite"))
+    captured = capsys.readouterr()
+    assert captured.out == (
+        "2024060600gm-00a9-0000-00000000\tdownloaded\tmissing\n"
+    )
+    assert "Number of different logs: 1" in captured.err
+
+
+def test_set_sync_args() -> None:
+    parser = set_sync_args(ArgumentParser())
+    args = parser.parse_args(["a.sqlite", "b.sqlite"])
+    assert args.dst_path == Path("a.sqlite")
+    assert args.src_path == Path("b.sqlite")
+
+
+@patch("houou_logs.sync.sync")
+def test_sync_cli_calls_sync(mock_sync: Mock) -> None:
+    mock_sync.return_value = 1
+    args = Namespace(dst_path=Path("a.sqlite"), src_path=Path("b.sqlite"))
+    sync_cli(args)
+    mock_sync.assert_called_once_with(Path("a.sqlite"), Path("b.sqlite"))
+
+
 @patch("houou_logs.fetch.fetch")
 def test_fetch_cli_calls_fetch(mock_fetch: Mock) -> None:
-    args = Namespace(db_path=Path("db.sqlite"), archive=True)
+    args = Namespace(
+        db_path=Path("db.sqlite"),
+        archive=True,
+        cache_dir=None,
+        min_timeout=0.5,
+        max_timeout=10.0,
+    )
     fetch_cli(args)
-    mock_fetch.assert_called_once_with(Path("db.sqlite"), archive=True)
+    mock_fetch.assert_called_once_with(
+        Path("db.sqlite"),
+        archive=True,
+        cache_dir=None,
+        min_timeout=0.5,
+        max_timeout=10.0,
+    )
 
 
 def test_set_yakuman_args() -> None:
@@ -84,6 +188,17 @@ def test_set_yakuman_args() -> None:
     assert args.db_path == Path("db.sqlite")
     assert args.year == 2007
     assert args.month == 1
+    assert args.from_month is None
+
+
+def test_set_yakuman_args_with_range() -> None:
+    parser = set_yakuman_args(ArgumentParser())
+    args = parser.parse_args(
+        ["db.sqlite", "--from", "2006-10", "--to", "2007-03"],
+    )
+    assert args.year is None
+    assert args.from_month == "2006-10"
+    assert args.to_month == "2007-03"
 
 
 def test_set_yakuman_args_missing_args() -> None:
@@ -100,9 +215,74 @@ def test_yakuman_cli_calls_yakuman_for_current_month(
 ) -> None:
     now = datetime(2025, 9, 23, 1, 52, 12, 0, UTC)
     mock_datetime.now.return_value = now
-    args = Namespace(db_path=Path("db.sqlite"), year=2025, month=9)
+    args = Namespace(
+        db_path=Path("db.sqlite"),
+        year=2025,
+        month=9,
+        from_month=None,
+        to_month=None,
+        min_timeout=DEFAULT_MIN_TIMEOUT,
+        max_timeout=DEFAULT_MAX_TIMEOUT,
+    )
     yakuman_cli(args)
-    mock_yakuman.assert_called_once_with(Path("db.sqlite"), 2025, 9, now)
+    mock_yakuman.assert_called_once_with(
+        Path("db.sqlite"),
+        2025,
+        9,
+        now,
+        min_timeout=DEFAULT_MIN_TIMEOUT,
+        max_timeout=DEFAULT_MAX_TIMEOUT,
+    )
+
+
+@patch("houou_logs.yakuman.yakuman_range")
+def test_yakuman_cli_calls_yakuman_range(mock_yakuman_range: Mock) -> None:
+    now = datetime(2025, 9, 23, 1, 52, 12, 0, UTC)
+    args = Namespace(
+        db_path=Path("db.sqlite"),
+        year=None,
+        month=None,
+        from_month="2006-10",
+        to_month=None,
+        min_timeout=DEFAULT_MIN_TIMEOUT,
+        max_timeout=DEFAULT_MAX_TIMEOUT,
+    )
+    yakuman_cli(args, now)
+    mock_yakuman_range.assert_called_once_with(
+        Path("db.sqlite"),
+        (2006, 10),
+        (2025, 9),
+        now,
+        min_timeout=DEFAULT_MIN_TIMEOUT,
+        max_timeout=DEFAULT_MAX_TIMEOUT,
+    )
+
+
+@pytest.mark.parametrize(
+    ("year", "month", "from_month", "to_month"),
+    [
+        (None, None, None, None),
+        (2025, 9, "2025-01", None),
+        (None, None, None, "2025-01"),
+    ],
+)
+def test_yakuman_cli_rejects_invalid_month_args(
+    year: int | None,
+    month: int | None,
+    from_month: str | None,
+    to_month: str | None,
+) -> None:
+    args = Namespace(
+        db_path=Path("db.sqlite"),
+        year=year,
+        month=month,
+        from_month=from_month,
+        to_month=to_month,
+        min_timeout=DEFAULT_MIN_TIMEOUT,
+        max_timeout=DEFAULT_MAX_TIMEOUT,
+    )
+    with pytest.raises(UserInputError):
+        yakuman_cli(args, datetime(2025, 9, 23, tzinfo=UTC))
 
 
 @pytest.fixture
@@ -120,7 +300,15 @@ def test_yakuman_cli_warns_yakuman_for_current_month(
     now = datetime(2025, 9, 23, 1, 52, 12, 0, UTC)
     mock_datetime.now.return_value = now
     mock_datetime.side_effect = datetime
-    args = Namespace(db_path=Path("db.sqlite"), year=2025, month=9)
+    args = Namespace(
+        db_path=Path("db.sqlite"),
+        year=2025,
+        month=9,
+        from_month=None,
+        to_month=None,
+        min_timeout=DEFAULT_MIN_TIMEOUT,
+        max_timeout=DEFAULT_MAX_TIMEOUT,
+    )
     yakuman_cli(args)
     captured = capsys.readouterr()
     assert "Warning: This month is not finished yet." in captured.err
@@ -133,6 +321,13 @@ def test_set_download_args_without_options() -> None:
     assert args.players is None
     assert args.length is None
     assert args.limit is None
+    assert args.reuse_from is None
+    assert args.min_rate == DEFAULT_MIN_RATE
+    assert args.max_rate == DEFAULT_MAX_RATE
+    assert not args.wait_on_outage
+    assert not args.retry_errors
+    assert args.min_timeout == DEFAULT_MIN_TIMEOUT
+    assert args.max_timeout == DEFAULT_MAX_TIMEOUT
 
 
 def test_set_download_args_with_options() -> None:
@@ -146,25 +341,139 @@ def test_set_download_args_with_options() -> None:
     assert args.limit == 50
 
 
+def test_set_download_args_with_reuse_from() -> None:
+    parser = set_download_args(ArgumentParser())
+    args = parser.parse_args(
+        ["db.sqlite", "--reuse-from", "a.sqlite", "b.sqlite"],
+    )
+    assert args.reuse_from == [Path("a.sqlite"), Path("b.sqlite")]
+
+
+def test_set_download_args_with_retry_errors() -> None:
+    parser = set_download_args(ArgumentParser())
+    args = parser.parse_args(["db.sqlite", "--retry-errors"])
+    assert args.retry_errors
+
+
+def test_set_download_args_with_pacing_options() -> None:
+    parser = set_download_args(ArgumentParser())
+    args = parser.parse_args(
+        [
+            "db.sqlite",
+            "--min-rate",
+            "0.5",
+            "--max-rate",
+            "2",
+            "--wait-on-outage",
+        ],
+    )
+    assert args.min_rate == 0.5
+    assert args.max_rate == 2.0
+    assert args.wait_on_outage
+
+
+@patch("houou_logs.download.reuse_log_contents")
 @patch("houou_logs.download.download")
-def test_download_cli_calls_download(mock_download: Mock) -> None:
-    args = Namespace(db_path=Path("db.sqlite"), players=4, length="h", limit=1)
+def test_download_cli_calls_download(
+    mock_download: Mock,
+    mock_reuse: Mock,
+) -> None:
+    args = Namespace(
+        db_path=Path("db.sqlite"),
+        players=4,
+        length="h",
+        limit=1,
+        reuse_from=None,
+        min_rate=0.5,
+        max_rate=2.0,
+        wait_on_outage=True,
+        retry_errors=True,
+        min_timeout=DEFAULT_MIN_TIMEOUT,
+        max_timeout=DEFAULT_MAX_TIMEOUT,
+    )
     download_cli(args)
-    mock_download.assert_called_once_with(Path("db.sqlite"), 4, "h", 1)
+    mock_reuse.assert_not_called()
+    mock_download.assert_called_once_with(
+        Path("db.sqlite"),
+        4,
+        "h",
+        1,
+        min_rate=0.5,
+        max_rate=2.0,
+        wait_on_outage=True,
+        retry_errors=True,
+        min_timeout=DEFAULT_MIN_TIMEOUT,
+        max_timeout=DEFAULT_MAX_TIMEOUT,
+    )
+
+
+@patch("houou_logs.download.reuse_log_contents", return_value=3)
+@patch("houou_logs.download.download", return_value=0)
+def test_download_cli_reuses_before_download(
+    mock_download: Mock,
+    mock_reuse: Mock,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    args = Namespace(
+        db_path=Path("db.sqlite"),
+        players=None,
+        length=None,
+        limit=None,
+        reuse_from=[Path("other.sqlite")],
+        min_rate=DEFAULT_MIN_RATE,
+        max_rate=DEFAULT_MAX_RATE,
+        wait_on_outage=False,
+        retry_errors=False,
+        min_timeout=DEFAULT_MIN_TIMEOUT,
+        max_timeout=DEFAULT_MAX_TIMEOUT,
+    )
+    download_cli(args)
+    mock_reuse.assert_called_once_with(
+        Path("db.sqlite"),
+        [Path("other.sqlite")],
+    )
+    mock_download.assert_called_once()
+    assert "Number of logs reused: 3" in capsys.readouterr().err
 
 
 def test_set_validate_args() -> None:
     parser = set_validate_args(ArgumentParser())
     args = parser.parse_args(["db.sqlite"])
     assert args.db_path == Path("db.sqlite")
+    assert not args.index_rounds
+    assert args.level == "structural"
+    assert args.jobs >= 1
+
+
+def test_set_validate_args_index_rounds() -> None:
+    parser = set_validate_args(ArgumentParser())
+    args = parser.parse_args(["db.sqlite", "--index-rounds"])
+    assert args.index_rounds
+
+
+def test_set_validate_args_level_and_jobs() -> None:
+    parser = set_validate_args(ArgumentParser())
+    args = parser.parse_args(["db.sqlite", "--level", "semantic", "-j", "4"])
+    assert args.level == "semantic"
+    assert args.jobs == 4
 
 
 @patch("houou_logs.validate.validate")
 def test_validate_cli_calls_validate(mock_validate: Mock) -> None:
     mock_validate.return_value = (False, 1, 2)
-    args = Namespace(db_path=Path("db.sqlite"))
+    args = Namespace(
+        db_path=Path("db.sqlite"),
+        index_rounds=True,
+        level="semantic",
+        jobs=2,
+    )
     validate_cli(args)
-    mock_validate.assert_called_once_with(Path("db.sqlite"))
+    mock_validate.assert_called_once_with(
+        Path("db.sqlite"),
+        index_rounds=True,
+        level="semantic",
+        jobs=2,
+    )
 
 
 def test_set_export_args_without_options() -> None:
@@ -223,6 +532,97 @@ def test_export_cli_calls_export(mock_export: Mock) -> None:
     )
 
 
+def test_set_convert_storage_args_without_options() -> None:
+    parser = set_convert_storage_args(ArgumentParser())
+    args = parser.parse_args(["db.sqlite"])
+    assert args.db_path == Path("db.sqlite")
+    assert args.format == "binary"
+    assert not args.keep_xml
+
+
+def test_set_convert_storage_args_with_options() -> None:
+    parser = set_convert_storage_args(ArgumentParser())
+    args = parser.parse_args(["db.sqlite", "--format", "gzip", "--keep-xml"])
+    assert args.format == "gzip"
+    assert args.keep_xml
+
+
+@patch("houou_logs.convert.convert_storage")
+def test_convert_storage_cli_calls_convert_storage(
+    mock_convert_storage: Mock,
+) -> None:
+    args = Namespace(db_path=Path("db.sqlite"), format="binary", keep_xml=True)
+    convert_storage_cli(args)
+    mock_convert_storage.assert_called_once_with(
+        Path("db.sqlite"),
+        "binary",
+        keep_xml=True,
+    )
+
+
+def test_set_ingest_args() -> None:
+    parser = set_ingest_args(ArgumentParser())
+    args = parser.parse_args(["db.sqlite", "xml/", "-j", "3"])
+    assert args.db_path == Path("db.sqlite")
+    assert args.source_path == Path("xml")
+    assert args.jobs == 3
+
+
+@patch("houou_logs.ingest.ingest")
+def test_ingest_cli_calls_ingest(mock_ingest: Mock) -> None:
+    mock_ingest.return_value = 2
+    args = Namespace(
+        db_path=Path("db.sqlite"),
+        source_path=Path("xml"),
+        jobs=3,
+    )
+    ingest_cli(args)
+    mock_ingest.assert_called_once_with(
+        Path("db.sqlite"),
+        Path("xml"),
+        jobs=3,
+    )
+
+
+def test_set_merge_args() -> None:
+    parser = set_merge_args(ArgumentParser())
+    args = parser.parse_args(["all.sqlite", "a.sqlite", "b.sqlite"])
+    assert args.dst_path == Path("all.sqlite")
+    assert args.src_paths == [Path("a.sqlite"), Path("b.sqlite")]
+
+
+@patch("houou_logs.merge.merge")
+def test_merge_cli_calls_merge(mock_merge: Mock) -> None:
+    mock_merge.return_value = 2
+    args = Namespace(dst_path=Path("all.sqlite"), src_paths=[Path("a.sqlite")])
+    merge_cli(args)
+    mock_merge.assert_called_once_with(Path("all.sqlite"), [Path("a.sqlite")])
+
+
+def test_set_split_args() -> None:
+    parser = set_split_args(ArgumentParser())
+    args = parser.parse_args(["db.sqlite"])
+    assert args.src_path == Path("db.sqlite")
+    assert args.by == "year"
+    assert args.output_dir is None
+
+    args = parser.parse_args(["db.sqlite", "--by", "month", "-o", "out"])
+    assert args.by == "month"
+    assert args.output_dir == Path("out")
+
+
+@patch("houou_logs.merge.split")
+def test_split_cli_calls_split(
+    mock_split: Mock,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    mock_split.return_value = [(Path("db-2024.sqlite"), 3)]
+    args = Namespace(src_path=Path("db.sqlite"), by="year", output_dir=None)
+    split_cli(args)
+    mock_split.assert_called_once_with(Path("db.sqlite"), "year", None)
+    assert "Number of DB files written: 1" in capsys.readouterr().err
+
+
 @patch("houou_logs.fetch.fetch")
 def test_main_exits_with_user_input_error_code(
     mock_fetch: Mock,
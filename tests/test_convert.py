@@ -0,0 +1,115 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import gzip
+from pathlib import Path
+
+import pytest
+
+from houou_logs import db
+from houou_logs.binary_log import is_binary_log
+from houou_logs.convert import convert_storage
+from houou_logs.exceptions import UserInputError
+from houou_logs.storage import decompress_log_content, hash_log_content
+from tests.conftest import CreateDB
+
+LOG_ID = "2025010100gm-00a9-0000-00000000"
+LOG = b'<mjloggm ver="2.3"><T40/><D40/></mjloggm>'
+ENTRY = db.LogEntry(
+    id=LOG_ID,
+    date="2025-01-01T00:00",
+    num_players=4,
+    is_tonpu=False,
+    is_processed=True,
+    was_error=False,
+    log=gzip.compress(LOG, mtime=0),
+)
+
+
+def read_blobs(db_path: Path) -> tuple[bytes | None, bytes | None]:
+    conn = db.open_db(db_path)
+    try:
+        cursor = conn.cursor()
+        return (
+            db.get_log_content(cursor, LOG_ID),
+            db.get_binary_log_content(cursor, LOG_ID),
+        )
+    finally:
+        conn.close()
+
+
+def test_convert_storage_replaces_log_content(
+    db_path: Path,
+    create_db: CreateDB,
+) -> None:
+    create_db(db_path, [ENTRY])
+
+    assert convert_storage(db_path, "binary", keep_xml=False) == 1
+
+    log, binary_log = read_blobs(db_path)
+    assert log is not None
+    assert is_binary_log(log)
+    assert decompress_log_content(log) == LOG
+    assert binary_log is None
+
+    assert convert_storage(db_path, "binary", keep_xml=False) == 0
+    assert convert_storage(db_path, "gzip", keep_xml=False) == 1
+
+    log, _ = read_blobs(db_path)
+    assert log is not None
+    assert gzip.decompress(log) == LOG
+
+
+def test_convert_storage_keeps_xml(
+    db_path: Path,
+    create_db: CreateDB,
+) -> None:
+    create_db(db_path, [ENTRY])
+
+    assert convert_storage(db_path, "binary", keep_xml=True) == 1
+
+    log, binary_log = read_blobs(db_path)
+    assert log == ENTRY.log
+    assert binary_log is not None
+    assert decompress_log_content(binary_log) == LOG
+
+
+def test_convert_storage_rejects_keep_xml_for_gzip(
+    db_path: Path,
+    create_db: CreateDB,
+) -> None:
+    create_db(db_path, [ENTRY])
+
+    with pytest.raises(UserInputError):
+        convert_storage(db_path, "gzip", keep_xml=True)
+
+
+def test_convert_storage_keeps_content_hash_valid(
+    db_path: Path,
+    create_db: CreateDB,
+) -> None:
+    create_db(db_path, [ENTRY])
+    conn = db.open_db(db_path)
+    try:
+        cursor = conn.cursor()
+        db.upsert_log_hashes(
+            cursor,
+            [(LOG_ID, hash_log_content(gzip.compress(LOG, mtime=0)))],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    convert_storage(db_path, "binary", keep_xml=False)
+
+    conn = db.open_db(db_path)
+    try:
+        cursor = conn.cursor()
+        log = db.get_log_content(cursor, LOG_ID)
+        assert log is not None
+        assert dict(db.iter_log_hashes(cursor, "main")) == {
+            LOG_ID: hash_log_content(log),
+        }
+    finally:
+        conn.close()
@@ -140,6 +140,23 @@ def test_setup_table_creates_logs_table() -> None:
         conn.close()
 
 
+def test_bulk_load_restores_journal_and_sync_settings(db_path: Path) -> None:
+    conn = db.open_db(db_path)
+    try:
+        with db.bulk_load(conn):
+            assert conn.execute("PRAGMA journal_mode;").fetchone() == (
+                "memory",
+            )
+            assert conn.execute("PRAGMA synchronous;").fetchone() == (0,)
+            assert not conn.autocommit
+
+        assert conn.execute("PRAGMA journal_mode;").fetchone() == ("delete",)
+        assert conn.execute("PRAGMA synchronous;").fetchone() == (2,)
+        assert not conn.autocommit
+    finally:
+        conn.close()
+
+
 def test_setup_table_creates_fetch_state_table() -> None:
     conn = db.open_db(":memory:")
 
@@ -224,6 +241,19 @@ def test_setup_table_creates_file_index_table() -> None:
         conn.close()
 
 
+def test_setup_table_creates_round_index_table() -> None:
+    conn = db.open_db(":memory:")
+
+    try:
+        db.setup_table(conn)
+
+        cursor = conn.execute("PRAGMA table_info(round_index);")
+        columns = [row[1] for row in cursor.fetchall()]
+        assert columns == ["id", "size", "num_rounds", "offsets"]
+    finally:
+        conn.close()
+
+
 def test_setup_table_creates_logs_status_filter_index() -> None:
     conn = db.open_db(":memory:")
 
@@ -283,6 +313,33 @@ def test_insert_log_entries() -> None:
         conn.close()
 
 
+def test_insert_log_entries_accepts_iterator() -> None:
+    conn = db.open_db(":memory:")
+
+    try:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+
+        entries = (
+            db.LogEntry(
+                f"2009010100gm-00a9-0000-0000000{i}",
+                "2009-01-01",
+                4,
+                is_tonpu=False,
+                is_processed=False,
+                was_error=False,
+                log=None,
+            )
+            for i in range(3)
+        )
+
+        assert db.insert_log_entries(cursor, entries) == 3
+        cursor.execute("SELECT is_tonpu, is_processed FROM logs;")
+        assert cursor.fetchall() == [(0, 0), (0, 0), (0, 0)]
+    finally:
+        conn.close()
+
+
 def test_insert_log_entries_keeps_existing_row_on_conflict() -> None:
     conn = db.open_db(":memory:")
 
@@ -466,6 +523,25 @@ def test_iter_log_contents(conn_test_db: sqlite3.Connection) -> None:
     assert actual == expected
 
 
+def test_iter_log_contents_prefers_binary_logs(
+    conn_test_db: sqlite3.Connection,
+) -> None:
+    db.create_binary_logs_table(conn_test_db)
+    cursor = conn_test_db.cursor()
+    db.upsert_binary_log_content(
+        cursor,
+        "2013020101gm-00f1-0000-00000000",
+        b"binary log data",
+    )
+
+    assert list(db.iter_log_contents(cursor, None, None, None, 0)) == [
+        ("2013020101gm-00f1-0000-00000000", b"sample log data"),
+    ]
+    assert list(
+        db.iter_log_contents(cursor, None, None, None, 0, prefer_binary=True),
+    ) == [("2013020101gm-00f1-0000-00000000", b"binary log data")]
+
+
 def test_count_log_contents(conn_test_db: sqlite3.Connection) -> None:
     cursor = conn_test_db.cursor()
     actual = db.count_log_contents(cursor, None, None, None, 0)
@@ -524,6 +600,40 @@ def test_reset_log_content() -> None:
         conn.close()
 
 
+def test_reset_log_content_deletes_round_index() -> None:
+    conn = db.open_db(":memory:")
+
+    try:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+
+        log_id = "2009010100gm-00a9-0000-00000000"
+        db.upsert_round_index(cursor, log_id, 10, 1, b"\x00" * 8)
+        db.upsert_log_hashes(cursor, [(log_id, b"hash")])
+        db.reset_log_content(cursor, log_id)
+
+        assert db.get_round_index(cursor, log_id) is None
+        assert list(db.iter_log_hashes(cursor, "main")) == []
+    finally:
+        conn.close()
+
+
+def test_upsert_round_index_overwrites_existing_row() -> None:
+    conn = db.open_db(":memory:")
+
+    try:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+
+        log_id = "2009010100gm-00a9-0000-00000000"
+        db.upsert_round_index(cursor, log_id, 10, 1, b"old")
+        db.upsert_round_index(cursor, log_id, 20, 2, b"new")
+
+        assert db.get_round_index(cursor, log_id) == (20, 2, b"new")
+    finally:
+        conn.close()
+
+
 def test_update_fetch_attempt_time() -> None:
     conn = db.open_db(":memory:")
 
@@ -768,3 +878,100 @@ def test_insert_file_index_multiple() -> None:
         assert file_index[file2] == size2
     finally:
         conn.close()
+
+
+def test_list_changed_import_index_returns_new_and_modified_members() -> None:
+    conn = db.open_db(":memory:")
+
+    try:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+
+        member1 = "2025/scc20250512.html.gz"
+        member2 = "2025/scc20250513.html.gz"
+        member3 = "2025/scc20250514.html.gz"
+        db.insert_import_index(cursor, member1, 0x1234, 30045)
+        db.insert_import_index(cursor, member2, 0x5678, 32538)
+        db.insert_import_index(cursor, member3, 0x9ABC, 27149)
+
+        changed = db.list_changed_import_index(
+            cursor,
+            {
+                member1: (0x1234, 30045),
+                member2: (0x5679, 32538),
+                member3: (0x9ABC, 27150),
+                "2025/scc20250515.html.gz": (0, 0),
+            },
+        )
+        assert changed == {member2, member3, "2025/scc20250515.html.gz"}
+    finally:
+        conn.close()
+
+
+def test_insert_import_index_update() -> None:
+    conn = db.open_db(":memory:")
+
+    try:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+
+        member = "2025/scc20250512.html.gz"
+        db.insert_import_index(cursor, member, 1, 100)
+        db.insert_import_index(cursor, member, 2, 200)
+
+        cursor.execute("SELECT member, crc, size FROM import_index;")
+        assert cursor.fetchall() == [(member, 2, 200)]
+    finally:
+        conn.close()
+
+
+def test_list_undownloaded_log_ids_after_selects_retryable_errors() -> None:
+    conn = db.open_db(":memory:")
+
+    try:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+        entry = db.LogEntry(
+            id="2009010100gm-00a9-0000-00000000",
+            date="2009-01-01",
+            num_players=4,
+            is_tonpu=False,
+            is_processed=True,
+            was_error=True,
+            log=None,
+        )
+        ids = [f"200901010{i}gm-00a9-0000-00000000" for i in range(5)]
+        db.insert_log_entries(
+            cursor,
+            [entry._replace(id=log_id) for log_id in ids[:4]]
+            + [entry._replace(id=ids[4], is_processed=False, was_error=False)],
+        )
+        now = datetime(2025, 1, 1, tzinfo=UTC)
+        db.upsert_download_error(cursor, ids[0], "http", 503, 1, now)
+        db.upsert_download_error(
+            cursor,
+            ids[1],
+            "http",
+            503,
+            2,
+            datetime(2025, 1, 2, tzinfo=UTC),
+        )
+        db.upsert_download_error(cursor, ids[2], "not_found", 404, 1, None)
+        conn.commit()
+
+        actual = db.list_undownloaded_log_ids_after(
+            cursor,
+            None,
+            None,
+            None,
+            10,
+            now,
+        )
+        assert actual == [ids[0], ids[3]]
+        assert (
+            db.count_undownloaded_log_ids(cursor, None, None, None, now) == 2
+        )
+        assert db.get_download_error_attempts(cursor, ids[1]) == 2
+        assert db.get_download_error_attempts(cursor, ids[3]) == 0
+    finally:
+        conn.close()
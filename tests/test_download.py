@@ -2,23 +2,50 @@
 # SPDX-License-Identifier: MIT
 # This file is part of https://github.com/Apricot-S/houou-logs
 
+import gzip
+import zlib
+from contextlib import closing
+from datetime import UTC, datetime
 from pathlib import Path
 from unittest.mock import Mock, patch
 
+import niquests
 import pytest
-from niquests import Session
+from niquests import Response, Session
+from niquests.exceptions import ConnectTimeout
+from niquests.models import ReadTimeoutError
+from niquests.structures import CaseInsensitiveDict
 
+from houou_logs import db
+from houou_logs.breaker import FAILURE_THRESHOLD, CircuitBreaker
 from houou_logs.download import (
+    ERROR_HTTP,
+    ERROR_NO_CONTENT,
+    ERROR_NOT_FOUND,
+    ERROR_TRANSPORT,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    DownloadError,
     build_url,
+    classify_download_error,
     compress_log_content,
+    compute_next_attempt_time,
+    download,
+    download_log_ids,
+    fetch_log_content,
     fetch_log_content_for_download,
     iter_undownloaded_log_id_batches,
+    reuse_log_contents,
     validate_db_path,
     validate_length,
     validate_limit,
     validate_players,
 )
-from houou_logs.exceptions import UserInputError
+from houou_logs.exceptions import HTTPStatusError, UserInputError
+from houou_logs.pacing import Pacer
+from houou_logs.session import ENDPOINT_LOG, TIMEOUT, get_adaptive_timeout
+from houou_logs.storage import hash_log_content
+from tests.conftest import CreateDB
 
 
 def test_validate_db_path_when_file_exists(tmp_path: Path) -> None:
@@ -147,3 +174,474 @@ def test_compress_log_content_compress_error() -> None:
 
     assert was_error
     assert compressed_content is None
+
+
+def test_reuse_log_contents_copies_downloaded_logs(
+    tmp_path: Path,
+    create_db: CreateDB,
+) -> None:
+    entry = db.LogEntry(
+        id="2024060600gm-00b9-0000-88e70833",
+        date="2024-06-06T00:00",
+        num_players=4,
+        is_tonpu=False,
+        is_processed=False,
+        was_error=False,
+        log=None,
+    )
+    error_entry = entry._replace(id="2024060601gm-00b9-0000-88e70833")
+    target_path = tmp_path / "target.db"
+    source_path = tmp_path / "source.db"
+    create_db(
+        target_path,
+        [entry, error_entry._replace(is_processed=True, was_error=True)],
+    )
+    create_db(
+        source_path,
+        [
+            entry._replace(is_processed=True, log=b"log"),
+            error_entry._replace(is_processed=True, log=b"other"),
+        ],
+    )
+    with closing(db.open_db(source_path)) as conn, conn:
+        db.upsert_log_hashes(
+            conn.cursor(),
+            [(entry.id, b"hash"), (error_entry.id, b"other")],
+        )
+
+    assert reuse_log_contents(target_path, [source_path]) == 1
+
+    with closing(db.open_db(target_path)) as conn:
+        rows = conn.execute(
+            "SELECT is_processed, was_error, log FROM logs ORDER BY id;",
+        ).fetchall()
+        hashes = list(db.iter_log_hashes(conn.cursor(), "main"))
+    assert rows == [(1, 0, b"log"), (1, 1, None)]
+    assert hashes == [(entry.id, b"hash")]
+
+
+def test_reuse_log_contents_rejects_same_db(
+    db_path: Path,
+    create_db: CreateDB,
+) -> None:
+    create_db(db_path, [])
+
+    with pytest.raises(UserInputError, match="same DB"):
+        reuse_log_contents(db_path, [db_path])
+
+
+def read_download_states(db_path: Path) -> list[tuple[str, int, int]]:
+    with closing(db.open_db(db_path)) as conn:
+        return conn.execute(
+            "SELECT id, is_processed, was_error FROM logs ORDER BY id;",
+        ).fetchall()
+
+
+def run_download_log_ids(
+    db_path: Path,
+    log_ids: list[str],
+    fetch_results: list[bytes | Exception],
+    *,
+    wait_on_outage: bool,
+) -> int:
+    pacer = Mock(spec_set=Pacer)
+    pacer.rate = 1.0
+    breaker = CircuitBreaker()
+    with (
+        closing(db.open_db(db_path)) as conn,
+        patch(
+            "houou_logs.download.fetch_log_content",
+            side_effect=fetch_results,
+        ),
+        patch("houou_logs.breaker.time"),
+        patch("houou_logs.download.tqdm.write"),
+    ):
+        return download_log_ids(
+            conn,
+            Mock(spec_set=Session),
+            iter(log_ids),
+            Mock(),
+            pacer,
+            breaker,
+            wait_on_outage=wait_on_outage,
+        )
+
+
+DOWNLOAD_ENTRIES = [
+    db.LogEntry(
+        id=f"2024060600gm-00b9-0000-{i:08x}",
+        date="2024-06-06T00:00",
+        num_players=4,
+        is_tonpu=False,
+        is_processed=False,
+        was_error=False,
+        log=None,
+    )
+    for i in range(FAILURE_THRESHOLD + 2)
+]
+DOWNLOAD_IDS = [entry.id for entry in DOWNLOAD_ENTRIES]
+
+
+def test_download_log_ids_stops_on_outage(
+    db_path: Path,
+    create_db: CreateDB,
+) -> None:
+    create_db(db_path, DOWNLOAD_ENTRIES)
+    results: list[bytes | Exception] = [
+        HTTPStatusError(404),
+        *[HTTPStatusError(503)] * FAILURE_THRESHOLD,
+    ]
+
+    num_logs = run_download_log_ids(
+        db_path,
+        DOWNLOAD_IDS,
+        results,
+        wait_on_outage=False,
+    )
+
+    assert num_logs == 1
+    assert read_download_states(db_path) == [
+        (DOWNLOAD_IDS[0], 1, 1),
+        *[(log_id, 0, 0) for log_id in DOWNLOAD_IDS[1:]],
+    ]
+
+
+def test_download_log_ids_marks_transient_failures(
+    db_path: Path,
+    create_db: CreateDB,
+) -> None:
+    create_db(db_path, DOWNLOAD_ENTRIES[:3])
+    results: list[bytes | Exception] = [
+        HTTPStatusError(503),
+        HTTPStatusError(503),
+        b"<mjloggm></mjloggm>",
+    ]
+
+    num_logs = run_download_log_ids(
+        db_path,
+        DOWNLOAD_IDS[:3],
+        results,
+        wait_on_outage=False,
+    )
+
+    assert num_logs == 3
+    assert read_download_states(db_path) == [
+        (DOWNLOAD_IDS[0], 1, 1),
+        (DOWNLOAD_IDS[1], 1, 1),
+        (DOWNLOAD_IDS[2], 1, 0),
+    ]
+
+
+def test_download_log_ids_retries_after_outage(
+    db_path: Path,
+    create_db: CreateDB,
+) -> None:
+    create_db(db_path, DOWNLOAD_ENTRIES)
+    content = b"<mjloggm></mjloggm>"
+    results: list[bytes | Exception] = [
+        *[HTTPStatusError(503)] * (FAILURE_THRESHOLD + 1),
+        *[content] * len(DOWNLOAD_IDS),
+    ]
+
+    num_logs = run_download_log_ids(
+        db_path,
+        DOWNLOAD_IDS,
+        results,
+        wait_on_outage=True,
+    )
+
+    assert num_logs == len(DOWNLOAD_IDS)
+    assert read_download_states(db_path) == [
+        (log_id, 1, 0) for log_id in DOWNLOAD_IDS
+    ]
+
+
+@pytest.mark.parametrize(
+    ("error", "expected"),
+    [
+        (HTTPStatusError(404), DownloadError(ERROR_NOT_FOUND, 404)),
+        (HTTPStatusError(503), DownloadError(ERROR_HTTP, 503)),
+        (ConnectTimeout(), DownloadError(ERROR_TRANSPORT, None)),
+        (
+            RuntimeError("no log content in response"),
+            DownloadError(ERROR_NO_CONTENT, None),
+        ),
+    ],
+)
+def test_classify_download_error(
+    error: Exception,
+    expected: DownloadError,
+) -> None:
+    assert classify_download_error(error) == expected
+
+
+def test_compute_next_attempt_time_backs_off_transient_errors() -> None:
+    now = datetime(2025, 1, 1, tzinfo=UTC)
+
+    assert compute_next_attempt_time(ERROR_HTTP, 1, now) == (
+        now + RETRY_BASE_DELAY
+    )
+    assert compute_next_attempt_time(ERROR_HTTP, 3, now) == (
+        now + RETRY_BASE_DELAY * 4
+    )
+    assert compute_next_attempt_time(ERROR_HTTP, 100, now) == (
+        now + RETRY_MAX_DELAY
+    )
+    assert compute_next_attempt_time(ERROR_NO_CONTENT, 1, now) is None
+
+
+def read_download_errors(db_path: Path) -> list[tuple[str, str, int, int]]:
+    with closing(db.open_db(db_path)) as conn:
+        return conn.execute(
+            """
+            SELECT id, error_class, http_status, attempts
+            FROM download_errors
+            ORDER BY id;
+            """,
+        ).fetchall()
+
+
+def test_download_log_ids_records_errors(
+    db_path: Path,
+    create_db: CreateDB,
+) -> None:
+    create_db(db_path, DOWNLOAD_ENTRIES[:3])
+    results: list[bytes | Exception] = [
+        HTTPStatusError(503),
+        RuntimeError("no log content in response"),
+        b"<mjloggm></mjloggm>",
+    ]
+
+    run_download_log_ids(
+        db_path,
+        DOWNLOAD_IDS[:3],
+        results,
+        wait_on_outage=False,
+    )
+    run_download_log_ids(
+        db_path,
+        DOWNLOAD_IDS[:1],
+        [HTTPStatusError(502)],
+        wait_on_outage=False,
+    )
+
+    assert read_download_errors(db_path) == [
+        (DOWNLOAD_IDS[0], ERROR_HTTP, 502, 2),
+        (DOWNLOAD_IDS[1], ERROR_NO_CONTENT, None, 1),
+    ]
+
+
+def test_download_log_ids_clears_error_on_success(
+    db_path: Path,
+    create_db: CreateDB,
+) -> None:
+    create_db(db_path, DOWNLOAD_ENTRIES[:1])
+    run_download_log_ids(
+        db_path,
+        DOWNLOAD_IDS[:1],
+        [ConnectTimeout()],
+        wait_on_outage=False,
+    )
+
+    run_download_log_ids(
+        db_path,
+        DOWNLOAD_IDS[:1],
+        [b"<mjloggm></mjloggm>"],
+        wait_on_outage=False,
+    )
+
+    assert read_download_errors(db_path) == []
+    assert read_download_states(db_path) == [(DOWNLOAD_IDS[0], 1, 0)]
+
+
+def test_download_log_ids_keeps_content_hashes(
+    db_path: Path,
+    create_db: CreateDB,
+) -> None:
+    create_db(db_path, DOWNLOAD_ENTRIES[:1])
+    run_download_log_ids(
+        db_path,
+        DOWNLOAD_IDS[:1],
+        [b"<mjloggm></mjloggm>"],
+        wait_on_outage=False,
+    )
+
+    with closing(db.open_db(db_path)) as conn:
+        log = db.get_log_content(conn.cursor(), DOWNLOAD_IDS[0])
+        hashes = dict(db.iter_log_hashes(conn.cursor(), "main"))
+    assert log is not None
+    assert hashes == {DOWNLOAD_IDS[0]: hash_log_content(log)}
+
+    run_download_log_ids(
+        db_path,
+        DOWNLOAD_IDS[:1],
+        [ConnectTimeout()],
+        wait_on_outage=False,
+    )
+
+    with closing(db.open_db(db_path)) as conn:
+        assert list(db.iter_log_hashes(conn.cursor(), "main")) == []
+
+
+def test_download_sets_up_old_db(db_path: Path) -> None:
+    # A DB created before the 'download_errors' table existed, with
+    # entries that failed back then.
+    failed = [
+        entry._replace(is_processed=True, was_error=True)
+        for entry in DOWNLOAD_ENTRIES[:2]
+    ]
+    with closing(db.open_db(db_path)) as conn, conn:
+        db.create_logs_table(conn)
+        db.insert_log_entries(conn.cursor(), failed)
+    results: list[bytes | Exception] = [
+        b"<mjloggm></mjloggm>",
+        RuntimeError("no log content in response"),
+    ]
+
+    with (
+        patch("houou_logs.download.create_session"),
+        patch(
+            "houou_logs.download.fetch_log_content",
+            side_effect=results,
+        ),
+        patch("houou_logs.download.tqdm.write"),
+    ):
+        num_logs = download(db_path, None, None, None, retry_errors=True)
+
+    assert num_logs == 2
+    assert read_download_states(db_path) == [
+        (DOWNLOAD_IDS[0], 1, 0),
+        (DOWNLOAD_IDS[1], 1, 1),
+    ]
+    assert read_download_errors(db_path) == [
+        (DOWNLOAD_IDS[1], ERROR_NO_CONTENT, None, 1),
+    ]
+
+
+def mock_log_response(
+    content: bytes,
+    headers: dict[str, str] | None = None,
+) -> Mock:
+    res = Mock(spec=Response)
+    res.status_code = 200
+    res.headers = CaseInsensitiveDict(headers or {})
+    res.content = content
+    res.iter_raw.return_value = iter([content[:10], content[10:]])
+    return res
+
+
+LOG_CONTENT = b'<mjloggm ver="2.3"><SHUFFLE/></mjloggm>'
+URL = build_url("2024060600gm-00b9-0000-88e70833")
+
+
+def test_fetch_log_content_keeps_gzip_payload() -> None:
+    payload = gzip.compress(LOG_CONTENT)
+    session = Mock(spec_set=Session)
+    session.get.return_value = mock_log_response(
+        payload,
+        {"Content-Encoding": "gzip"},
+    )
+
+    content = fetch_log_content(session, URL)
+
+    assert content == payload
+    assert compress_log_content("", content) == (False, payload)
+    assert session.get.call_args.kwargs["stream"]
+
+
+@pytest.mark.parametrize(
+    ("payload", "error"),
+    [
+        (gzip.compress(b"<html></html>"), RuntimeError),
+        (gzip.compress(LOG_CONTENT)[:-4], EOFError),
+    ],
+)
+def test_fetch_log_content_rejects_invalid_gzip_payload(
+    payload: bytes,
+    error: type[Exception],
+) -> None:
+    session = Mock(spec_set=Session)
+    session.get.return_value = mock_log_response(
+        payload,
+        {"Content-Encoding": "gzip"},
+    )
+
+    with pytest.raises(error):
+        fetch_log_content(session, URL)
+
+
+def test_fetch_log_content_checks_plain_content() -> None:
+    session = Mock(spec_set=Session)
+    session.get.side_effect = [
+        mock_log_response(LOG_CONTENT),
+        mock_log_response(b"<html></html>"),
+    ]
+
+    assert fetch_log_content(session, URL) == LOG_CONTENT
+    with pytest.raises(RuntimeError, match="no log content"):
+        fetch_log_content(session, URL)
+
+
+@pytest.mark.parametrize("error", [EOFError(), zlib.error()])
+def test_classify_download_error_treats_broken_gzip_as_transport(
+    error: Exception,
+) -> None:
+    assert classify_download_error(error) == DownloadError(
+        ERROR_TRANSPORT,
+        None,
+    )
+
+
+def test_fetch_log_content_rejects_corrupt_gzip_payload() -> None:
+    payload = bytearray(gzip.compress(LOG_CONTENT))
+    payload[12] ^= 0xFF
+    session = Mock(spec_set=Session)
+    session.get.return_value = mock_log_response(
+        bytes(payload),
+        {"Content-Encoding": "gzip"},
+    )
+
+    with pytest.raises(zlib.error) as exc_info:
+        fetch_log_content(session, URL)
+
+    assert classify_download_error(exc_info.value).error_class == (
+        ERROR_TRANSPORT
+    )
+
+
+def test_fetch_log_content_rejects_response_without_status() -> None:
+    res = mock_log_response(LOG_CONTENT)
+    res.status_code = None
+    session = Mock(spec_set=Session)
+    session.get.return_value = res
+
+    with pytest.raises(
+        niquests.exceptions.ConnectionError,
+        match="no status code",
+    ) as exc_info:
+        fetch_log_content(session, URL)
+
+    assert classify_download_error(exc_info.value).error_class == (
+        ERROR_TRANSPORT
+    )
+
+
+def test_fetch_log_content_records_body_read_timeout() -> None:
+    res = mock_log_response(
+        gzip.compress(LOG_CONTENT),
+        {"Content-Encoding": "gzip"},
+    )
+    res.iter_raw.side_effect = niquests.exceptions.ConnectionError(
+        ReadTimeoutError(None, URL, "Read timed out."),
+    )
+    session = Mock(spec_set=Session)
+    session.get.return_value = res
+
+    with pytest.raises(niquests.exceptions.ConnectionError) as exc_info:
+        fetch_log_content(session, URL)
+
+    assert classify_download_error(exc_info.value).error_class == (
+        ERROR_TRANSPORT
+    )
+    response_times = get_adaptive_timeout(session, ENDPOINT_LOG).response_times
+    assert list(response_times) == [max(TIMEOUT)]
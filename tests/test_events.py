@@ -0,0 +1,162 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import gzip
+
+from houou_logs.binary_log import encode_log_content
+from houou_logs.events import (
+    Agari,
+    Discard,
+    Dora,
+    Draw,
+    Init,
+    Meld,
+    MeldKind,
+    Reach,
+    Ryuukyoku,
+    Shuffle,
+    decode_element,
+    decode_meld,
+    iter_events,
+    iter_events_from_chunks,
+    iter_log_events,
+)
+
+LOG = b"""<mjloggm ver="2.3">
+<SHUFFLE seed="mt19937ar-sha512-n288-base64,AAAA" ref=""/>
+<GO type="169" lobby="0"/>
+<UN n0="A" n1="B" n2="C" n3="D" dan="0,0,0,0" rate="1500,1500,1500,1500" sx="M,M,M,M"/>
+<TAIKYOKU oya="0"/>
+<INIT seed="0,0,0,2,4,52" ten="250,250,250,250" oya="0" hai0="1,2,3" hai1="4,5,6" hai2="7,8,9" hai3="10,11,12" shuffle="legacy"/>
+<T40/><D40/><U41/><E41/>
+<N who="2" m="34314"/>
+<REACH who="0" step="1"/><REACH who="0" ten="240,250,250,250" step="2"/>
+<DORA hai="33"/>
+<AGARI ba="0,1" hai="1,2,3" m="34314" machi="3" ten="30,2000,0" yaku="1,1,52,1" doraHai="52" doraHaiUra="16" who="2" fromWho="0" sc="240,-30,250,0,250,50,250,0" owari="210,-19.0,250,5.0,300,40.0,250,-26.0"/>
+</mjloggm>"""  # noqa: E501
+
+
+def test_decode_meld_chi() -> None:
+    # 1p2p3p with the first tile called from the player to the left.
+    code = ((7 * 3 + 0) << 10) | 0x4 | (1 << 3) | (2 << 5) | (3 << 7) | 3
+    assert decode_meld(0, code) == Meld(
+        0,
+        code,
+        MeldKind.CHI,
+        (37, 42, 47),
+        37,
+        3,
+    )
+
+
+def test_decode_meld_pon() -> None:
+    meld = decode_meld(2, 34314)
+    assert meld.kind == MeldKind.PON
+    assert meld.tiles == (89, 90, 91)
+    assert meld.called == 90
+    assert meld.from_who == 0
+
+
+def test_decode_meld_kakan() -> None:
+    code = ((5 * 3 + 2) << 9) | 0x10 | (1 << 5) | 1
+    meld = decode_meld(3, code)
+    assert meld.kind == MeldKind.KAKAN
+    assert meld.tiles == (20, 22, 23, 21)
+    assert meld.called == 23
+    assert meld.from_who == 0
+
+
+def test_decode_meld_minkan_and_ankan() -> None:
+    minkan = decode_meld(1, (5 << 8) | 2)
+    assert minkan.kind == MeldKind.MINKAN
+    assert minkan.tiles == (4, 5, 6, 7)
+    assert minkan.called == 5
+    assert minkan.from_who == 3
+
+    ankan = decode_meld(1, 5 << 8)
+    assert ankan.kind == MeldKind.ANKAN
+    assert ankan.called == -1
+    assert ankan.from_who == 1
+
+
+def test_decode_meld_nuki() -> None:
+    meld = decode_meld(1, (120 << 8) | 0x20)
+    assert meld.kind == MeldKind.NUKI
+    assert meld.tiles == (120,)
+
+
+def test_decode_element_skips_non_round_tags() -> None:
+    assert decode_element("mjloggm", {"ver": "2.3"}) is None
+    assert decode_element("TAIKYOKU", {"oya": "0"}) is None
+    assert decode_element("BYE", {"who": "1"}) is None
+
+
+def test_decode_element_ryuukyoku() -> None:
+    event = decode_element(
+        "RYUUKYOKU",
+        {
+            "ba": "1,2",
+            "sc": "250,15,250,-15,250,15,250,-15",
+            "hai0": "1,2",
+            "hai2": "",
+        },
+    )
+    assert event == Ryuukyoku(
+        honba=1,
+        riichi=2,
+        kind=None,
+        sc=(250, 15, 250, -15, 250, 15, 250, -15),
+        hands=((1, 2), None, (), None),
+        owari=None,
+    )
+
+
+def test_iter_events_decodes_round() -> None:
+    shuffle, *events = iter_events(LOG)
+
+    assert shuffle == Shuffle("mt19937ar-sha512-n288-base64,AAAA")
+    assert events[0] == Init(
+        round=0,
+        honba=0,
+        riichi=0,
+        dice=(2, 4),
+        dora_indicator=52,
+        ten=(250, 250, 250, 250),
+        oya=0,
+        hands=((1, 2, 3), (4, 5, 6), (7, 8, 9), (10, 11, 12)),
+    )
+    assert events[1:5] == [
+        Draw(0, 40),
+        Discard(0, 40),
+        Draw(1, 41),
+        Discard(1, 41),
+    ]
+    assert isinstance(events[5], Meld)
+    assert events[6:9] == [
+        Reach(0, 1, ()),
+        Reach(0, 2, (240, 250, 250, 250)),
+        Dora(33),
+    ]
+    agari = events[9]
+    assert isinstance(agari, Agari)
+    assert agari.yaku == ((1, 1), (52, 1))
+    assert agari.ten == (30, 2000, 0)
+    assert agari.owari == (210, -19.0, 250, 5.0, 300, 40.0, 250, -26.0)
+    assert agari.pao_who is None
+    assert len(events) == 10
+
+
+def test_iter_events_from_chunks_accepts_split_tags() -> None:
+    chunks = [LOG[i : i + 7] for i in range(0, len(LOG), 7)]
+    assert list(iter_events_from_chunks(chunks)) == list(iter_events(LOG))
+
+
+def test_iter_log_events_reads_compressed_blob() -> None:
+    events = list(iter_log_events(gzip.compress(LOG)))
+    assert events == list(iter_events(LOG))
+
+
+def test_iter_log_events_reads_binary_blob() -> None:
+    events = list(iter_log_events(encode_log_content(LOG)))
+    assert events == list(iter_events(LOG))
@@ -2,9 +2,11 @@
 # SPDX-License-Identifier: MIT
 # This file is part of https://github.com/Apricot-S/houou-logs
 
+import gzip
+from collections.abc import Iterator
 from datetime import UTC, datetime
 from pathlib import Path
-from unittest.mock import Mock
+from unittest.mock import MagicMock, Mock
 
 import pytest
 from niquests import Response, Session
@@ -14,11 +16,17 @@ from houou_logs import db
 from houou_logs import fetch as fetch_module
 from houou_logs.fetch import (
     fetch_file_index_text,
-    fetch_log_file_content,
     filter_houou_files,
+    iter_log_file_chunks,
+    iter_log_file_content,
     parse_file_index,
     should_fetch,
 )
+from houou_logs.http_cache import (
+    STREAM_CHUNK_SIZE,
+    read_cached_content,
+    write_cached_content,
+)
 
 
 @pytest.mark.parametrize(
@@ -63,24 +71,28 @@ def test_fetch_file_index_text_error() -> None:
         fetch_file_index_text(mock_session, fake_url)
 
 
-def test_fetch_log_file_content_success() -> None:
+def test_iter_log_file_content_streams_chunks() -> None:
     fake_url = "https://example.com/scc20250101.html.gz"
-    fake_content = b"content"
 
     mock_session = Mock(spec_set=Session)
     mock_resp = Mock(spec_set=Response)
-    mock_resp.content = fake_content
     mock_resp.raise_for_status.return_value = None
+    mock_resp.iter_content.return_value = iter([b"con", b"tent"])
     mock_session.get.return_value = mock_resp
 
-    result = fetch_log_file_content(mock_session, fake_url)
+    result = list(iter_log_file_content(mock_session, fake_url))
 
-    mock_session.get.assert_called_once_with(fake_url, timeout=(5.0, 5.0))
+    mock_session.get.assert_called_once_with(
+        fake_url,
+        timeout=(5.0, 5.0),
+        stream=True,
+    )
     mock_resp.raise_for_status.assert_called_once()
-    assert result == fake_content
+    mock_resp.close.assert_called_once()
+    assert result == [b"con", b"tent"]
 
 
-def test_fetch_log_file_content_http_error() -> None:
+def test_iter_log_file_content_http_error() -> None:
     fake_url = "https://example.com/scc20250101.html.gz"
 
     mock_session = Mock(spec_set=Session)
@@ -89,20 +101,8 @@ def test_fetch_log_file_content_http_error() -> None:
     mock_session.get.return_value = mock_resp
 
     with pytest.raises(HTTPError):
-        fetch_log_file_content(mock_session, fake_url)
-
-
-def test_fetch_log_file_content_none() -> None:
-    fake_url = "https://example.com/scc20250101.html.gz"
-
-    mock_session = Mock(spec_set=Session)
-    mock_resp = Mock(spec_set=Response)
-    mock_resp.content = None
-    mock_resp.raise_for_status.return_value = None
-    mock_session.get.return_value = mock_resp
-
-    with pytest.raises(RuntimeError, match="response content is None"):
-        fetch_log_file_content(mock_session, fake_url)
+        list(iter_log_file_content(mock_session, fake_url))
+    mock_resp.close.assert_called_once()
 
 
 @pytest.mark.parametrize(
@@ -286,3 +286,86 @@ def test_fetch_updates_attempt_time_before_file_index_request(
         assert last_attempt_time == fixed_now
     finally:
         conn.close()
+
+
+def test_iter_log_file_chunks_uses_cache_with_listed_size(
+    tmp_path: Path,
+) -> None:
+    url = "https://example.com/scc20250101.html.gz"
+    content = b"x" * (STREAM_CHUNK_SIZE + 1)
+    write_cached_content(tmp_path, url, content, {})
+    mock_session = Mock(spec_set=Session)
+
+    actual = list(
+        iter_log_file_chunks(mock_session, url, len(content), tmp_path),
+    )
+
+    # The cached file is streamed in chunks, not read at once.
+    assert actual == [content[:STREAM_CHUNK_SIZE], content[STREAM_CHUNK_SIZE:]]
+    mock_session.get.assert_not_called()
+
+
+def test_iter_log_file_chunks_refetches_cache_with_other_size(
+    tmp_path: Path,
+) -> None:
+    url = "https://example.com/scc20250101.html.gz"
+    write_cached_content(tmp_path, url, b"old", {})
+    mock_session = Mock(spec_set=Session)
+    mock_resp = Mock(spec=Response)
+    mock_resp.status_code = 200
+    mock_resp.iter_content.return_value = iter([b"con", b"tent"])
+    mock_resp.headers = {}
+    mock_session.get.return_value = mock_resp
+
+    actual = list(iter_log_file_chunks(mock_session, url, 7, tmp_path))
+
+    assert actual == [b"con", b"tent"]
+    assert read_cached_content(tmp_path, url) == b"content"
+
+
+def test_fetch_inserts_streamed_files(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    db_path = tmp_path / "archive.db"
+    files = {
+        "2009/scc20090201.html.gz": gzip.compress(
+            b'00:00 | 07 | x | log=2009020100gm-00a9-0000-00000000">\n',
+        ),
+        "2009/scc20090202.html.gz": gzip.compress(
+            b'00:00 | 07 | x | log=2009020200gm-00a9-0000-00000000">\n',
+        ),
+    }
+    file_index = ", ".join(
+        f"{{file:'{name}',size:{len(content)}}}"
+        for name, content in files.items()
+    )
+    monkeypatch.setattr(fetch_module, "create_session", MagicMock())
+    monkeypatch.setattr(
+        fetch_module,
+        "fetch_file_index_text",
+        Mock(return_value=f"list([{file_index}]);"),
+    )
+
+    def iter_chunks(
+        _session: Session,
+        url: str,
+        _size: int,
+        _cache_dir: Path | None,
+    ) -> Iterator[bytes]:
+        content = files[url.removeprefix(fetch_module.LOG_DOWNLOAD_URL)]
+        for i in range(0, len(content), 5):
+            yield content[i : i + 5]
+
+    monkeypatch.setattr(fetch_module, "iter_log_file_chunks", iter_chunks)
+
+    assert fetch_module.fetch(db_path, archive=True) == 2
+
+    conn = db.open_db(db_path)
+    try:
+        cursor = conn.cursor()
+        assert db.count_all_ids(cursor) == 2
+        sizes = {name: len(content) for name, content in files.items()}
+        assert db.list_changed_file_index(cursor, sizes) == {}
+    finally:
+        conn.close()
@@ -0,0 +1,134 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+from niquests import Response, Session
+from niquests.exceptions import HTTPError
+from niquests.structures import CaseInsensitiveDict
+
+from houou_logs.http_cache import (
+    fetch_cached_content,
+    get_cached_content_size,
+    iter_cached_body,
+    iter_cached_content,
+    read_cache_validators,
+    read_cached_content,
+    write_cached_content,
+)
+from houou_logs.session import ENDPOINT_LOG_FILE
+
+URL = "https://example.com/scc20250101.html.gz"
+
+
+def mock_response(
+    status_code: int,
+    content: bytes | None = None,
+    headers: dict[str, str] | None = None,
+) -> Mock:
+    res = Mock(spec=Response)
+    res.status_code = status_code
+    res.iter_content.return_value = iter([content] if content else [])
+    res.headers = CaseInsensitiveDict(headers or {})
+    if status_code >= 400:
+        res.raise_for_status.side_effect = HTTPError(str(status_code))
+    else:
+        res.raise_for_status.return_value = None
+    return res
+
+
+def fetch_log_file(session: Mock, cache_dir: Path) -> bytes:
+    return fetch_cached_content(
+        session,
+        URL,
+        cache_dir,
+        endpoint=ENDPOINT_LOG_FILE,
+    )
+
+
+def test_fetch_cached_content_revalidates_cached_response(
+    tmp_path: Path,
+) -> None:
+    session = Mock(spec_set=Session)
+    session.get.side_effect = [
+        mock_response(
+            200,
+            b"content",
+            {
+                "etag": '"abc"',
+                "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT",
+            },
+        ),
+        mock_response(304),
+    ]
+
+    assert fetch_log_file(session, tmp_path) == b"content"
+    assert fetch_log_file(session, tmp_path) == b"content"
+
+    assert session.get.call_args_list[0].kwargs["headers"] == {}
+    assert session.get.call_args_list[1].kwargs["headers"] == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT",
+    }
+
+
+def test_fetch_cached_content_replaces_changed_response(
+    tmp_path: Path,
+) -> None:
+    session = Mock(spec_set=Session)
+    session.get.side_effect = [
+        mock_response(200, b"old", {"ETag": '"1"'}),
+        mock_response(200, b"new"),
+    ]
+
+    fetch_log_file(session, tmp_path)
+    assert fetch_log_file(session, tmp_path) == b"new"
+
+    assert read_cached_content(tmp_path, URL) == b"new"
+    assert read_cache_validators(tmp_path, URL) == {}
+
+
+def test_fetch_cached_content_keeps_cache_on_error(tmp_path: Path) -> None:
+    session = Mock(spec_set=Session)
+    session.get.side_effect = [
+        mock_response(200, b"content", {"ETag": '"1"'}),
+        mock_response(503),
+    ]
+
+    fetch_log_file(session, tmp_path)
+    with pytest.raises(HTTPError):
+        fetch_log_file(session, tmp_path)
+
+    assert read_cached_content(tmp_path, URL) == b"content"
+    assert read_cache_validators(tmp_path, URL) == {"If-None-Match": '"1"'}
+
+
+def test_iter_cached_body_streams_chunks(tmp_path: Path) -> None:
+    write_cached_content(tmp_path, URL, b"content", {})
+
+    assert get_cached_content_size(tmp_path, URL) == 7
+    assert list(iter_cached_body(tmp_path, URL, 3)) == [b"con", b"ten", b"t"]
+    assert get_cached_content_size(tmp_path, URL + "?old") is None
+
+
+def test_iter_cached_content_streams_not_modified_body(
+    tmp_path: Path,
+) -> None:
+    write_cached_content(tmp_path, URL, b"content", {"ETag": '"1"'})
+    session = Mock(spec_set=Session)
+    session.get.return_value = mock_response(304)
+
+    actual = list(
+        iter_cached_content(
+            session,
+            URL,
+            tmp_path,
+            3,
+            endpoint=ENDPOINT_LOG_FILE,
+        ),
+    )
+
+    assert actual == [b"con", b"ten", b"t"]
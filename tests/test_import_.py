@@ -2,14 +2,33 @@
 # SPDX-License-Identifier: MIT
 # This file is part of https://github.com/Apricot-S/houou-logs
 
+import sqlite3
 from pathlib import Path
+from typing import Any
 from unittest.mock import MagicMock
 from zipfile import ZipFile, ZipInfo
 
 import pytest
 
+from houou_logs import db
+from houou_logs import import_ as import_module
 from houou_logs.exceptions import UserInputError
-from houou_logs.import_ import iter_houou_archive_files, validate_archive
+from houou_logs.import_ import (
+    collect_archive_paths,
+    import_,
+    iter_houou_archive_files,
+    validate_archive,
+)
+
+
+def write_archive(path: Path, log_ids: dict[str, list[str]]) -> None:
+    with ZipFile(path, "w") as zf:
+        for member_name, ids in log_ids.items():
+            lines = [
+                f'00:{i:02} | 14 | <a href="http://tenhou.net/0/?log={log_id}">'
+                for i, log_id in enumerate(ids)
+            ]
+            zf.writestr(member_name, "\n".join(lines))
 
 
 def test_validate_archive_raises_if_file_not_found() -> None:
@@ -67,3 +86,210 @@ def test_iter_houou_archive_files_yields_matching_files() -> None:
 
     result = list(iter_houou_archive_files(zf))
     assert result == [mock_info]
+
+
+def test_collect_archive_paths_expands_directories(tmp_path: Path) -> None:
+    archive_dir = tmp_path / "raw"
+    archive_dir.mkdir()
+    write_archive(archive_dir / "scraw2010.zip", {})
+    write_archive(archive_dir / "scraw2009.zip", {})
+    (archive_dir / "notes.txt").write_text("not an archive")
+    single = tmp_path / "scraw2011.zip"
+    write_archive(single, {})
+
+    assert collect_archive_paths([single, archive_dir]) == [
+        single,
+        archive_dir / "scraw2009.zip",
+        archive_dir / "scraw2010.zip",
+    ]
+
+
+def test_collect_archive_paths_raises_for_empty_directory(
+    tmp_path: Path,
+) -> None:
+    with pytest.raises(UserInputError):
+        collect_archive_paths([tmp_path])
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_import_reads_multiple_archives(
+    db_path: Path,
+    tmp_path: Path,
+    jobs: int,
+) -> None:
+    first = tmp_path / "scraw2009.zip"
+    second = tmp_path / "scraw2010.zip"
+    write_archive(
+        first,
+        {
+            "2009/scc20091231.html": ["2009123100gm-00a9-0000-00000001"],
+            "2009/readme.txt": ["2009123100gm-00a9-0000-00000009"],
+        },
+    )
+    write_archive(
+        second,
+        {
+            "2010/scc20100101.html": [
+                "2010010100gm-00e1-0000-00000002",
+                "2010010100gm-00b9-0000-00000003",
+            ],
+        },
+    )
+
+    assert import_(db_path, [first, second], jobs=jobs) == 3
+
+    conn = db.open_db(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM logs ORDER BY id ASC;")
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    assert rows == [
+        ("2009123100gm-00a9-0000-00000001",),
+        ("2010010100gm-00b9-0000-00000003",),
+        ("2010010100gm-00e1-0000-00000002",),
+    ]
+
+
+def test_import_bulk_rebuilds_index(db_path: Path, tmp_path: Path) -> None:
+    archive = tmp_path / "scraw2009.zip"
+    write_archive(
+        archive,
+        {
+            "2009/scc20091231.html": [
+                "2009123100gm-00a9-0000-00000002",
+                "2009123100gm-00a9-0000-00000001",
+            ],
+        },
+    )
+
+    assert import_(db_path, [archive], bulk=True) == 2
+
+    conn = db.open_db(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM logs;")
+        num_rows = cursor.fetchone()[0]
+        cursor.execute(
+            """
+            SELECT name
+            FROM sqlite_master
+            WHERE type = 'index' AND name = 'idx_logs_status_filter';
+            """,
+        )
+        index = cursor.fetchone()
+        cursor.execute("PRAGMA journal_mode;")
+        journal_mode = cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+    assert num_rows == 2
+    assert index is not None
+    assert journal_mode == "delete"
+
+
+def test_import_bulk_rolls_back_on_failure(
+    db_path: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    archive = tmp_path / "scraw2009.zip"
+    write_archive(
+        archive,
+        {
+            "2009/scc20091231.html": [
+                f"2009123100gm-00a9-0000-{i:08x}" for i in range(1000)
+            ],
+        },
+    )
+
+    open_db = db.open_db
+
+    def open_db_with_small_cache(db_path: Path) -> sqlite3.Connection:
+        # Makes the load spill pages to the file before it fails.
+        conn = open_db(db_path)
+        conn.execute("PRAGMA cache_size = 1;")
+        return conn
+
+    monkeypatch.setattr(import_module.db, "open_db", open_db_with_small_cache)
+    insert_archive_members = import_module.insert_archive_members
+
+    def insert_and_fail(*args: Any, **kwargs: Any) -> int:  # noqa: ANN401
+        insert_archive_members(*args, **kwargs)
+        msg = "failed"
+        raise RuntimeError(msg)
+
+    monkeypatch.setattr(
+        import_module,
+        "insert_archive_members",
+        insert_and_fail,
+    )
+    with pytest.raises(RuntimeError, match="failed"):
+        import_(db_path, [archive], bulk=True)
+
+    conn = db.open_db(db_path)
+    try:
+        num_rows = conn.execute("SELECT COUNT(*) FROM logs;").fetchone()[0]
+        integrity = conn.execute("PRAGMA integrity_check;").fetchall()
+        index = conn.execute(
+            """
+            SELECT name
+            FROM sqlite_master
+            WHERE type = 'index' AND name = 'idx_logs_status_filter';
+            """,
+        ).fetchone()
+    finally:
+        conn.close()
+
+    assert num_rows == 0
+    assert integrity == [("ok",)]
+    assert index is not None
+
+
+def test_import_bulk_rejects_non_empty_db(
+    db_path: Path,
+    tmp_path: Path,
+) -> None:
+    archive = tmp_path / "scraw2009.zip"
+    write_archive(
+        archive,
+        {"2009/scc20091231.html": ["2009123100gm-00a9-0000-00000001"]},
+    )
+    import_(db_path, [archive])
+
+    with pytest.raises(UserInputError):
+        import_(db_path, [archive], bulk=True)
+
+
+def test_import_skips_unchanged_members(
+    db_path: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    archive = tmp_path / "scraw2009.zip"
+    members = {
+        "2009/scc20091230.html": ["2009123000gm-00a9-0000-00000001"],
+        "2009/scc20091231.html": ["2009123100gm-00a9-0000-00000002"],
+    }
+    write_archive(archive, members)
+    assert import_(db_path, [archive]) == 2
+
+    # The archive is updated with a new day and a modified day.
+    members["2009/scc20091231.html"].append("2009123101gm-00a9-0000-00000003")
+    members["2010/scc20100101.html"] = ["2010010100gm-00a9-0000-00000004"]
+    write_archive(archive, members)
+
+    parsed: list[str] = []
+    original = import_module.extract_archive_member_entries
+
+    def spy(archive_path: Path, member_name: str) -> list[db.LogEntry]:
+        parsed.append(member_name)
+        return original(archive_path, member_name)
+
+    monkeypatch.setattr(import_module, "extract_archive_member_entries", spy)
+
+    assert import_(db_path, [archive]) == 3
+    assert parsed == ["2009/scc20091231.html", "2010/scc20100101.html"]
+    assert import_(db_path, [archive]) == 0
@@ -0,0 +1,172 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import gzip
+import io
+import tarfile
+from pathlib import Path
+
+import pytest
+
+from houou_logs import db
+from houou_logs.exceptions import UserInputError
+from houou_logs.ingest import ingest, parse_log_filename, validate_source
+from houou_logs.storage import hash_log_content
+from tests.conftest import CreateDB
+
+LOG = b'<mjloggm ver="2.3"></mjloggm>'
+XML_ID = "2009020112gm-00a9-0000-00000001"
+GZ_ID = "2013020123gm-00b1-0000-00000002"
+
+
+def read_rows(db_path: Path) -> list[tuple]:
+    conn = db.open_db(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT id, date, num_players, is_tonpu, is_processed, was_error,
+                log
+            FROM logs
+            ORDER BY id ASC;
+            """,
+        )
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def test_parse_log_filename() -> None:
+    assert parse_log_filename(f"xml/{XML_ID}.xml") == (XML_ID, False)
+    assert parse_log_filename(f"{GZ_ID}.xml.gz") == (GZ_ID, True)
+    assert parse_log_filename("notes.txt") is None
+    assert parse_log_filename("archive.gz") is None
+
+
+def test_validate_source_rejects_other_files(tmp_path: Path) -> None:
+    path = tmp_path / "data.zip"
+    path.write_bytes(b"not a tar")
+
+    with pytest.raises(UserInputError):
+        validate_source(path)
+
+    with pytest.raises(UserInputError):
+        validate_source(tmp_path / "missing")
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_ingest_directory(db_path: Path, tmp_path: Path, jobs: int) -> None:
+    source = tmp_path / "xml"
+    (source / "sub").mkdir(parents=True)
+    (source / f"{XML_ID}.xml").write_bytes(LOG)
+    (source / "sub" / f"{GZ_ID}.xml.gz").write_bytes(gzip.compress(LOG))
+    (source / "invalid.xml").write_bytes(LOG)
+    (source / "2009020112gm-00a9-0000-00000003.xml.gz").write_bytes(LOG)
+    (source / "README.md").write_text("not a log")
+
+    assert ingest(db_path, source, jobs=jobs) == 2
+
+    rows = read_rows(db_path)
+    assert [row[:6] for row in rows] == [
+        (XML_ID, "2009-02-01T12:00", 4, 0, 1, 0),
+        (GZ_ID, "2013-02-01T23:00", 3, 1, 1, 0),
+    ]
+    assert [gzip.decompress(row[6]) for row in rows] == [LOG, LOG]
+
+
+def test_ingest_rejects_invalid_logs(
+    db_path: Path,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    compressed = gzip.compress(LOG)
+    source = tmp_path / "xml"
+    source.mkdir()
+    (source / "2009020112gm-00a9-0000-00000001.xml").write_bytes(
+        b"<html>Error</html>",
+    )
+    (source / "2009020112gm-00a9-0000-00000002.xml.gz").write_bytes(
+        compressed[:-8],
+    )
+    (source / "2009020112gm-00a9-0000-00000003.xml.gz").write_bytes(
+        compressed[:10] + bytes(len(compressed) - 10),
+    )
+    (source / "2009020112gm-00a9-0000-00000004.xml.gz").write_bytes(
+        gzip.compress(b"<html>Error</html>"),
+    )
+
+    assert ingest(db_path, source) == 0
+    assert read_rows(db_path) == []
+
+    out = capsys.readouterr().out
+    assert "00000001.xml: no log content in file" in out
+    assert "00000002.xml.gz: compressed file ended" in out
+    assert "00000003.xml.gz: " in out
+    assert "00000004.xml.gz: no log content in file" in out
+
+
+def test_ingest_tar(db_path: Path, tmp_path: Path) -> None:
+    source = tmp_path / "xml.tar.gz"
+    with tarfile.open(source, "w:gz") as tar:
+        for name, data in [
+            (f"xml/{XML_ID}.xml", LOG),
+            (f"xml/{GZ_ID}.xml.gz", gzip.compress(LOG)),
+        ]:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+    assert ingest(db_path, source) == 2
+    assert [row[0] for row in read_rows(db_path)] == [XML_ID, GZ_ID]
+
+
+def test_ingest_keeps_downloaded_content(
+    db_path: Path,
+    tmp_path: Path,
+    create_db: CreateDB,
+) -> None:
+    create_db(
+        db_path,
+        [
+            db.LogEntry(
+                XML_ID,
+                "2009-02-01T12:34",
+                4,
+                is_tonpu=False,
+                is_processed=False,
+                was_error=False,
+                log=None,
+            ),
+            db.LogEntry(
+                GZ_ID,
+                "2013-02-01T23:45",
+                3,
+                is_tonpu=True,
+                is_processed=True,
+                was_error=False,
+                log=b"downloaded",
+            ),
+        ],
+    )
+
+    source = tmp_path / "xml"
+    source.mkdir()
+    (source / f"{XML_ID}.xml").write_bytes(LOG)
+    (source / f"{GZ_ID}.xml").write_bytes(LOG)
+
+    assert ingest(db_path, source) == 1
+
+    rows = read_rows(db_path)
+    assert rows[0][1:5] == ("2009-02-01T12:34", 4, 0, 1)
+    assert gzip.decompress(rows[0][6]) == LOG
+    assert rows[1][6] == b"downloaded"
+
+    conn = db.open_db(db_path)
+    try:
+        hashes = dict(db.iter_log_hashes(conn.cursor(), "main"))
+    finally:
+        conn.close()
+    # The kept content was not ingested, so it is not given the hash of
+    # the ingested file.
+    assert hashes == {XML_ID: hash_log_content(rows[0][6])}
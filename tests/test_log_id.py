@@ -2,14 +2,17 @@
 # SPDX-License-Identifier: MIT
 # This file is part of https://github.com/Apricot-S/houou-logs
 
+import gzip
+import io
 from pathlib import Path
 
 import pytest
 
+from houou_logs import log_id
 from houou_logs.db import LogEntry
 from houou_logs.log_id import (
-    extract_ids,
-    extract_log_entries,
+    iter_log_entries,
+    iter_log_entries_from_chunks,
     parse_date,
     parse_id,
     parse_type,
@@ -23,21 +26,14 @@ MOCK_LOG = """
 """  # noqa: E501
 
 
-def test_extract_ids_empty_text() -> None:
-    assert extract_ids("") == []
+def test_iter_log_entries_empty_file() -> None:
+    assert list(iter_log_entries("scc20090201.html", io.BytesIO(b""))) == []
 
 
-def test_extract_ids_no_match() -> None:
+def test_iter_log_entries_no_match() -> None:
     log = "L1000 | 21:37 | 四般南－－ | NoName(+48) NoName(+13) NoName(-25) NoName(-36)"  # noqa: E501, RUF001
-    assert extract_ids(log) == []
-
-
-def test_extract_ids_multiple_matches() -> None:
-    ids = [
-        ("00:00", "2009020100gm-00a9-0000-00000000"),
-        ("23:02", "2009020123gm-00a9-0000-00000001"),
-    ]
-    assert extract_ids(MOCK_LOG) == ids
+    entries = iter_log_entries("scc20090201.html", io.BytesIO(log.encode()))
+    assert list(entries) == []
 
 
 def test_parse_date() -> None:
@@ -69,35 +65,35 @@ def test_parse_id_rejects_invalid_log_id() -> None:
         parse_id("00:00", invalid_log_id)
 
 
-def test_extract_log_entries_skips_extension_log(tmp_path: Path) -> None:
+def test_iter_log_entries_skips_extension_log(tmp_path: Path) -> None:
     filename = "not_html.log"
     fake_file = tmp_path / filename
     fake_file.write_bytes(b"not a html")
 
     with fake_file.open(mode="br") as f:
-        entries = extract_log_entries(filename, f)
+        entries = list(iter_log_entries(filename, f))
 
     assert entries == []
 
 
-def test_extract_log_entries_skips_extension_log_gz(tmp_path: Path) -> None:
+def test_iter_log_entries_skips_extension_log_gz(tmp_path: Path) -> None:
     filename = "not_html.log.gz"
     fake_file = tmp_path / filename
     fake_file.write_bytes(b"not a html")
 
     with fake_file.open(mode="br") as f:
-        entries = extract_log_entries(filename, f)
+        entries = list(iter_log_entries(filename, f))
 
     assert entries == []
 
 
-def test_extract_log_entries_parse_extension_html(tmp_path: Path) -> None:
+def test_iter_log_entries_parse_extension_html(tmp_path: Path) -> None:
     filename = "valid_log.html"
     fake_file = tmp_path / filename
     fake_file.write_text(MOCK_LOG, encoding="utf-8")
 
     with fake_file.open(mode="br") as f:
-        entries = extract_log_entries(filename, f)
+        entries = list(iter_log_entries(filename, f))
 
     expected = [
         LogEntry(
@@ -122,7 +118,7 @@ def test_extract_log_entries_parse_extension_html(tmp_path: Path) -> None:
     assert entries == expected
 
 
-def test_extract_log_entries_skips_invalid_log_id(tmp_path: Path) -> None:
+def test_iter_log_entries_skips_invalid_log_id(tmp_path: Path) -> None:
     filename = "valid_log.html"
     fake_file = tmp_path / filename
     log = """
@@ -132,7 +128,7 @@ def test_extract_log_entries_skips_invalid_log_id(tmp_path: Path) -> None:
     fake_file.write_text(log, encoding="utf-8")
 
     with fake_file.open(mode="br") as f:
-        entries = extract_log_entries(filename, f)
+        entries = list(iter_log_entries(filename, f))
 
     assert entries == [
         LogEntry(
@@ -145,3 +141,70 @@ def test_extract_log_entries_skips_invalid_log_id(tmp_path: Path) -> None:
             log=None,
         ),
     ]
+
+
+def test_iter_log_entries_streams_gzip_across_chunks(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(log_id, "READ_CHUNK_SIZE", 16)
+    content = gzip.compress(MOCK_LOG.encode("utf-8"))
+
+    with io.BytesIO(content) as f:
+        rows = list(iter_log_entries("scc20090201.html.gz", f))
+
+    assert [row[0] for row in rows] == [
+        "2009020100gm-00a9-0000-00000000",
+        "2009020123gm-00a9-0000-00000001",
+    ]
+
+
+def test_iter_log_entries_decodes_type() -> None:
+    log = (
+        b'12:34 | <a href="http://tenhou.net/0/?log=2013020112gm-00b1-0000-0000abcd">'
+        b"\n"
+    )
+
+    with io.BytesIO(log) as f:
+        rows = list(iter_log_entries("scc20130201.html", f))
+
+    assert rows == [
+        LogEntry(
+            id="2013020112gm-00b1-0000-0000abcd",
+            date="2013-02-01T12:34",
+            num_players=3,
+            is_tonpu=True,
+            is_processed=False,
+            was_error=False,
+            log=None,
+        ),
+    ]
+
+
+def test_iter_log_entries_from_chunks_reads_split_gzip_members() -> None:
+    content = MOCK_LOG.encode()
+    middle = len(content) // 2
+    compressed = gzip.compress(content[:middle]) + gzip.compress(
+        content[middle:],
+    )
+    chunks = [compressed[i : i + 7] for i in range(0, len(compressed), 7)]
+
+    entries = list(
+        iter_log_entries_from_chunks("scc20090201.html.gz", chunks),
+    )
+
+    assert [entry.id for entry in entries] == [
+        "2009020100gm-00a9-0000-00000000",
+        "2009020123gm-00a9-0000-00000001",
+    ]
+
+
+def test_iter_log_entries_from_chunks_rejects_truncated_gzip() -> None:
+    compressed = gzip.compress(MOCK_LOG.encode())
+
+    with pytest.raises(EOFError):
+        list(
+            iter_log_entries_from_chunks(
+                "scc20090201.html.gz",
+                [compressed[:-4]],
+            ),
+        )
@@ -0,0 +1,238 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+from contextlib import closing
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pytest
+
+from houou_logs import db
+from houou_logs.exceptions import UserInputError
+from houou_logs.merge import get_id_range, merge, split
+from tests.conftest import CreateDB
+
+ENTRY = db.LogEntry(
+    id="2024060600gm-00a9-0000-00000000",
+    date="2024-06-06T00:00",
+    num_players=4,
+    is_tonpu=False,
+    is_processed=False,
+    was_error=False,
+    log=None,
+)
+
+
+def read_logs(db_path: Path) -> list[tuple]:
+    with closing(db.open_db(db_path)) as conn:
+        return conn.execute(
+            "SELECT id, is_processed, was_error, log FROM logs ORDER BY id;",
+        ).fetchall()
+
+
+def has_status_filter_index(db_path: Path) -> bool:
+    with closing(db.open_db(db_path)) as conn:
+        row = conn.execute(
+            """
+            SELECT name FROM sqlite_master
+            WHERE name = 'idx_logs_status_filter';
+            """,
+        ).fetchone()
+    return row is not None
+
+
+def test_merge_keeps_downloaded_contents(
+    tmp_path: Path,
+    create_db: CreateDB,
+) -> None:
+    other = ENTRY._replace(id="2024060601gm-00a9-0000-00000000")
+    dst_path = tmp_path / "dst.db"
+    src_path = tmp_path / "src.db"
+    create_db(dst_path, [ENTRY, other._replace(is_processed=True, log=b"a")])
+    create_db(
+        src_path,
+        [
+            ENTRY._replace(is_processed=True, log=b"b"),
+            other._replace(is_processed=True, was_error=True),
+            ENTRY._replace(id="2025010100gm-00a9-0000-00000000"),
+        ],
+    )
+    with closing(db.open_db(src_path)) as conn, conn:
+        cursor = conn.cursor()
+        db.insert_file_index(cursor, "2024/scc20240606.html.gz", 10)
+        db.update_fetch_attempt_time(
+            cursor,
+            "latest",
+            datetime(2024, 6, 6, tzinfo=UTC),
+        )
+        db.upsert_round_index(cursor, ENTRY.id, 1, 0, b"")
+
+    assert merge(dst_path, [src_path]) == 2
+
+    assert read_logs(dst_path) == [
+        (ENTRY.id, 1, 0, b"b"),
+        (other.id, 1, 0, b"a"),
+        ("2025010100gm-00a9-0000-00000000", 0, 0, None),
+    ]
+    with closing(db.open_db(dst_path)) as conn:
+        cursor = conn.cursor()
+        assert db.get_round_index(cursor, ENTRY.id) == (1, 0, b"")
+        fetch_time = db.get_fetch_attempt_time(cursor, "latest")
+        changed = db.list_changed_file_index(
+            cursor,
+            {"2024/scc20240606.html.gz": 10},
+        )
+    assert fetch_time == datetime(2024, 6, 6, tzinfo=UTC)
+    assert changed == {}
+    assert has_status_filter_index(dst_path)
+
+
+def test_merge_copies_hashes_of_copied_contents(
+    tmp_path: Path,
+    create_db: CreateDB,
+) -> None:
+    other = ENTRY._replace(id="2024060601gm-00a9-0000-00000000")
+    dst_path = tmp_path / "dst.db"
+    src_path = tmp_path / "src.db"
+    create_db(dst_path, [ENTRY, other._replace(is_processed=True, log=b"a")])
+    with closing(db.open_db(dst_path)) as conn, conn:
+        db.upsert_log_hashes(conn.cursor(), [(other.id, b"hash a")])
+    create_db(
+        src_path,
+        [
+            ENTRY._replace(is_processed=True, log=b"b"),
+            other._replace(is_processed=True, log=b"c"),
+        ],
+    )
+    with closing(db.open_db(src_path)) as conn, conn:
+        db.upsert_log_hashes(
+            conn.cursor(),
+            [(ENTRY.id, b"hash b"), (other.id, b"hash c")],
+        )
+
+    merge(dst_path, [src_path])
+
+    with closing(db.open_db(dst_path)) as conn:
+        hashes = dict(db.iter_log_hashes(conn.cursor(), "main"))
+    assert hashes == {ENTRY.id: b"hash b", other.id: b"hash a"}
+
+
+def record_download_error(db_path: Path, log_id: str, attempts: int) -> None:
+    with closing(db.open_db(db_path)) as conn, conn:
+        db.upsert_download_error(
+            conn.cursor(),
+            log_id,
+            "http",
+            503,
+            attempts,
+            None,
+        )
+
+
+def read_download_errors(db_path: Path) -> list[tuple[str, int]]:
+    with closing(db.open_db(db_path)) as conn:
+        return conn.execute(
+            "SELECT id, attempts FROM download_errors ORDER BY id;",
+        ).fetchall()
+
+
+def test_merge_copies_download_errors(
+    tmp_path: Path,
+    create_db: CreateDB,
+) -> None:
+    failed = ENTRY._replace(is_processed=True, was_error=True)
+    other = ENTRY._replace(id="2024060601gm-00a9-0000-00000000")
+    dst_path = tmp_path / "dst.db"
+    src_path = tmp_path / "src.db"
+    create_db(dst_path, [ENTRY, other._replace(was_error=True)])
+    record_download_error(dst_path, other.id, 1)
+    create_db(
+        src_path,
+        [failed, other._replace(is_processed=True, log=b"a")],
+    )
+    record_download_error(src_path, ENTRY.id, 3)
+
+    merge(dst_path, [src_path])
+
+    assert read_download_errors(dst_path) == [(ENTRY.id, 3)]
+
+
+def test_merge_rejects_same_db(db_path: Path, create_db: CreateDB) -> None:
+    create_db(db_path, [])
+
+    with pytest.raises(UserInputError, match="into itself"):
+        merge(db_path, [db_path])
+
+
+@pytest.mark.parametrize(
+    ("prefix", "expected"),
+    [
+        ("2024", ("2024", "2025")),
+        ("202406", ("202406", "202407")),
+        ("202412", ("202412", "202501")),
+    ],
+)
+def test_get_id_range(prefix: str, expected: tuple[str, str]) -> None:
+    assert get_id_range(prefix) == expected
+
+
+def test_split_by_month(tmp_path: Path, create_db: CreateDB) -> None:
+    src_path = tmp_path / "all.db"
+    create_db(
+        src_path,
+        [
+            ENTRY._replace(is_processed=True, log=b"a"),
+            ENTRY._replace(id="2024061200gm-00a9-0000-00000000"),
+            ENTRY._replace(id="2024120100gm-00a9-0000-00000000"),
+        ],
+    )
+    output_dir = tmp_path / "out"
+
+    results = split(src_path, "month", output_dir)
+
+    assert results == [
+        (output_dir / "all-2024-06.db", 2),
+        (output_dir / "all-2024-12.db", 1),
+    ]
+    assert read_logs(output_dir / "all-2024-06.db") == [
+        (ENTRY.id, 1, 0, b"a"),
+        ("2024061200gm-00a9-0000-00000000", 0, 0, None),
+    ]
+    assert has_status_filter_index(output_dir / "all-2024-12.db")
+
+
+def test_split_copies_download_errors_in_range(
+    tmp_path: Path,
+    create_db: CreateDB,
+) -> None:
+    src_path = tmp_path / "all.db"
+    failed = ENTRY._replace(is_processed=True, was_error=True)
+    create_db(
+        src_path,
+        [failed, failed._replace(id="2024120100gm-00a9-0000-00000000")],
+    )
+    record_download_error(src_path, ENTRY.id, 2)
+    record_download_error(src_path, "2024120100gm-00a9-0000-00000000", 1)
+    output_dir = tmp_path / "out"
+
+    split(src_path, "month", output_dir)
+
+    assert read_download_errors(output_dir / "all-2024-06.db") == [
+        (ENTRY.id, 2),
+    ]
+    assert read_download_errors(output_dir / "all-2024-12.db") == [
+        ("2024120100gm-00a9-0000-00000000", 1),
+    ]
+
+
+def test_split_rejects_existing_output(
+    tmp_path: Path,
+    create_db: CreateDB,
+) -> None:
+    src_path = tmp_path / "all.db"
+    create_db(src_path, [ENTRY])
+    (tmp_path / "all-2024.db").touch()
+
+    with pytest.raises(UserInputError, match="already exists"):
+        split(src_path, "year")
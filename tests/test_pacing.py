@@ -0,0 +1,118 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+from unittest.mock import Mock, patch
+
+import pytest
+from niquests.exceptions import ConnectTimeout, InvalidURL
+
+from houou_logs.exceptions import HTTPStatusError, UserInputError
+from houou_logs.pacing import (
+    DEFAULT_INITIAL_RATE,
+    RATE_INCREASE_STEP,
+    Pacer,
+    is_congestion_error,
+    validate_rates,
+)
+
+
+def test_validate_rates_accepts_equal_rates() -> None:
+    validate_rates(1.0, 1.0)
+
+
+@pytest.mark.parametrize(
+    ("min_rate", "max_rate"),
+    [(0.0, 1.0), (-1.0, 1.0), (2.0, 1.0)],
+)
+def test_validate_rates_rejects_invalid_rates(
+    min_rate: float,
+    max_rate: float,
+) -> None:
+    with pytest.raises(UserInputError):
+        validate_rates(min_rate, max_rate)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [HTTPStatusError(429), HTTPStatusError(503), ConnectTimeout()],
+)
+def test_is_congestion_error_on_server_pressure(error: Exception) -> None:
+    assert is_congestion_error(error)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        HTTPStatusError(404),
+        InvalidURL(),
+        RuntimeError("no log content in response"),
+    ],
+)
+def test_is_congestion_error_on_other_errors(error: Exception) -> None:
+    assert not is_congestion_error(error)
+
+
+@patch("houou_logs.pacing.time")
+def test_pacer_waits_for_token(mock_time: Mock) -> None:
+    mock_time.monotonic.return_value = 100.0
+    pacer = Pacer(0.5, 2.0)
+
+    pacer.wait()
+    mock_time.sleep.assert_not_called()
+
+    mock_time.monotonic.return_value = 100.25
+    pacer.wait()
+    mock_time.sleep.assert_called_once_with(0.75)
+
+
+@patch("houou_logs.pacing.time")
+def test_pacer_does_not_burst_after_idle(mock_time: Mock) -> None:
+    mock_time.monotonic.return_value = 0.0
+    pacer = Pacer(0.5, 2.0)
+
+    mock_time.monotonic.return_value = 60.0
+    pacer.wait()
+    pacer.wait()
+
+    mock_time.sleep.assert_called_once_with(1.0)
+
+
+@patch("houou_logs.pacing.time")
+def test_pacer_speeds_up_on_fast_responses(mock_time: Mock) -> None:
+    mock_time.monotonic.return_value = 0.0
+    pacer = Pacer(0.5, 2.0)
+
+    pacer.wait()
+    mock_time.monotonic.return_value = 0.1
+    pacer.record(congested=False)
+
+    assert pacer.rate == pytest.approx(
+        DEFAULT_INITIAL_RATE + RATE_INCREASE_STEP,
+    )
+
+
+@patch("houou_logs.pacing.time")
+def test_pacer_backs_off_on_slow_responses(mock_time: Mock) -> None:
+    mock_time.monotonic.return_value = 0.0
+    pacer = Pacer(0.5, 2.0)
+
+    pacer.wait()
+    mock_time.monotonic.return_value = 3.0
+    pacer.record(congested=False)
+
+    assert pacer.rate == 0.5
+
+
+@patch("houou_logs.pacing.time")
+def test_pacer_keeps_rate_within_limits(mock_time: Mock) -> None:
+    mock_time.monotonic.return_value = 0.0
+    pacer = Pacer(0.5, 1.0)
+
+    for _ in range(3):
+        pacer.record(congested=True)
+    assert pacer.rate == 0.5
+
+    for _ in range(100):
+        pacer.record(congested=False)
+    assert pacer.rate == 1.0
@@ -0,0 +1,56 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+from collections.abc import Iterator
+
+import pytest
+
+from houou_logs.exceptions import UserInputError
+from houou_logs.parallel import imap_batched, prefetch, validate_jobs
+
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_imap_batched_keeps_input_order(jobs: int) -> None:
+    items = [(i, 1) for i in range(100)]
+    actual = list(imap_batched(add, items, jobs=jobs, batch_size=3))
+    assert actual == list(range(1, 101))
+
+
+def test_validate_jobs_rejects_zero() -> None:
+    with pytest.raises(UserInputError):
+        validate_jobs(0)
+
+
+def test_prefetch_keeps_order() -> None:
+    assert list(prefetch(iter(range(100)), max_pending=2)) == list(range(100))
+
+
+def test_prefetch_reraises_iterator_error() -> None:
+    def items() -> Iterator[int]:
+        yield 1
+        msg = "failed"
+        raise RuntimeError(msg)
+
+    actual = prefetch(items(), max_pending=1)
+    assert next(actual) == 1
+    with pytest.raises(RuntimeError, match="failed"):
+        next(actual)
+
+
+def test_prefetch_stops_iterator_when_closed() -> None:
+    consumed: list[int] = []
+
+    def items() -> Iterator[int]:
+        for i in range(100):
+            consumed.append(i)
+            yield i
+
+    actual = prefetch(items(), max_pending=1)
+    assert next(actual) == 0
+    actual.close()
+    assert len(consumed) < 100
@@ -0,0 +1,143 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import gzip
+from pathlib import Path
+
+from houou_logs import db
+from houou_logs.events import Discard, Event
+from houou_logs.replay import (
+    NUM_TILE_KINDS,
+    RIICHI_ACCEPTED,
+    GameState,
+    iter_replay_results,
+    replay_log,
+)
+
+LOG = b"""<mjloggm ver="2.3">
+<INIT seed="0,1,0,2,4,52" ten="250,250,250,250" oya="0" hai0="0,4,8,88" hai1="12,13" hai2="89,91,16" hai3="24,28"/>
+<T40/><D40/>
+<U41/><E12/>
+<N who="2" m="34314"/>
+<REACH who="0" step="1"/><T44/><D0/><REACH who="0" ten="240,250,250,250" step="2"/>
+<DORA hai="33"/>
+<AGARI ba="1,1" hai="1,2,3" machi="3" ten="30,2000,0" yaku="1,1" doraHai="52" who="1" fromWho="0" sc="240,-23,250,33,250,0,250,0"/>
+<INIT seed="1,0,0,3,5,60" ten="217,283,250,250" oya="1" hai0="1" hai1="2" hai2="3" hai3="4"/>
+<T8/><D8/>
+<RYUUKYOKU ba="0,0" sc="217,-10,283,30,250,-10,250,-10" owari="207,-30.0,313,50.0,240,-5.0,240,-15.0"/>
+</mjloggm>"""  # noqa: E501
+
+
+def count_discards(_log_id: str, compressed_content: bytes) -> int:
+    num_discards = 0
+
+    def callback(_state: GameState, event: Event) -> None:
+        nonlocal num_discards
+        if isinstance(event, Discard):
+            num_discards += 1
+
+    replay_log(compressed_content, callback)
+    return num_discards
+
+
+def test_replay_log_tracks_first_round_state() -> None:
+    snapshots: list[GameState] = []
+
+    def callback(state: GameState, event: Event) -> None:
+        if isinstance(event, Discard) and event.tile == 0:
+            snapshots.append(state.copy())
+
+    replay_log(gzip.compress(LOG), callback)
+    state = snapshots[0]
+
+    assert state.round == 0
+    assert state.honba == 1
+    assert list(state.pond(0)) == [40, 0]
+    assert list(state.pond(1)) == [12]
+    assert state.hand(0)[0] == 0
+    assert state.hand(0)[11] == 1
+    assert state.hand(0)[22] == 1
+    # Pon of 5s called from seat 0 removes two tiles from seat 2.
+    assert state.hand(2)[22] == 0
+    assert state.hand(2)[4] == 1
+    assert list(state.meld_codes(2)) == [34314]
+    assert state.riichi[0] == 1
+
+
+def test_replay_log_applies_scores_and_resets_round() -> None:
+    state = replay_log(gzip.compress(LOG))
+
+    assert state.round == 1
+    assert list(state.scores) == [207, 313, 240, 240]
+    assert list(state.pond(1)) == []
+    assert list(state.pond(0)) == [8]
+    assert sum(state.hand(0)) == 1
+    assert list(state.riichi) == [0, 0, 0, 0]
+    assert state.num_dora_indicators == 1
+    assert state.dora_indicators[0] == 60
+
+
+def test_replay_log_handles_reach_and_dora() -> None:
+    riichi_states: list[int] = []
+    dora_counts: list[int] = []
+
+    def callback(state: GameState, _event: Event) -> None:
+        riichi_states.append(state.riichi[0])
+        dora_counts.append(state.num_dora_indicators)
+
+    replay_log(gzip.compress(LOG), callback)
+
+    assert RIICHI_ACCEPTED in riichi_states
+    assert max(dora_counts) == 2
+
+
+def test_game_state_copy_is_independent() -> None:
+    state = GameState()
+    state.hands[0] = 1
+    copied = state.copy()
+    state.hands[0] = 2
+
+    assert copied.hands[0] == 1
+    assert len(copied.hands) == 4 * NUM_TILE_KINDS
+
+
+def test_iter_replay_results_runs_in_process_pool(db_path: Path) -> None:
+    conn = db.open_db(db_path)
+    try:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+        db.insert_log_entries(
+            cursor,
+            [
+                db.LogEntry(
+                    id=f"202501010{i}gm-00a9-0000-00000000",
+                    date="2025-01-01T00:00",
+                    num_players=4,
+                    is_tonpu=False,
+                    is_processed=True,
+                    was_error=False,
+                    log=gzip.compress(LOG),
+                )
+                for i in range(3)
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    results = list(
+        iter_replay_results(
+            db_path,
+            count_discards,
+            None,
+            None,
+            None,
+            0,
+            jobs=2,
+        ),
+    )
+
+    assert results == [
+        (f"202501010{i}gm-00a9-0000-00000000", 4) for i in range(3)
+    ]
@@ -0,0 +1,136 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import gzip
+
+import pytest
+
+from houou_logs import db
+from houou_logs.rounds import (
+    build_round_offsets,
+    count_game_rounds,
+    get_game_round,
+    index_game_rounds,
+    pack_round_offsets,
+    slice_game_round,
+    unpack_round_offsets,
+)
+
+LOG_ID = "2025010100gm-00a9-0000-00000000"
+ROUND_1 = '<INIT seed="0,0,0,0,0,0" ten="250,250,250,250" oya="0" /><T12 /><D12 /><RYUUKYOKU ba="0,0" sc="250,0,250,0,250,0,250,0" />'  # noqa: E501
+ROUND_2 = '<INIT seed="1,1,0,0,0,0" ten="250,250,250,250" oya="1" /><AGARI who="1" owari="250,0.0,250,0.0,250,0.0,250,0.0" />'  # noqa: E501
+LOG = (
+    '<mjloggm ver="2.3"><SHUFFLE seed="x" ref="" /><GO type="169" />'
+    '<UN n0="A" /><TAIKYOKU oya="0" />'
+    f'{ROUND_1}{ROUND_2}<UN n1="B" /><BYE who="2" /></mjloggm>'
+).encode()
+
+
+def test_build_round_offsets_points_at_init_tags() -> None:
+    offsets = build_round_offsets(LOG)
+
+    assert len(offsets) == 3
+    assert LOG[offsets[0] : offsets[1]].decode() == ROUND_1
+    assert LOG[offsets[1] : offsets[2]].decode() == ROUND_2
+
+
+def test_build_round_offsets_ends_at_root_without_trailing_tags() -> None:
+    log = f"<mjloggm>{ROUND_1}{ROUND_2}</mjloggm>".encode()
+
+    offsets = build_round_offsets(log)
+
+    assert log[offsets[2] :] == b"</mjloggm>"
+
+
+def test_build_round_offsets_rejects_log_without_owari() -> None:
+    with pytest.raises(ValueError, match="owari"):
+        build_round_offsets(f"<mjloggm>{ROUND_1}</mjloggm>".encode())
+
+
+def test_pack_round_offsets_roundtrip() -> None:
+    offsets = [0, 1, 70000, 2**32 - 1]
+    packed = pack_round_offsets(offsets)
+
+    assert len(packed) == 16
+    assert list(unpack_round_offsets(packed)) == offsets
+
+
+def test_slice_game_round_rejects_out_of_range_index() -> None:
+    offsets = unpack_round_offsets(pack_round_offsets([0, 5]))
+
+    with pytest.raises(IndexError, match="round index out of range: 1"):
+        slice_game_round(b"<INIT/>", offsets, 1)
+
+
+def test_get_game_round_uses_stored_index() -> None:
+    conn = db.open_db(":memory:")
+
+    try:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+        db.insert_log_entries(
+            cursor,
+            [
+                db.LogEntry(
+                    id=LOG_ID,
+                    date="2025-01-01T00:00",
+                    num_players=4,
+                    is_tonpu=False,
+                    is_processed=True,
+                    was_error=False,
+                    log=gzip.compress(LOG),
+                ),
+            ],
+        )
+        index_game_rounds(cursor, LOG_ID, LOG)
+
+        round_index = db.get_round_index(cursor, LOG_ID)
+        assert round_index is not None
+        assert round_index[:2] == (len(LOG), 2)
+        assert count_game_rounds(cursor, LOG_ID) == 2
+        assert get_game_round(cursor, LOG_ID, 0) == ROUND_1
+        assert get_game_round(cursor, LOG_ID, 1) == ROUND_2
+    finally:
+        conn.close()
+
+
+def test_get_game_round_rejects_stale_index() -> None:
+    conn = db.open_db(":memory:")
+
+    try:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+        db.insert_log_entries(
+            cursor,
+            [
+                db.LogEntry(
+                    id=LOG_ID,
+                    date="2025-01-01T00:00",
+                    num_players=4,
+                    is_tonpu=False,
+                    is_processed=True,
+                    was_error=False,
+                    log=gzip.compress(LOG + b" "),
+                ),
+            ],
+        )
+        index_game_rounds(cursor, LOG_ID, LOG)
+
+        with pytest.raises(RuntimeError, match="round index is stale"):
+            get_game_round(cursor, LOG_ID, 0)
+    finally:
+        conn.close()
+
+
+def test_get_game_round_requires_index() -> None:
+    conn = db.open_db(":memory:")
+
+    try:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+
+        with pytest.raises(RuntimeError, match="round index not found"):
+            get_game_round(cursor, LOG_ID, 0)
+    finally:
+        conn.close()
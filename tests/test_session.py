@@ -2,10 +2,202 @@
 # SPDX-License-Identifier: MIT
 # This file is part of https://github.com/Apricot-S/houou-logs
 
-from houou_logs.session import create_session
+from unittest.mock import Mock, patch
+
+import pytest
+from niquests import Response, Session
+from niquests.exceptions import ConnectionError as RequestsConnectionError
+from niquests.exceptions import ReadTimeout
+from niquests.models import ReadTimeoutError
+
+from houou_logs.exceptions import UserInputError
+from houou_logs.session import (
+    ENDPOINT_LOG,
+    ENDPOINT_YAKUMAN,
+    MIN_READ_TIMEOUT,
+    MIN_TIMEOUT_SAMPLES,
+    TIMEOUT,
+    AdaptiveTimeout,
+    create_session,
+    get_adaptive_timeout,
+    is_timeout_error,
+    timed_get,
+    timed_request,
+    validate_timeouts,
+)
 
 
 def test_create_session() -> None:
     session = create_session()
     user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/148.0.0.0 Safari/537.36 Edg/148.0.0.0"  # noqa: E501
     assert session.headers["User-Agent"] == user_agent
+
+
+def test_create_session_applies_timeout_limits() -> None:
+    session = create_session(1.0, 2.0)
+    assert get_adaptive_timeout(session, ENDPOINT_LOG).get() == (2.0, 2.0)
+
+
+@pytest.mark.parametrize(
+    ("min_timeout", "max_timeout"),
+    [(0.0, 1.0), (2.0, 1.0)],
+)
+def test_validate_timeouts_rejects_invalid_limits(
+    min_timeout: float,
+    max_timeout: float,
+) -> None:
+    with pytest.raises(UserInputError):
+        validate_timeouts(min_timeout, max_timeout)
+
+
+def test_adaptive_timeout_uses_default_until_enough_samples() -> None:
+    timeout = AdaptiveTimeout(1.0, 30.0)
+    for _ in range(MIN_TIMEOUT_SAMPLES - 1):
+        timeout.record(0.1, 0.1)
+
+    assert timeout.get() == TIMEOUT
+
+
+def test_adaptive_timeout_follows_tail_latency() -> None:
+    timeout = AdaptiveTimeout(0.5, 30.0)
+    for _ in range(99):
+        timeout.record(0.25, 2.0)
+    timeout.record(10.0, 10.0)
+    assert timeout.get() == (0.75, 6.0)
+
+    for _ in range(10):
+        timeout.record(4.0, 4.0)
+    assert timeout.get() == (12.0, 12.0)
+
+
+def test_adaptive_timeout_keeps_read_timeout_for_whole_bodies() -> None:
+    # Fast headers must not shrink the read timeout below the former
+    # fixed timeout, and bodies that were not read to the end are not
+    # counted.
+    timeout = AdaptiveTimeout(0.5, 30.0)
+    for _ in range(MIN_TIMEOUT_SAMPLES):
+        timeout.record(0.25, 0.25)
+        timeout.record(0.25, None)
+
+    assert timeout.get() == (0.75, MIN_READ_TIMEOUT)
+    assert len(timeout.response_times) == MIN_TIMEOUT_SAMPLES
+
+
+def test_adaptive_timeout_is_clamped() -> None:
+    timeout = AdaptiveTimeout(1.0, 3.0)
+    for _ in range(MIN_TIMEOUT_SAMPLES):
+        timeout.record(0.01, 0.01)
+    assert timeout.get() == (1.0, 3.0)
+
+    for _ in range(MIN_TIMEOUT_SAMPLES):
+        timeout.record(100.0, 100.0)
+    assert timeout.get() == (3.0, 3.0)
+
+
+@patch("houou_logs.session.time")
+def test_timed_get_records_response_time_per_endpoint(
+    mock_time: Mock,
+) -> None:
+    session = Mock(spec_set=Session)
+    mock_time.monotonic.side_effect = [0.0, 0.5]
+
+    timed_get(session, ENDPOINT_YAKUMAN, "https://example.com")
+
+    session.get.assert_called_once_with("https://example.com", timeout=TIMEOUT)
+    adaptive_timeout = get_adaptive_timeout(session, ENDPOINT_YAKUMAN)
+    assert list(adaptive_timeout.latencies) == [0.5]
+    assert list(adaptive_timeout.response_times) == [0.5]
+    assert not get_adaptive_timeout(session, ENDPOINT_LOG).response_times
+
+
+def test_timed_get_records_timeout_as_response_time() -> None:
+    session = Mock(spec_set=Session)
+    session.get.side_effect = ReadTimeout()
+
+    with pytest.raises(ReadTimeout):
+        timed_get(session, ENDPOINT_LOG, "https://example.com")
+
+    adaptive_timeout = get_adaptive_timeout(session, ENDPOINT_LOG)
+    assert list(adaptive_timeout.latencies) == [max(TIMEOUT)]
+    assert list(adaptive_timeout.response_times) == [max(TIMEOUT)]
+
+
+@patch("houou_logs.session.time")
+def test_timed_request_records_time_to_end_of_body(mock_time: Mock) -> None:
+    session = Mock(spec_set=Session)
+    res = Mock(spec=Response)
+    session.get.return_value = res
+    mock_time.monotonic.side_effect = [0.0, 0.5, 4.0]
+
+    with timed_request(session, ENDPOINT_LOG, "https://example.com") as actual:
+        assert actual is res
+
+    session.get.assert_called_once_with(
+        "https://example.com",
+        timeout=TIMEOUT,
+        stream=True,
+    )
+    res.close.assert_called_once_with()
+    adaptive_timeout = get_adaptive_timeout(session, ENDPOINT_LOG)
+    assert list(adaptive_timeout.latencies) == [0.5]
+    assert list(adaptive_timeout.response_times) == [4.0]
+
+
+@patch("houou_logs.session.time")
+def test_timed_request_records_body_read_timeout(mock_time: Mock) -> None:
+    session = Mock(spec_set=Session)
+    res = Mock(spec=Response)
+    # niquests raises a read timeout in the body as a ConnectionError.
+    res.iter_content.side_effect = RequestsConnectionError(
+        ReadTimeoutError(None, "https://example.com", "Read timed out."),
+    )
+    session.get.return_value = res
+    mock_time.monotonic.side_effect = [0.0, 0.5, 1.0]
+
+    with (
+        pytest.raises(RequestsConnectionError),
+        timed_request(session, ENDPOINT_LOG, "https://example.com") as actual,
+    ):
+        actual.iter_content(1024)
+
+    res.close.assert_called_once_with()
+    adaptive_timeout = get_adaptive_timeout(session, ENDPOINT_LOG)
+    assert list(adaptive_timeout.latencies) == [0.5]
+    assert list(adaptive_timeout.response_times) == [max(TIMEOUT)]
+
+
+def test_timed_request_grows_read_timeout_after_body_timeouts() -> None:
+    session = create_session(1.0, 30.0)
+    res = Mock(spec=Response)
+    res.iter_content.side_effect = RequestsConnectionError(
+        ReadTimeoutError(None, "https://example.com", "Read timed out."),
+    )
+    session.get = Mock(return_value=res)
+
+    for _ in range(MIN_TIMEOUT_SAMPLES):
+        with (
+            pytest.raises(RequestsConnectionError),
+            timed_request(session, ENDPOINT_LOG, "https://example.com") as r,
+        ):
+            r.iter_content(1024)
+
+    _, read_timeout = get_adaptive_timeout(session, ENDPOINT_LOG).get()
+    assert read_timeout > TIMEOUT[1]
+
+
+@pytest.mark.parametrize(
+    ("error", "expected"),
+    [
+        (ReadTimeout(), True),
+        (
+            RequestsConnectionError(
+                ReadTimeoutError(None, "https://example.com", "timed out"),
+            ),
+            True,
+        ),
+        (RequestsConnectionError("connection reset"), False),
+        (RuntimeError("no log content"), False),
+    ],
+)
+def test_is_timeout_error(error: Exception, *, expected: bool) -> None:
+    assert is_timeout_error(error) == expected
@@ -0,0 +1,99 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import gzip
+from collections.abc import Iterator
+
+import pytest
+
+from houou_logs.binary_log import encode_log_content, is_binary_log
+from houou_logs.exceptions import UserInputError
+from houou_logs.storage import (
+    CORRUPT_LOG_HASH,
+    contains_log_marker,
+    convert_log_content,
+    decompress_log_content,
+    hash_log_content,
+    open_log_content,
+    validate_storage_format,
+)
+
+LOG = b'<mjloggm ver="2.3"><T40/><D40/></mjloggm>'
+
+
+@pytest.mark.parametrize("storage_format", ["gzip", "binary"])
+def test_validate_storage_format_accepts_known_formats(
+    storage_format: str,
+) -> None:
+    validate_storage_format(storage_format)
+
+
+def test_validate_storage_format_rejects_unknown_format() -> None:
+    with pytest.raises(UserInputError):
+        validate_storage_format("zstd")
+
+
+@pytest.mark.parametrize(
+    "blob",
+    [gzip.compress(LOG), encode_log_content(LOG)],
+)
+def test_decompress_log_content_handles_both_formats(blob: bytes) -> None:
+    assert decompress_log_content(blob) == LOG
+
+
+@pytest.mark.parametrize(
+    "blob",
+    [gzip.compress(LOG), encode_log_content(LOG)],
+)
+def test_open_log_content_handles_both_formats(blob: bytes) -> None:
+    with open_log_content(blob) as f:
+        assert f.read() == LOG
+
+
+def test_convert_log_content_to_binary() -> None:
+    converted = convert_log_content(gzip.compress(LOG), "binary")
+    assert converted is not None
+    assert is_binary_log(converted)
+    assert decompress_log_content(converted) == LOG
+
+
+def test_convert_log_content_to_gzip() -> None:
+    converted = convert_log_content(encode_log_content(LOG), "gzip")
+    assert converted is not None
+    assert gzip.decompress(converted) == LOG
+
+
+@pytest.mark.parametrize(
+    ("blob", "storage_format"),
+    [(gzip.compress(LOG), "gzip"), (encode_log_content(LOG), "binary")],
+)
+def test_convert_log_content_skips_same_format(
+    blob: bytes,
+    storage_format: str,
+) -> None:
+    assert convert_log_content(blob, storage_format) is None
+
+
+def test_contains_log_marker_finds_marker_across_chunks() -> None:
+    assert contains_log_marker([b"<mj", b"loggm>"])
+    assert not contains_log_marker([b"<html>", b"Error</html>"])
+
+
+def test_contains_log_marker_reads_all_chunks() -> None:
+    def chunks() -> Iterator[bytes]:
+        yield LOG
+        msg = "truncated"
+        raise EOFError(msg)
+
+    with pytest.raises(EOFError):
+        contains_log_marker(chunks())
+
+
+def test_hash_log_content_hashes_decompressed_content() -> None:
+    log_hash = hash_log_content(gzip.compress(LOG, mtime=0))
+
+    assert log_hash == hash_log_content(gzip.compress(LOG, mtime=1))
+    assert log_hash == hash_log_content(encode_log_content(LOG))
+    assert log_hash != hash_log_content(gzip.compress(b"<mjloggm/>"))
+    assert hash_log_content(b"corrupt") == CORRUPT_LOG_HASH
@@ -0,0 +1,250 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import gzip
+from contextlib import closing
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from houou_logs import db
+from houou_logs.exceptions import UserInputError
+from houou_logs.merge import copy_range_from
+from houou_logs.storage import CORRUPT_LOG_HASH, hash_log_content
+from houou_logs.sync import (
+    diff,
+    iter_different_entries,
+    list_different_ranges,
+    sync,
+)
+from tests.conftest import CreateDB
+
+LOG = b'<mjloggm ver="2.3"><T40/><D40/></mjloggm>'
+NEW_LOG = gzip.compress(b"<mjloggm></mjloggm>")
+ENTRY = db.LogEntry(
+    id="2024060600gm-00a9-0000-00000000",
+    date="2024-06-06T00:00",
+    num_players=4,
+    is_tonpu=False,
+    is_processed=False,
+    was_error=False,
+    log=None,
+)
+SHARED = [
+    ENTRY._replace(id=log_id, is_processed=True, log=gzip.compress(LOG))
+    for log_id in [
+        "2023010100gm-00a9-0000-00000000",
+        "2024060600gm-00a9-0000-00000001",
+        "2024060612gm-00a9-0000-00000000",
+    ]
+]
+
+
+@pytest.fixture
+def replicas(tmp_path: Path, create_db: CreateDB) -> tuple[Path, Path]:
+    dst_path = tmp_path / "dst.db"
+    src_path = tmp_path / "src.db"
+    create_db(dst_path, [*SHARED, ENTRY])
+    create_db(
+        src_path,
+        [
+            *SHARED,
+            ENTRY._replace(is_processed=True, log=NEW_LOG),
+            ENTRY._replace(id="2024060601gm-00a9-0000-00000000"),
+        ],
+    )
+    return (dst_path, src_path)
+
+
+def test_iter_different_entries_walks_both_streams() -> None:
+    states = iter(
+        [
+            ("a", 1, 0, b"log"),
+            ("b", 0, 0, None),
+            ("d", 1, 1, None),
+        ],
+    )
+    other_states = iter(
+        [
+            ("a", 1, 0, b"log"),
+            ("c", 0, 0, None),
+            ("d", 1, 0, b"log"),
+            ("e", 0, 0, None),
+        ],
+    )
+
+    assert list(iter_different_entries(states, other_states)) == [
+        ("b", "undownloaded", "missing"),
+        ("c", "missing", "undownloaded"),
+        ("d", "error", "downloaded"),
+        ("e", "missing", "undownloaded"),
+    ]
+
+
+def test_iter_different_entries_compares_content_hashes() -> None:
+    log_id = ENTRY.id
+    log_hash = hash_log_content(gzip.compress(LOG))
+    other_hashes = [
+        log_hash,
+        hash_log_content(NEW_LOG),
+        CORRUPT_LOG_HASH,
+        None,
+    ]
+
+    actual = [
+        list(
+            iter_different_entries(
+                iter([(log_id, 1, 0, log_hash)]),
+                iter([(log_id, 1, 0, other_hash)]),
+            ),
+        )
+        for other_hash in other_hashes
+    ]
+
+    assert actual == [
+        [],
+        [(log_id, "downloaded", "downloaded")],
+        [(log_id, "downloaded", "corrupt")],
+        [(log_id, "downloaded", "downloaded")],
+    ]
+
+
+def test_list_different_ranges_descends_into_different_ranges() -> None:
+    digests = {
+        "2023": 1,
+        "202301": 1,
+        "20230101": 1,
+        "2023010100": 1,
+        "2024": 2,
+        "202406": 2,
+        "20240606": 2,
+        "2024060600": 1,
+        "2024060612": 1,
+    }
+    other_digests = {
+        **digests,
+        # Not compared, since the year has the same digest.
+        "2023010100": 2,
+        "2024": 3,
+        "202406": 3,
+        "20240606": 3,
+        "2024060601": 1,
+        "2024060612": 2,
+    }
+
+    assert list_different_ranges(digests, other_digests) == [
+        ("2024060601", "2024060602"),
+        ("2024060612", "2024060613"),
+    ]
+
+
+def test_diff_lists_different_entries(replicas: tuple[Path, Path]) -> None:
+    dst_path, src_path = replicas
+
+    assert diff(dst_path, src_path) == [
+        (ENTRY.id, "undownloaded", "downloaded"),
+        ("2024060601gm-00a9-0000-00000000", "missing", "undownloaded"),
+    ]
+
+
+def test_diff_reads_only_different_ranges(
+    replicas: tuple[Path, Path],
+) -> None:
+    dst_path, src_path = replicas
+
+    with patch(
+        "houou_logs.sync.db.iter_log_states",
+        wraps=db.iter_log_states,
+    ) as iter_log_states:
+        diff(dst_path, src_path)
+
+    assert {call.args[2] for call in iter_log_states.call_args_list} == {
+        ("2024060600", "2024060601"),
+        ("2024060601", "2024060602"),
+    }
+
+
+def test_diff_finds_different_contents(
+    tmp_path: Path,
+    create_db: CreateDB,
+) -> None:
+    dst_path = tmp_path / "dst.db"
+    src_path = tmp_path / "src.db"
+    create_db(dst_path, SHARED)
+    create_db(src_path, [*SHARED[:2], SHARED[2]._replace(log=NEW_LOG)])
+
+    assert diff(dst_path, src_path) == [
+        (SHARED[2].id, "downloaded", "downloaded"),
+    ]
+
+
+def test_diff_stores_missing_hashes_once(
+    replicas: tuple[Path, Path],
+) -> None:
+    dst_path, src_path = replicas
+
+    expected = diff(dst_path, src_path)
+
+    for path in replicas:
+        with closing(db.open_db(path)) as conn:
+            cursor = conn.cursor()
+            hashes = dict(db.iter_log_hashes(cursor, "main"))
+            assert hashes == {
+                log_id: hash_log_content(log)
+                for log_id, _, _, log in conn.execute(
+                    "SELECT id, 0, 0, log FROM logs WHERE log IS NOT NULL;",
+                )
+            }
+    with patch("houou_logs.sync.hash_log_content") as hash_content:
+        assert diff(dst_path, src_path) == expected
+    hash_content.assert_not_called()
+
+
+def test_sync_copies_missing_and_newer_entries(
+    replicas: tuple[Path, Path],
+) -> None:
+    dst_path, src_path = replicas
+
+    assert sync(dst_path, src_path) == 2
+    assert diff(dst_path, src_path) == []
+    with closing(db.open_db(dst_path)) as conn:
+        cursor = conn.cursor()
+        assert db.get_log_content(cursor, ENTRY.id) == NEW_LOG
+        hashes = dict(db.iter_log_hashes(cursor, "main"))
+    assert hashes[ENTRY.id] == hash_log_content(NEW_LOG)
+
+
+def test_sync_copies_only_different_ranges(
+    replicas: tuple[Path, Path],
+) -> None:
+    dst_path, src_path = replicas
+
+    with patch(
+        "houou_logs.sync.copy_range_from",
+        wraps=copy_range_from,
+    ) as copy_range:
+        sync(dst_path, src_path)
+
+    assert [call.args[2] for call in copy_range.call_args_list] == [
+        ("2024060600", "2024060601"),
+        ("2024060601", "2024060602"),
+    ]
+
+
+def test_sync_keeps_newer_destination_entries(
+    replicas: tuple[Path, Path],
+) -> None:
+    dst_path, src_path = replicas
+
+    assert sync(src_path, dst_path) == 0
+    with closing(db.open_db(src_path)) as conn:
+        assert db.get_log_content(conn.cursor(), ENTRY.id) == NEW_LOG
+
+
+def test_diff_rejects_same_db(db_path: Path, create_db: CreateDB) -> None:
+    create_db(db_path, [])
+
+    with pytest.raises(UserInputError, match="with itself"):
+        diff(db_path, db_path)
@@ -101,3 +101,160 @@ def test_validate_continues_after_resetting_invalid_log(
         None,
     )
     assert rows[2][1:] == (1, 0, valid_log())
+
+
+def test_validate_index_rounds_stores_round_offsets(db_path: Path) -> None:
+    log_id = "2025010100gm-00a9-0000-00000000"
+    conn = db.open_db(db_path)
+    try:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+        insert_processed_log(cursor, log_id, valid_log())
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert validate_module.validate(db_path, index_rounds=True) == (
+        False,
+        1,
+        1,
+    )
+
+    conn = db.open_db(db_path)
+    try:
+        cursor = conn.cursor()
+        round_index = db.get_round_index(cursor, log_id)
+    finally:
+        conn.close()
+
+    assert round_index is not None
+    size, num_rounds, _ = round_index
+    assert size == len(gzip.decompress(valid_log()))
+    assert num_rounds == 1
+
+
+SCORED_LOG = """
+<mjloggm ver="2.3">
+<INIT seed="0,0,0,0,0,0" ten="250,250,250,250" oya="0" hai0="" hai1="" hai2="" hai3=""/>
+<REACH who="1" step="1"/>
+<REACH who="1" ten="250,240,250,250" step="2"/>
+<AGARI ba="0,1" hai="" machi="0" ten="30,3900,0" yaku="1,1" doraHai="0" who="1" fromWho="0" sc="250,-39,240,49,250,0,250,0" />
+<INIT seed="1,0,0,0,0,0" ten="211,289,250,250" oya="1" hai0="" hai1="" hai2="" hai3=""/>
+<REACH who="2" step="1"/>
+<REACH who="2" ten="211,289,240,250" step="2"/>
+<RYUUKYOKU ba="0,1" sc="211,-15,289,-15,240,15,250,15" owari="196,-30.4,274,17.4,255,-4.5,265,16.5" />
+</mjloggm>
+"""  # noqa: E501
+
+
+def test_check_score_consistency_accepts_consistent_log() -> None:
+    validate_module.check_score_consistency(SCORED_LOG.encode())
+
+
+def test_check_score_consistency_accepts_leftover_riichi_sticks() -> None:
+    content = SCORED_LOG.replace(
+        'owari="196,-30.4,274,17.4,255,-4.5,265,16.5"',
+        'owari="196,-30.4,274,17.4,255,-4.5,275,17.5"',
+    )
+    validate_module.check_score_consistency(content.encode())
+
+
+def test_check_score_consistency_rejects_init_mismatch() -> None:
+    content = SCORED_LOG.replace(
+        'ten="211,289,250,250"',
+        'ten="211,289,250,260"',
+    )
+    with pytest.raises(ValueError, match="INIT ten"):
+        validate_module.check_score_consistency(content.encode())
+
+
+def test_check_score_consistency_rejects_owari_mismatch() -> None:
+    content = SCORED_LOG.replace('owari="196,', 'owari="200,')
+    with pytest.raises(ValueError, match="owari scores"):
+        validate_module.check_score_consistency(content.encode())
+
+
+def test_validate_semantic_resets_inconsistent_log(db_path: Path) -> None:
+    conn = db.open_db(db_path)
+    try:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+        insert_processed_log(
+            cursor,
+            "2025010100gm-00a9-0000-00000000",
+            compress_log(SCORED_LOG),
+        )
+        insert_processed_log(
+            cursor,
+            "2025010101gm-00a9-0000-00000000",
+            compress_log(SCORED_LOG.replace('owari="196,', 'owari="200,')),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert validate_module.validate(db_path, level="semantic") == (
+        True,
+        1,
+        2,
+    )
+
+    conn = db.open_db(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT is_processed FROM logs ORDER BY id ASC;")
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    assert rows == [(1,), (0,)]
+
+
+WALL_MISMATCH_LOG = SCORED_LOG.replace('hai3=""', 'hai3="0"').replace(
+    '<mjloggm ver="2.3">',
+    '<mjloggm ver="2.3"><SHUFFLE seed="mt19937ar-sha512-n288-base64,AAAA" ref=""/>',  # noqa: E501
+)
+
+
+def test_check_log_content_wall_level_reports_mismatch() -> None:
+    content = WALL_MISMATCH_LOG
+
+    error, wall_error, _ = validate_module.check_log_content(
+        compress_log(content),
+        "wall",
+        index_rounds=False,
+    )
+
+    assert error is None
+    assert wall_error is not None
+    assert wall_error.startswith(
+        "inconsistent wall: invalid shuffle seed length",
+    )
+
+
+def test_validate_wall_level_keeps_mismatching_logs(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    db_path = tmp_path / "wall.db"
+    log_id = "2025010100gm-00a9-0000-00000000"
+    conn = db.open_db(db_path)
+    try:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+        insert_processed_log(cursor, log_id, compress_log(WALL_MISMATCH_LOG))
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert validate_module.validate(db_path, level="wall") == (True, 0, 1)
+
+    conn = db.open_db(db_path)
+    try:
+        cursor = conn.cursor()
+        content = db.get_log_content(cursor, log_id)
+    finally:
+        conn.close()
+
+    assert content == compress_log(WALL_MISMATCH_LOG)
+    assert f"{log_id}: inconsistent wall" in capsys.readouterr().out
@@ -0,0 +1,163 @@
+# SPDX-FileCopyrightText: 2026 Apricot S.
+# SPDX-License-Identifier: MIT
+# This file is part of https://github.com/Apricot-S/houou-logs
+
+import base64
+import random
+from array import array
+
+import pytest
+
+from houou_logs.wall import (
+    MT_STATE_SIZE,
+    MT_STATE_VERSION,
+    SHUFFLE_SEED_PREFIX,
+    WALL_SIZE,
+    Wall,
+    create_generator,
+    deal_hands,
+    decode_shuffle_seed,
+    generate_walls,
+    init_by_array,
+    pack_words,
+    reconstruct_walls,
+    unpack_words,
+    verify_walls,
+)
+
+KEY = array("I", range(1, MT_STATE_SIZE + 1))
+SEED = SHUFFLE_SEED_PREFIX + base64.b64encode(pack_words(KEY)).decode()
+
+# The first outputs of the reference mt19937ar.c after
+# init_by_array({0x123, 0x234, 0x345, 0x456}), from mt19937ar.out.
+MT_REFERENCE_KEY = array("I", [0x123, 0x234, 0x345, 0x456])
+MT_REFERENCE_OUTPUTS = [
+    1067595299,
+    955945823,
+    477289528,
+    4107218783,
+    4228976476,
+]
+
+
+def build_log(seed: str, *, rinshan: bool = False) -> bytes:
+    wall = generate_walls(seed, 1)[0]
+    hands = deal_hands(wall, 0)
+    hai = " ".join(
+        f'hai{who}="{",".join(map(str, hand))}"'
+        for who, hand in enumerate(hands)
+    )
+    tiles = wall.tiles
+
+    body = f"<T{tiles[83]}/><D{tiles[83]}/><U{tiles[82]}/><E{tiles[82]}/>"
+    if rinshan:
+        # Meld contents are not checked, only where the next draw comes
+        # from.
+        body += f'<V{tiles[81]}/><N who="2" m="{8 << 8}" />'
+        body += f'<DORA hai="{tiles[7]}" /><V{tiles[1]}/><F{tiles[1]}/>'
+        body += f"<W{tiles[80]}/>"
+
+    return f"""<mjloggm ver="2.3">
+<SHUFFLE seed="{seed}" ref=""/>
+<GO type="169" lobby="0"/>
+<INIT seed="0,0,0,{wall.dice[0]},{wall.dice[1]},{tiles[5]}" ten="250,250,250,250" oya="0" {hai}/>
+{body}
+<RYUUKYOKU ba="0,0" sc="250,0,250,0,250,0,250,0" owari="250,0.0,250,0.0,250,0.0,250,0.0" />
+</mjloggm>""".encode()  # noqa: E501
+
+
+def test_create_generator_matches_init_by_array() -> None:
+    generator = create_generator(KEY)
+    version, state, _ = generator.getstate()
+    assert state == (*init_by_array(KEY), MT_STATE_SIZE)
+
+    # A trailing zero word takes the pure-Python path.
+    key = array("I", KEY)
+    key[-1] = 0
+    expected = random.Random()  # noqa: S311
+    expected.setstate((version, (*init_by_array(key), MT_STATE_SIZE), None))
+    assert create_generator(key).getrandbits(64) == expected.getrandbits(64)
+
+
+def test_create_generator_matches_reference_outputs() -> None:
+    generator = create_generator(MT_REFERENCE_KEY)
+    assert [
+        generator.getrandbits(32) for _ in MT_REFERENCE_OUTPUTS
+    ] == MT_REFERENCE_OUTPUTS
+
+    # generate_walls draws the outputs of a round as a single integer.
+    generator = create_generator(MT_REFERENCE_KEY)
+    num_bytes = 4 * len(MT_REFERENCE_OUTPUTS)
+    data = generator.getrandbits(8 * num_bytes).to_bytes(num_bytes, "little")
+    assert unpack_words(data).tolist() == MT_REFERENCE_OUTPUTS
+
+
+def test_init_by_array_matches_reference_outputs() -> None:
+    generator = random.Random()  # noqa: S311
+    state = (*init_by_array(MT_REFERENCE_KEY), MT_STATE_SIZE)
+    generator.setstate((MT_STATE_VERSION, state, None))
+    assert [
+        generator.getrandbits(32) for _ in MT_REFERENCE_OUTPUTS
+    ] == MT_REFERENCE_OUTPUTS
+
+
+def test_decode_shuffle_seed_rejects_unknown_format() -> None:
+    with pytest.raises(ValueError, match="unsupported shuffle seed format"):
+        decode_shuffle_seed("mt19937ar,0123")
+
+    with pytest.raises(ValueError, match="invalid shuffle seed length"):
+        decode_shuffle_seed(SHUFFLE_SEED_PREFIX + "AAAA")
+
+
+def test_generate_walls_continues_generator_across_rounds() -> None:
+    walls = generate_walls(SEED, 3)
+
+    assert len(walls) == 3
+    for wall in walls:
+        assert sorted(wall.tiles) == list(range(WALL_SIZE))
+        assert all(0 <= die < 6 for die in wall.dice)
+    assert walls[0] != walls[1]
+    assert generate_walls(SEED, 1) == walls[:1]
+
+
+def test_deal_hands_starts_from_oya() -> None:
+    wall = Wall(bytes(range(WALL_SIZE)), (0, 0))
+    hands = deal_hands(wall, 1)
+
+    assert hands[1][:4] == (135, 134, 133, 132)
+    assert hands[2][:4] == (131, 130, 129, 128)
+    assert hands[1][12] == 87
+    assert hands[0][12] == 84
+    assert all(len(hand) == 13 for hand in hands)
+
+
+def test_verify_walls_accepts_log_built_from_seed() -> None:
+    assert verify_walls(build_log(SEED))
+    assert verify_walls(build_log(SEED, rinshan=True))
+
+
+def test_verify_walls_rejects_wrong_draw() -> None:
+    wall = generate_walls(SEED, 1)[0]
+    content = build_log(SEED).replace(
+        b"<U%d/>" % wall.tiles[82],
+        b"<U%d/>" % wall.tiles[81],
+    )
+
+    with pytest.raises(ValueError, match="round 0: draw"):
+        verify_walls(content)
+
+
+def test_verify_walls_rejects_wrong_hand() -> None:
+    content = build_log(SEED).replace(b'hai0="', b'hai0="999,', 1)
+
+    with pytest.raises(ValueError, match="hand of player 0"):
+        verify_walls(content)
+
+
+def test_reconstruct_walls_skips_unsupported_logs() -> None:
+    no_seed = build_log(SEED).replace(b"<SHUFFLE", b"<SHUFFLEX", 1)
+    assert reconstruct_walls(no_seed) is None
+
+    three_player = build_log(SEED).replace(b'hai3="', b'hai3="" x="', 1)
+    assert reconstruct_walls(three_player) is None
+    assert not verify_walls(three_player)
@@ -2,17 +2,27 @@
 # SPDX-License-Identifier: MIT
 # This file is part of https://github.com/Apricot-S/houou-logs
 
+from contextlib import closing
 from datetime import UTC, datetime
+from pathlib import Path
+from unittest.mock import Mock
 
 import pytest
+from niquests import Response, Session
 
+from houou_logs import db
 from houou_logs.db import LogEntry
 from houou_logs.exceptions import UserInputError
 from houou_logs.yakuman import (
     build_url,
     extract_ids,
+    is_month_complete,
+    iter_ids,
+    iter_months,
     parse_entries,
     parse_id,
+    parse_year_month,
+    update_yakuman_month,
     validate_yakuman_log_date,
 )
 
@@ -160,6 +170,24 @@ sw();
     ]
 
 
+def test_extract_ids_decodes_string_escapes() -> None:
+    text = r"""ykm=['01/31 23:57',"it\'s \"x\" 一",1.5,[],'2025013123gm-0001-0000-12b924e3'];"""  # noqa: E501
+
+    assert extract_ids(text) == [
+        ("01/31 23:57", "2025013123gm-0001-0000-12b924e3"),
+    ]
+
+
+def test_iter_ids_yields_entries_before_reading_the_rest() -> None:
+    text = """ykm=['01/31 23:57','a','b',[39],'2025013123gm-0001-0000-12b924e3',foo"""  # noqa: E501
+
+    ids = iter_ids(text)
+
+    assert next(ids) == ("01/31 23:57", "2025013123gm-0001-0000-12b924e3")
+    with pytest.raises(RuntimeError, match="failed to parse ykm array"):
+        next(ids)
+
+
 def test_parse_id_new_format() -> None:
     year = 2025
     date = "01/31 23:57"
@@ -229,7 +257,7 @@ def test_parse_entries_skips_invalid_yakuman_log_id() -> None:
         ("04/16 10:27", "2007041610gm-00c1-0000-75574173"),
     ]
 
-    entries = parse_entries(2007, ids)
+    entries = list(parse_entries(2007, ids))
 
     assert entries == [
         LogEntry(
@@ -242,3 +270,73 @@ def test_parse_entries_skips_invalid_yakuman_log_id() -> None:
             log=None,
         ),
     ]
+
+
+YKM_TEXT = b"""ykm=['01/31 23:57','x','',[39],'2025013123gm-0001-0000-12b924e3&tw=2'];
+sw();
+"""  # noqa: E501
+
+
+def test_parse_year_month() -> None:
+    assert parse_year_month("2006-10") == (2006, 10)
+    with pytest.raises(UserInputError, match="YYYY-MM"):
+        parse_year_month("2006/10")
+
+
+def test_iter_months_crosses_year() -> None:
+    assert list(iter_months((2006, 11), (2007, 2))) == [
+        (2006, 11),
+        (2006, 12),
+        (2007, 1),
+        (2007, 2),
+    ]
+
+
+def test_is_month_complete_after_settle_time() -> None:
+    assert not is_month_complete(2025, 12, datetime(2026, 1, 1, tzinfo=UTC))
+    assert is_month_complete(2025, 12, datetime(2026, 1, 2, tzinfo=UTC))
+
+
+def mock_ykm_response(status_code: int, etag: str | None = None) -> Mock:
+    res = Mock(spec=Response)
+    res.status_code = status_code
+    res.content = YKM_TEXT
+    res.headers = {} if etag is None else {"ETag": etag}
+    res.raise_for_status.return_value = None
+    return res
+
+
+def test_update_yakuman_month_tracks_changes(db_path: Path) -> None:
+    session = Mock(spec_set=Session)
+    session.get.side_effect = [
+        mock_ykm_response(200, '"1"'),
+        mock_ykm_response(304),
+    ]
+    now = datetime(2025, 1, 20, tzinfo=UTC)
+    later = datetime(2025, 2, 5, tzinfo=UTC)
+
+    with closing(db.open_db(db_path)) as conn, conn:
+        db.setup_table(conn)
+        cursor = conn.cursor()
+
+        assert update_yakuman_month(cursor, session, 2025, 1, now) == 1
+        assert db.get_yakuman_index(cursor, "2025-01") == (
+            len(YKM_TEXT),
+            '"1"',
+            False,
+        )
+
+        # Not modified, but now the month is finished.
+        assert update_yakuman_month(cursor, session, 2025, 1, later) == 0
+        assert session.get.call_args.kwargs["headers"] == {
+            "If-None-Match": '"1"',
+        }
+        assert db.get_yakuman_index(cursor, "2025-01") == (
+            len(YKM_TEXT),
+            '"1"',
+            True,
+        )
+
+        # Finished months are skipped without a request.
+        assert update_yakuman_month(cursor, session, 2025, 1, later) == 0
+        assert session.get.call_count == 2